@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark: concurrent coroutine throughput of AsyncTimeTrackerDB vs the sync API.
+
+Runs the same mixed workload (mostly reads, some timer start/stop writes)
+through TimeTrackerDB sequentially and through AsyncTimeTrackerDB with many
+concurrent coroutines, and reports throughput plus the worst event-loop stall
+observed while the async run was in flight.
+
+    python benchmarks/bench_async_db.py --entries 20000 --ops 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timetracking.async_db import AsyncTimeTrackerDB
+from timetracking.database import TimeTrackerDB
+
+
+def populate(path, projects, entries):
+    db = TimeTrackerDB(path)
+    project_ids = [db.add_project(f"Project {i}") for i in range(projects)]
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO time_entries (project_id, description, start_time, end_time, duration_minutes) VALUES (?, ?, ?, ?, ?)",
+        [(project_ids[i % projects], f"Task {i}", "2024-01-01T09:00:00", "2024-01-01T10:00:00", 60)
+         for i in range(entries)]
+    )
+    conn.commit()
+    conn.close()
+    return project_ids
+
+
+def workload(project_ids, ops):
+    """Yield (method, args) pairs: 1 in 10 operations is a write"""
+    for i in range(ops):
+        project_id = project_ids[i % len(project_ids)]
+        if i % 20 == 0:
+            yield "start_timer", (project_id, "bench")
+        elif i % 20 == 10:
+            yield "stop_timer", (project_id,)
+        elif i % 2:
+            yield "get_running_timer", (project_id,)
+        else:
+            yield "get_projects", ()
+
+
+def run_sync(path, project_ids, ops):
+    db = TimeTrackerDB(path)
+    start = time.perf_counter()
+    for method, args in workload(project_ids, ops):
+        try:
+            getattr(db, method)(*args)
+        except ValueError:
+            pass
+    return time.perf_counter() - start
+
+
+async def run_async(path, project_ids, ops, concurrency, readers):
+    stalls = []
+
+    async def ticker(stop):
+        # Measures how late the loop wakes us: the event-loop stall caused by the workload
+        while not stop.is_set():
+            before = time.perf_counter()
+            await asyncio.sleep(0.005)
+            stalls.append(time.perf_counter() - before - 0.005)
+
+    async with AsyncTimeTrackerDB(path, readers=readers) as db:
+        queue = list(workload(project_ids, ops))
+        stop = asyncio.Event()
+        tick = asyncio.ensure_future(ticker(stop))
+
+        async def worker():
+            while queue:
+                method, args = queue.pop()
+                try:
+                    await getattr(db, method)(*args)
+                except ValueError:
+                    pass
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await tick
+    return elapsed, max(stalls) if stalls else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--readers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "bench.db")
+        project_ids = populate(path, args.projects, args.entries)
+
+        sync_elapsed = run_sync(path, project_ids, args.ops)
+        async_elapsed, max_stall = asyncio.run(
+            run_async(path, project_ids, args.ops, args.concurrency, args.readers)
+        )
+
+    print(f"{'mode':<28}{'seconds':>10}{'ops/s':>12}")
+    print(f"{'sync (sequential)':<28}{sync_elapsed:>10.3f}{args.ops / sync_elapsed:>12.0f}")
+    label = f"async ({args.concurrency} coroutines)"
+    print(f"{label:<28}{async_elapsed:>10.3f}{args.ops / async_elapsed:>12.0f}")
+    print(f"max event-loop stall during async run: {max_stall * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
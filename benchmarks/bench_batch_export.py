@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark: batch export of monthly reports, one process vs a pool per core.
+
+Builds a database with one month of entries spread over many projects and
+exports one PDF per project with BatchExporter, first in a single process,
+then with more worker processes. Prints the wall time and the speedup over
+one process for each pool size.
+
+    python benchmarks/bench_batch_export.py --projects 50 --entries-per-report 400
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timetracking.batch_export import BatchExporter, monthly_jobs
+from timetracking.database import TimeTrackerDB
+
+
+def populate(path, projects, per_project):
+    db = TimeTrackerDB(path)
+    project_ids = [db.add_project(f"Client {i}", rate=50.0) for i in range(projects)]
+    # Every entry falls in January 2024
+    step = timedelta(days=30) / (projects * per_project)
+    start = datetime(2024, 1, 1, 0, 0)
+    rows = []
+    for i in range(projects * per_project):
+        entry_start = start + step * i
+        rows.append((project_ids[i % projects], f"Task {i}", entry_start.isoformat(timespec="seconds"),
+                     (entry_start + step * 0.9).isoformat(timespec="seconds"), 1))
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO time_entries (project_id, description, start_time, end_time, duration_minutes) VALUES (?, ?, ?, ?, ?)",
+        rows
+    )
+    conn.commit()
+    conn.close()
+    return db
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--entries-per-report", type=int, default=400)
+    parser.add_argument("--workers", type=int, nargs="+", default=None,
+                        help="pool sizes to time (default: 1, 2, 4, ... up to the number of cores)")
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    workers = args.workers or sorted({1, cores} | {2 ** i for i in range(1, cores.bit_length()) if 2 ** i < cores})
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = populate(os.path.join(temp_dir, "bench.db"), args.projects, args.entries_per_report)
+        jobs = monthly_jobs(db, ["2024-01"])
+        print(f"{len(jobs)} reports of {args.entries_per_report} entries, {cores} cores")
+        print(f"{'workers':>8}{'s':>9}{'speedup':>9}")
+        baseline = None
+        for count in workers:
+            start = time.perf_counter()
+            results = list(BatchExporter(db, os.path.join(temp_dir, f"out{count}"), count).run(jobs))
+            elapsed = time.perf_counter() - start
+            assert all(result.ok for result in results), [result.error for result in results if not result.ok]
+            baseline = baseline or elapsed
+            print(f"{count:>8}{elapsed:>9.1f}{baseline / elapsed:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark: time and peak memory of building report email bodies.
+
+Builds a ReportModel of many entries, half of them on projects with a rate,
+and times the HTML body of the report email and the weekly timesheet table,
+each with and without the plain-text alternative. The old builder appended
+each row to the body with ``html += f"..."`` and did not escape the values;
+a copy of its loop is timed alongside for comparison. Peak memory is traced
+in a separate run, since tracemalloc slows the build down.
+
+    python benchmarks/bench_email_body.py --entries 50000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timetracking.email_body import report_body, timesheet_body
+from timetracking.report import ReportModel
+
+
+def make_report(count, projects):
+    start = datetime(2024, 1, 1, 8, 0)
+    entries = []
+    for i in range(count):
+        entry_start = start + timedelta(minutes=10 * i)
+        entries.append((i, i % projects, f"Client {i % projects}", f"Task {i}: review <draft> & fix",
+                        entry_start.isoformat(), (entry_start + timedelta(minutes=9)).isoformat(), 9,
+                        40.0 if i % 2 else None, "EUR"))
+    return ReportModel(entries)
+
+
+def concatenated_body(report):
+    """The old report email loop: one += per row, values unescaped"""
+    html = "<html><body><table>"
+    for row in report.rows:
+        html += f"""
+                <tr>
+                    <td>{row.date}</td>
+                    <td>{row.project}</td>
+                    <td>{row.description}</td>
+                    <td>{row.start}</td>
+                    <td>{row.end}</td>
+                    <td>{row.duration}</td>
+                """
+        html += f"""
+                    <td>{row.rate_text}</td>
+                    <td>{row.amount_text}</td>
+                    """
+        html += """
+                </tr>
+                """
+    return html + "</table></body></html>"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, nargs="+", default=[50000])
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    builders = [
+        ("+= per row (old)", concatenated_body),
+        ("report email", lambda report: report_body(report)),
+        ("report email + text", lambda report: report_body(report, text=True)),
+        ("weekly timesheet", lambda report: timesheet_body(report)),
+        ("weekly timesheet + text", lambda report: timesheet_body(report, text=True)),
+    ]
+    print(f"{'entries':>8}  {'body':<26}{'s':>8}{'peak MB':>9}{'body MB':>9}")
+    for count in args.entries:
+        report = make_report(count, args.projects)
+        for name, build in builders:
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                result = build(report)
+                best = min(best, time.perf_counter() - start)
+            tracemalloc.start()
+            build(report)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            parts = result if isinstance(result, tuple) else (result,)
+            size = sum(len(part.encode("utf-8")) for part in parts if part)
+            print(f"{count:>8}  {name:<26}{best:>8.3f}{peak / 1e6:>9.1f}{size / 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
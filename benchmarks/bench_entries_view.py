@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Benchmark: time to first paint of the entries list, full load vs virtualized.
+
+Builds a database with many entries and measures what the main window does
+when the entries list is (re)loaded: the old path fetched every entry and
+inserted one Treeview item per row, the virtualized path counts the entries,
+fetches the pages around the top and fills a window of items. Also times a
+jump deep into the list (also sorted by project and by duration), patching
+the list after one edit and the grouped mode (one row per week, subtotals from SQL). A stand-in tree counts item
+operations so the benchmark runs without a display.
+
+    python benchmarks/bench_entries_view.py --entries 500000
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timetracking.database import TimeTrackerDB
+from timetracking.entries_view import GroupedEntriesView, VirtualEntriesView, format_entry_row
+
+
+class CountingTree:
+    """Stand-in for ttk.Treeview that only counts item operations"""
+
+    def __init__(self, height=25):
+        self.height = height
+        self.operations = 0
+        self.next_id = 0
+
+    def cget(self, option):
+        return self.height
+
+    def configure(self, **options):
+        pass
+
+    def bind(self, sequence, callback, add=None):
+        pass
+
+    def insert(self, parent, index, **options):
+        self.operations += 1
+        self.next_id += 1
+        return f"I{self.next_id}"
+
+    def delete(self, *items):
+        self.operations += len(items)
+
+    def item(self, item, option=None, **changes):
+        self.operations += 1
+        return ()
+
+    def selection(self):
+        return ()
+
+    def selection_set(self, items):
+        pass
+
+    def focus(self, item=None):
+        return ""
+
+    def yview_moveto(self, fraction):
+        pass
+
+    def set(self, lo, hi):
+        pass
+
+
+def populate(path, projects, entries):
+    db = TimeTrackerDB(path)
+    project_ids = [db.add_project(f"Project {i}") for i in range(projects)]
+    start = datetime(2020, 1, 1, 9, 0)
+    rows = []
+    for i in range(entries):
+        entry_start = start + timedelta(minutes=30 * i)
+        rows.append((project_ids[i % projects], f"Task {i}", entry_start.isoformat(),
+                     (entry_start + timedelta(minutes=25)).isoformat(), 25))
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO time_entries (project_id, description, start_time, end_time, duration_minutes) VALUES (?, ?, ?, ?, ?)",
+        rows
+    )
+    conn.commit()
+    conn.close()
+    return project_ids
+
+
+def full_load(db, tree):
+    for entry in db.get_time_entries():
+        tree.insert("", "end", values=format_entry_row(entry), tags=(str(entry[0]),))
+
+
+def virtual_load(db, view, top=0, sort=("date", True)):
+    offset, limit = view.pages_around(top)
+    view.sort, view.descending = sort
+    view.reset(db.count_time_entries(), offset, db.get_time_entry_page(offset, limit, None, None, None, *sort), top)
+
+
+def patch_after_edit(db, view, seq):
+    changes = db.get_changes_since(seq)
+    entry_ids = [row_id for _, table, row_id, _ in changes if table == "time_entries"]
+    view.apply_changes(entry_ids, db.get_time_entries_by_ids(entry_ids), db.count_time_entries())
+
+
+def grouped_load(db, view):
+    view.show_groups(db.get_entry_groups("week"))
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=500000)
+    parser.add_argument("--projects", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "bench.db")
+        populate(path, args.projects, args.entries)
+        db = TimeTrackerDB(path)
+
+        full_tree = CountingTree()
+        full_ms = timed(full_load, db, full_tree)
+
+        tree = CountingTree()
+        view = VirtualEntriesView(tree, tree, lambda *request: None)
+        first_ms = timed(virtual_load, db, view)
+        first_ops = tree.operations
+        tree.operations = 0
+        deep_ms = timed(virtual_load, db, view, args.entries // 2)
+        deep_ops = tree.operations
+
+        edited = view.row(view.top)
+        seq = db.get_changelog_seq()
+        db.update_entry(edited[0], description="Edited")
+        tree.operations = 0
+        patch_ms = timed(patch_after_edit, db, view, seq)
+        patch_ops = tree.operations
+
+        sorted_ms = {sort: timed(virtual_load, db, view, args.entries // 2, (sort, False))
+                     for sort in ("project", "duration")}
+
+        group_tree = CountingTree()
+        grouped_ms = timed(grouped_load, db, GroupedEntriesView(group_tree, lambda *request: None))
+
+    print(f"{'path':<28}{'ms':>10}{'item ops':>12}")
+    print(f"{'full load':<28}{full_ms:>10.1f}{full_tree.operations:>12}")
+    print(f"{'virtual, first page':<28}{first_ms:>10.1f}{first_ops:>12}")
+    print(f"{'virtual, middle of list':<28}{deep_ms:>10.1f}{deep_ops:>12}")
+    for sort, elapsed in sorted_ms.items():
+        print(f"{'virtual, middle, by ' + sort:<28}{elapsed:>10.1f}{'':>12}")
+    print(f"{'patch after one edit':<28}{patch_ms:>10.1f}{patch_ops:>12}")
+    print(f"{'grouped by week':<28}{grouped_ms:>10.1f}{group_tree.operations:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: time and peak memory of PDF reports, one big table vs streamed per-day tables.
+
+Builds a database with many entries and exports all of them the way the main
+window does. The old layout fetches every entry and puts them in one Table
+with a Paragraph in every cell. The streamed layout reads the entries in
+batches while the PDF is written and emits one table per day, first with
+Paragraph cells, then with plain strings wherever text fits on one line, then
+in compact mode. The direct canvas renderer draws the rows without platypus.
+Each export runs in a fresh process so its peak RSS is its own.
+
+    python benchmarks/bench_pdf_export.py --entries 10000 100000
+
+One big table takes several minutes and gigabytes at 100k entries, so that
+layout is skipped above --one-table-limit (0 runs it at every size).
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_entries_view import populate
+from timetracking.database import TimeTrackerDB
+from timetracking.pdf_export import PDFExporter
+from timetracking.report import ReportModel
+
+
+LAYOUTS = ("one table", "streamed, Paragraph cells", "streamed", "streamed, compact", "direct canvas")
+
+
+def export(db_path, output_path, layout, results):
+    db = TimeTrackerDB(db_path)
+    # fast=False is the old cell path, a Paragraph in every cell
+    exporter = PDFExporter(fast=layout not in ("one table", "streamed, Paragraph cells"),
+                           compact=layout == "streamed, compact")
+    start = time.perf_counter()
+    if layout == "one table":
+        exporter.LARGE_REPORT_ROWS = float("inf")
+        report = ReportModel.from_query(db)
+    else:
+        report = ReportModel.stream_query(db)
+    exporter.export_time_report(report, output_path, direct=layout == "direct canvas")
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    results.put((elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale))
+
+
+def measure(db_path, output_path, layout):
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=export, args=(db_path, output_path, layout, results))
+    process.start()
+    elapsed, peak_mb = results.get()
+    process.join()
+    return elapsed, peak_mb, os.path.getsize(output_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--one-table-limit", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'entries':>8}  {'layout':<28}{'s':>9}{'peak MB':>10}{'PDF MB':>9}")
+    for entries in args.entries:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, "bench.db")
+            populate(db_path, args.projects, entries)
+            for layout in LAYOUTS:
+                if layout == "one table" and 0 < args.one_table_limit < entries:
+                    print(f"{entries:>8}  {layout:<28}{'skipped':>9}")
+                    continue
+                elapsed, peak_mb, size = measure(db_path, os.path.join(temp_dir, "report.pdf"), layout)
+                print(f"{entries:>8}  {layout:<28}{elapsed:>9.1f}{peak_mb:>10.0f}{size / 1e6:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
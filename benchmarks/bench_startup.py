@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark: GUI startup cost.
+
+Reports the median cumulative ``-X importtime`` of ``timetracking.gui`` with the
+heaviest modules it pulls in, and, when a display is available, the time from
+interpreter start to the first painted main window. Each sample runs in a
+fresh interpreter with HOME pointed at a temporary directory.
+
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+FIRST_PAINT = """
+import time
+start = time.perf_counter()
+from timetracking.gui import TimeTrackerGUI
+imported = time.perf_counter()
+try:
+    app = TimeTrackerGUI()
+except Exception as e:
+    print("skip", e)
+else:
+    app.root.update()
+    painted = time.perf_counter()
+    print("paint", imported - start, painted - start)
+    app.root.destroy()
+"""
+
+
+def run_python(args, home):
+    env = dict(os.environ, HOME=home)
+    return subprocess.run([sys.executable] + args, cwd=PACKAGE_ROOT, env=env,
+                          capture_output=True, text=True, timeout=120)
+
+
+def import_profile(home):
+    """Cumulative microseconds for timetracking.gui and each module it imports directly"""
+    result = run_python(["-X", "importtime", "-c", "import timetracking.gui"], home)
+    modules, pending = {}, {}
+    total = None
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), len(match.group(3)), match.group(4)
+        # Children are printed before their parent, one level (two spaces) deeper
+        if indent == 1:
+            if name == "timetracking.gui":
+                total, modules = cumulative, pending
+            pending = {}
+        elif indent == 3:
+            pending[name] = cumulative
+    return total, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as home:
+        totals = []
+        modules = {}
+        for _ in range(args.runs):
+            total, run_modules = import_profile(home)
+            totals.append(total)
+            for name, cumulative in run_modules.items():
+                modules.setdefault(name, []).append(cumulative)
+
+        print(f"import timetracking.gui: median {statistics.median(totals) / 1000:.1f} ms "
+              f"over {args.runs} runs")
+        heaviest = sorted(modules.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+        for name, samples in heaviest[:10]:
+            print(f"  {name:<40}{statistics.median(samples) / 1000:>8.1f} ms")
+
+        paints = []
+        for _ in range(args.runs):
+            output = run_python(["-c", FIRST_PAINT], home).stdout.split()
+            if not output or output[0] != "paint":
+                print(f"time to first paint: skipped ({' '.join(output[1:]) or 'no display'})")
+                break
+            paints.append(float(output[2]))
+        if paints:
+            print(f"time to first paint: median {statistics.median(paints) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Load test: request throughput and latency of the local tracking service.
+
+Starts a TrackingServer on a loopback port against a populated temporary
+database, then drives it with concurrent keep-alive clients issuing a mix of
+timer start/stop, project listing and filtered entry queries. Prints the
+client-side throughput and the server's own /metrics percentiles.
+
+    python benchmarks/load_test_server.py --entries 20000 --clients 20 --requests 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_async_db import populate
+from timetracking.server import TrackingServer
+
+TOKEN = "load-test"
+
+
+async def client(port, project_ids, requests, offset, latencies):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        for i in range(requests):
+            project_id = project_ids[(offset + i) % len(project_ids)]
+            step = i % 10
+            if step == 0:
+                method, path, body = "POST", "/timers/start", {"project_id": project_id}
+            elif step == 5:
+                method, path, body = "POST", "/timers/stop", {"project_id": project_id}
+            elif step % 2:
+                method, path, body = "GET", "/projects", None
+            else:
+                method, path, body = "GET", f"/entries?project_id={project_id}&start=2024-01-01&end=2024-01-01", None
+
+            payload = json.dumps(body).encode() if body is not None else b""
+            started = time.perf_counter()
+            writer.write(
+                f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nAuthorization: Bearer {TOKEN}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n".encode()
+                + payload
+            )
+            await writer.drain()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - started)
+    finally:
+        writer.close()
+
+
+async def run(path, project_ids, clients, requests):
+    server = await TrackingServer(path, port=0, token=TOKEN).start()
+    latencies = []
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*(client(server.port, project_ids, requests, i, latencies) for i in range(clients)))
+        elapsed = time.perf_counter() - started
+        metrics = server.metrics.snapshot()
+    finally:
+        await server.close()
+    return elapsed, sorted(latencies), metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200, help="requests per client")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "load.db")
+        project_ids = populate(path, args.projects, args.entries)
+        elapsed, latencies, metrics = asyncio.run(run(path, project_ids, args.clients, args.requests))
+
+    total = len(latencies)
+    print(f"{total} requests from {args.clients} keep-alive clients in {elapsed:.3f}s ({total / elapsed:.0f} req/s)")
+    for label, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+        print(f"client {label}: {latencies[min(total - 1, int(total * fraction))] * 1000:.2f} ms")
+    print(f"{'route':<28}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for route, stats in sorted(metrics["routes"].items()):
+        print(f"{route:<28}{stats['count']:>8}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
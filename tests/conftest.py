@@ -10,9 +10,9 @@ from datetime import datetime, timedelta
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database import TimeTrackerDB
-from pdf_export import PDFExporter
-from email_export import EmailExporter
+from timetracking.database import TimeTrackerDB
+from timetracking.pdf_export import PDFExporter
+from timetracking.email_export import EmailExporter
 
 
 @pytest.fixture
@@ -0,0 +1,161 @@
+"""
+Unit tests for the asyncio database facade
+"""
+import unittest
+import asyncio
+import tempfile
+import threading
+import os
+import sys
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timetracking.async_db import AsyncTimeTrackerDB, WorkerDB
+from timetracking.database import TimeTrackerDB
+
+
+class TestAsyncTimeTrackerDB(unittest.TestCase):
+    """Test cases for AsyncTimeTrackerDB"""
+
+    def setUp(self):
+        """Set up test database"""
+        self.temp_db = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
+        self.temp_db.close()
+
+    def tearDown(self):
+        """Clean up test database"""
+        os.unlink(self.temp_db.name)
+
+    def run_async(self, coro):
+        return asyncio.run(coro)
+
+    def test_methods_are_coroutines(self):
+        """Test sync methods are exposed as awaitables with the same results"""
+        async def scenario():
+            async with AsyncTimeTrackerDB(self.temp_db.name) as db:
+                project_id = await db.add_project("Async Project", "Desc", "", 40.0, "USD")
+                entry_id = await db.start_timer(project_id, "Async task")
+                running = await db.get_running_timer(project_id)
+                await db.stop_timer(project_id)
+                return project_id, entry_id, running, await db.get_projects()
+
+        project_id, entry_id, running, projects = self.run_async(scenario())
+        self.assertEqual(running[0], entry_id)
+        self.assertEqual(projects[0][:2], (project_id, "Async Project"))
+        self.assertEqual(len(TimeTrackerDB(self.temp_db.name).get_time_entries()), 1)
+
+    def test_errors_propagate(self):
+        """Test exceptions raised by the sync method reach the caller"""
+        async def scenario():
+            async with AsyncTimeTrackerDB(self.temp_db.name) as db:
+                await db.add_project("Duplicate")
+                with self.assertRaises(ValueError):
+                    await db.add_project("Duplicate")
+                # The writer connection is still usable after the failure
+                return await db.add_project("After error")
+
+        self.assertIsInstance(self.run_async(scenario()), int)
+
+    def test_unknown_attribute(self):
+        """Test non-method attributes are not proxied"""
+        db = AsyncTimeTrackerDB(self.temp_db.name)
+        with self.assertRaises(AttributeError):
+            db.no_such_method
+        with self.assertRaises(AttributeError):
+            db._connect
+        self.run_async(db.close())
+
+    def test_concurrent_writes_and_reads(self):
+        """Test many concurrent coroutines all complete consistently"""
+        async def scenario():
+            async with AsyncTimeTrackerDB(self.temp_db.name, readers=3) as db:
+                ids = await asyncio.gather(*(db.add_project(f"P{i}") for i in range(30)))
+                reads = await asyncio.gather(*(db.get_projects() for _ in range(30)))
+                return ids, reads
+
+        ids, reads = self.run_async(scenario())
+        self.assertEqual(len(set(ids)), 30)
+        self.assertEqual(len(reads[-1]), 30)
+
+    def test_cancel_queued_write(self):
+        """Test a write cancelled before it starts never runs"""
+        async def scenario():
+            async with AsyncTimeTrackerDB(self.temp_db.name) as db:
+                gate = threading.Event()
+                db._writer.submit(gate.wait)
+                task = asyncio.ensure_future(db.add_project("Never"))
+                await asyncio.sleep(0.05)
+                task.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await task
+                gate.set()
+                return await db.get_projects()
+
+        self.assertEqual(self.run_async(scenario()), [])
+
+    def test_cancel_running_read_interrupts_query(self):
+        """Test cancelling a running query interrupts it and frees the reader"""
+        def endless(self):
+            conn = self._connect()
+            cursor = conn.cursor()
+            cursor.execute("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT COUNT(*) FROM n")
+            return cursor.fetchone()
+
+        async def scenario():
+            async with AsyncTimeTrackerDB(self.temp_db.name, readers=1) as db:
+                task = asyncio.ensure_future(db.get_projects())
+                await asyncio.sleep(0.1)
+                task.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await task
+                with patch.object(WorkerDB, "get_projects", TimeTrackerDB.get_projects):
+                    return await asyncio.wait_for(db.get_projects(), timeout=5)
+
+        with patch.object(WorkerDB, "get_projects", endless):
+            self.assertEqual(self.run_async(scenario()), [])
+
+    def test_cancelled_calls_keep_their_slot_until_done(self):
+        """Test cancelling callers cannot push more than max_pending calls into the pools"""
+        gate = threading.Event()
+
+        def blocked(self):
+            gate.wait(5)
+            return []
+
+        async def scenario():
+            async with AsyncTimeTrackerDB(self.temp_db.name, readers=1, max_pending=2) as db:
+                in_flight = []
+                peak = []
+                submit = db._readers.submit
+
+                def counting_submit(fn):
+                    job = submit(fn)
+                    in_flight.append(job)
+                    job.add_done_callback(lambda done: in_flight.remove(done))
+                    peak.append(len(in_flight))
+                    return job
+
+                db._readers.submit = counting_submit
+                first = asyncio.ensure_future(db.get_projects())
+                second = asyncio.ensure_future(db.get_projects())
+                await asyncio.sleep(0.05)
+                first.cancel()
+                second.cancel()
+                await asyncio.gather(first, second, return_exceptions=True)
+
+                # The first call is still running, so only one new call may start
+                later = [asyncio.ensure_future(db.get_projects()) for _ in range(3)]
+                await asyncio.sleep(0.05)
+                self.assertLessEqual(max(peak), 2)
+                self.assertFalse(any(task.done() for task in later))
+                gate.set()
+                results = await asyncio.wait_for(asyncio.gather(*later), timeout=5)
+                self.assertLessEqual(max(peak), 2)
+                return results
+
+        with patch.object(WorkerDB, "get_projects", blocked):
+            self.assertEqual(self.run_async(scenario()), [[], [], []])
+
+
+if __name__ == '__main__':
+    unittest.main()
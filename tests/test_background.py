@@ -0,0 +1,272 @@
+"""
+Unit tests for running work off the UI thread
+"""
+import unittest
+import os
+import sys
+import sqlite3
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timetracking.background import UIDispatcher, TaskExecutor, CancelToken, RefreshScheduler
+from timetracking.database import TimeTrackerDB, WorkerDB
+
+
+class FakeRoot:
+    """Records root.after callbacks so the test plays the Tk event loop"""
+
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, callback):
+        self.scheduled.append(callback)
+
+    def run_pending(self):
+        callbacks, self.scheduled = self.scheduled, []
+        for callback in callbacks:
+            callback()
+
+
+class TestUIDispatcher(unittest.TestCase):
+    """Test cases for UIDispatcher"""
+
+    def setUp(self):
+        """Set up dispatcher with a fake root"""
+        self.root = FakeRoot()
+        self.dispatcher = UIDispatcher(self.root)
+        self.main_thread = threading.current_thread()
+
+    def finish(self, thread):
+        thread.join(5)
+        while self.root.scheduled:
+            self.root.run_pending()
+
+    def test_result_delivered_on_ui_thread(self):
+        """Test on_done runs from the UI loop, not the worker"""
+        results = []
+        release = threading.Event()
+
+        def work(value):
+            release.wait(5)
+            return value * 2
+
+        thread = self.dispatcher.run(work, 21, on_done=lambda result: results.append(
+            (result, threading.current_thread() is self.main_thread)))
+        self.assertTrue(self.dispatcher.busy)
+        self.root.run_pending()
+        self.assertEqual(results, [])
+
+        release.set()
+        self.finish(thread)
+        self.assertEqual(results, [(42, True)])
+        self.assertFalse(self.dispatcher.busy)
+        self.assertEqual(self.root.scheduled, [])
+
+    def test_errors_and_progress(self):
+        """Test progress messages arrive in order before the error"""
+        events = []
+
+        def work(progress):
+            progress("one")
+            progress("two")
+            raise ValueError("failed")
+
+        thread = self.dispatcher.run(work, on_progress=events.append,
+                                     on_error=lambda e: events.append(str(e)))
+        self.finish(thread)
+        self.assertEqual(events, ["one", "two", "failed"])
+
+    def test_failing_callback_does_not_stop_delivery(self):
+        """Test one broken callback does not block the next"""
+        results = []
+
+        def broken(result):
+            raise RuntimeError("boom")
+
+        first = self.dispatcher.run(lambda: 1, on_done=broken)
+        second = self.dispatcher.run(lambda: 2, on_done=results.append)
+        first.join(5)
+        self.finish(second)
+        self.assertEqual(results, [2])
+        self.assertFalse(self.dispatcher.busy)
+
+
+class TestTaskExecutor(unittest.TestCase):
+    """Test cases for TaskExecutor"""
+
+    def setUp(self):
+        """Set up executor with a single worker"""
+        self.root = FakeRoot()
+        self.busy = []
+        self.executor = TaskExecutor(self.root, workers=1, on_busy=self.busy.append)
+
+    def tearDown(self):
+        """Stop the worker pool"""
+        self.executor.shutdown()
+
+    def settle(self):
+        self.executor._pool.submit(lambda: None).result(5)
+        while self.root.scheduled:
+            self.root.run_pending()
+
+    def test_superseded_task_is_coalesced(self):
+        """Test only the newest task for a key delivers its result"""
+        release = threading.Event()
+        started = []
+        results = []
+
+        def query(value, cancel):
+            started.append(value)
+            if value == "first":
+                release.wait(5)
+            return value
+
+        self.executor.submit("entries", query, "first", on_done=results.append, label="Loading")
+        self.executor.submit("entries", query, "second", on_done=results.append, label="Loading")
+        third = self.executor.submit("entries", query, "third", on_done=results.append, label="Loading")
+        release.set()
+        self.settle()
+
+        self.assertEqual(results, ["third"])
+        # "second" was cancelled before a worker picked it up, so it never ran
+        self.assertEqual(started, ["first", "third"])
+        self.assertFalse(third.cancelled)
+        self.assertFalse(self.executor.running("entries"))
+        self.assertEqual(self.busy[-1], [])
+        self.assertIn(["Loading"], self.busy)
+
+    def test_errors_of_cancelled_tasks_are_dropped(self):
+        """Test a cancelled task that raises does not report an error"""
+        errors = []
+
+        def task(cancel):
+            cancel.check()
+            return 1
+
+        token = self.executor.submit("report", lambda cancel: threading.Event().wait(0.05) or cancel.check(),
+                                     on_error=errors.append)
+        token.cancel()
+        self.settle()
+        self.assertEqual(errors, [])
+
+        results = []
+        self.executor.submit("report", task, on_done=results.append, on_error=errors.append)
+        self.settle()
+        self.assertEqual((results, errors), ([1], []))
+
+    def test_cancel_aborts_running_query(self):
+        """Test cancelling a task aborts its SQLite statement"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "slow.db")
+            TimeTrackerDB(path)
+            db = WorkerDB(path)
+            running = threading.Event()
+            outcome = []
+
+            def slow_query(cancel):
+                with db.cancellable(cancel) as conn:
+                    # started() runs inside the statement, so the cancel lands mid-query
+                    conn.create_function("started", 0, lambda: running.set() or 1)
+                    try:
+                        conn.execute("WITH RECURSIVE n(x) AS (SELECT started() UNION ALL "
+                                     "SELECT x + 1 FROM n WHERE x < 100000000000) "
+                                     "SELECT COUNT(*) FROM n").fetchone()
+                    except sqlite3.OperationalError as e:
+                        outcome.append(str(e))
+                        raise
+
+            token = self.executor.submit("entries", slow_query)
+            self.assertTrue(running.wait(5))
+            token.cancel()
+            self.settle()
+            db.close()
+
+        self.assertEqual(outcome, ["interrupted"])
+
+    def test_cancel_before_statement_is_not_lost(self):
+        """Test a cancel that arrives before the query starts still aborts it"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "slow.db")
+            TimeTrackerDB(path)
+            db = WorkerDB(path)
+            token = CancelToken()
+            token.cancel()
+            with db.cancellable(token) as conn:
+                with self.assertRaises(sqlite3.OperationalError):
+                    conn.execute("WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL "
+                                 "SELECT x + 1 FROM n WHERE x < 100000000000) "
+                                 "SELECT COUNT(*) FROM n").fetchone()
+
+            # The next task on the same connection is not affected
+            with db.cancellable(CancelToken()) as conn:
+                self.assertEqual(conn.execute("SELECT COUNT(*) FROM projects").fetchone(), (0,))
+            db.close()
+
+class TimerRoot:
+    """Fake root with a clock: root.after jobs run once their delay has passed"""
+
+    def __init__(self):
+        self.now = 0
+        self.jobs = {}
+        self.next_id = 0
+
+    def after(self, ms, callback):
+        self.next_id += 1
+        self.jobs[self.next_id] = (self.now + ms, callback)
+        return self.next_id
+
+    def after_cancel(self, job):
+        self.jobs.pop(job, None)
+
+    def advance(self, ms):
+        self.now += ms
+        for job, (due, callback) in sorted(self.jobs.items(), key=lambda item: item[1][0]):
+            if due <= self.now and self.jobs.pop(job, None):
+                callback()
+
+
+class TestRefreshScheduler(unittest.TestCase):
+    """Test cases for debouncing and coalescing refreshes"""
+
+    def setUp(self):
+        """Set up a scheduler on a fake clock"""
+        self.root = TimerRoot()
+        self.scheduler = RefreshScheduler(self.root)
+        self.calls = []
+
+    def test_burst_runs_once(self):
+        """Test requests closer together than the delay run once, with the latest arguments"""
+        for step in range(10):
+            self.scheduler.request("entries", self.calls.append, step, delay_ms=250)
+            self.root.advance(100)
+        self.assertEqual(self.calls, [])
+        self.root.advance(250)
+        self.assertEqual(self.calls, [9])
+        self.assertEqual(self.scheduler.saved, {"entries": 9})
+
+    def test_requests_in_one_event_coalesce(self):
+        """Test undelayed requests made together still run once"""
+        self.scheduler.request("projects", self.calls.append, "a")
+        self.scheduler.request("projects", self.calls.append, "b")
+        self.assertTrue(self.scheduler.pending("projects"))
+        self.root.advance(0)
+        self.assertEqual(self.calls, ["b"])
+        self.assertFalse(self.scheduler.pending("projects"))
+
+    def test_broader_refresh_covers_narrower_one(self):
+        """Test a pending reload absorbs updates, and a reload drops a pending update"""
+        self.scheduler.request("entries", self.calls.append, "reload")
+        self.scheduler.request("updates", self.calls.append, "update", covered_by="entries")
+        self.root.advance(0)
+        self.assertEqual(self.calls, ["reload"])
+
+        self.scheduler.request("updates", self.calls.append, "update", covered_by="entries")
+        self.scheduler.request("entries", self.calls.append, "reload", supersedes="updates")
+        self.root.advance(0)
+        self.assertEqual(self.calls, ["reload", "reload"])
+        self.assertEqual(self.scheduler.saved, {"entries": 0, "updates": 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Unit tests for batch export of PDF reports
+"""
+import unittest
+import tempfile
+import os
+import sys
+from datetime import date
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timetracking.batch_export import BatchExporter, BatchJob, file_name, monthly_jobs, period_label
+from timetracking.database import TimeTrackerDB
+
+
+class TestBatchExport(unittest.TestCase):
+    """Test cases for BatchExporter"""
+
+    def setUp(self):
+        """Two projects with entries in January and February 2024"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.db = TimeTrackerDB(os.path.join(self.temp_dir.name, "batch.db"))
+        self.output_dir = os.path.join(self.temp_dir.name, "reports")
+        self.client_a = self.db.add_project("Client A", rate=50.0)
+        self.client_b = self.db.add_project("Client/B")
+        for project_id, day in ((self.client_a, "2024-01-15"), (self.client_a, "2024-02-01"),
+                                (self.client_b, "2024-01-31")):
+            entry_id = self.db.start_timer(project_id, "Work")
+            self.db.stop_timer(project_id)
+            self.db.update_entry(entry_id, start_time=f"{day}T09:00:00", end_time=f"{day}T10:00:00")
+
+    def test_paths(self):
+        """Test the directory layout"""
+        self.assertEqual(period_label(date(2024, 2, 1), date(2024, 2, 29)), "2024-02")
+        self.assertEqual(period_label(date(2024, 2, 1), date(2024, 2, 15)), "2024-02-01_2024-02-15")
+        self.assertEqual(period_label(None, None), "start_end")
+        self.assertEqual(file_name("Client/B", 2), "Client_B.pdf")
+        self.assertEqual(file_name("???", 7), "project_7.pdf")
+
+    def test_monthly_jobs_and_one_query(self):
+        """Test that jobs cover projects with entries and their entries are read with one query"""
+        jobs = monthly_jobs(self.db, ["2024-01", "2024-02"])
+        self.assertEqual([(job.project_id, job.start_date.month) for job in jobs],
+                         [(self.client_a, 1), (self.client_b, 1), (self.client_a, 2)])
+
+        exporter = BatchExporter(self.db, self.output_dir)
+        with patch.object(self.db, "get_project_time_entries", wraps=self.db.get_project_time_entries) as query:
+            entries = exporter.fetch(jobs)
+        self.assertEqual(query.call_count, 1)
+        self.assertEqual([[entry[4][:10] for entry in job_entries] for job_entries in entries],
+                         [["2024-01-15"], ["2024-01-31"], ["2024-02-01"]])
+
+    def test_run_writes_every_report(self):
+        """Test that each job is written to its path and no temporary files are left"""
+        jobs = monthly_jobs(self.db, ["2024-01", "2024-02"])
+        results = list(BatchExporter(self.db, self.output_dir, workers=1).run(jobs))
+
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual(sorted(os.path.relpath(result.path, self.output_dir) for result in results),
+                         [os.path.join("2024-01", "Client_A.pdf"), os.path.join("2024-01", "Client_B.pdf"),
+                          os.path.join("2024-02", "Client_A.pdf")])
+        for result in results:
+            with open(result.path, "rb") as f:
+                self.assertEqual(f.read(5), b"%PDF-")
+            self.assertEqual(result.size, os.path.getsize(result.path))
+            self.assertEqual(result.entries, 1)
+        self.assertFalse([name for _, _, names in os.walk(self.output_dir) for name in names if name.endswith(".tmp")])
+
+    def test_process_pool(self):
+        """Test rendering in worker processes"""
+        jobs = monthly_jobs(self.db, ["2024-01"])
+        results = list(BatchExporter(self.db, self.output_dir, workers=2).run(jobs))
+        self.assertEqual(sorted(result.job.project_id for result in results), [self.client_a, self.client_b])
+        self.assertTrue(all(result.ok and os.path.exists(result.path) for result in results))
+
+    def test_failed_job_does_not_stop_the_batch(self):
+        """Test that an error is reported for its job only"""
+        jobs = [BatchJob(self.client_a, "Client A"), BatchJob(self.client_b, "Client B")]
+        from timetracking import batch_export
+        render = batch_export.render_job
+
+        def fail_for_b(entries, path, project_name, *dates):
+            if project_name == "Client B":
+                raise OSError("disk full")
+            return render(entries, path, project_name, *dates)
+
+        with patch("timetracking.batch_export.render_job", side_effect=fail_for_b):
+            results = list(BatchExporter(self.db, self.output_dir, workers=1).run(jobs))
+        self.assertEqual([(result.ok, result.error) for result in results], [(True, None), (False, "disk full")])
+        self.assertEqual(results[0].entries, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
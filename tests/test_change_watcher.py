@@ -0,0 +1,111 @@
+"""
+Unit tests for database change detection
+"""
+import unittest
+import tempfile
+import os
+import sqlite3
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timetracking.database import TimeTrackerDB, ChangeWatcher
+
+
+class TestChangeWatcher(unittest.TestCase):
+    """Test cases for ChangeWatcher"""
+
+    def setUp(self):
+        """Set up test database"""
+        self.temp_db = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
+        self.temp_db.close()
+        self.db = TimeTrackerDB(self.temp_db.name)
+        self.events = []
+        self.db.changes.subscribe(lambda: self.events.append("changed"))
+
+    def tearDown(self):
+        """Clean up test database"""
+        self.db.changes.close()
+        os.unlink(self.temp_db.name)
+
+    def test_idle_poll_reports_nothing(self):
+        """Test polling without writes emits no events"""
+        self.assertFalse(self.db.changes.poll())
+        self.assertFalse(self.db.changes.poll())
+        self.assertEqual(self.events, [])
+
+    def test_own_writes_are_detected(self):
+        """Test writes through TimeTrackerDB are reported once"""
+        self.db.add_project("Watched Project")
+        self.assertTrue(self.db.changes.poll())
+        self.assertFalse(self.db.changes.poll())
+        self.assertEqual(self.events, ["changed"])
+
+    def test_other_instance_writes_are_detected(self):
+        """Test writes from a second instance are reported"""
+        other = TimeTrackerDB(self.temp_db.name)
+        project_id = other.add_project("Other Window")
+        other.start_timer(project_id, "Remote task")
+
+        self.assertTrue(self.db.changes.poll())
+        self.assertEqual(len(self.events), 1)
+
+    def test_raw_sqlite_writes_are_detected(self):
+        """Test writes made outside TimeTrackerDB are reported"""
+        conn = sqlite3.connect(self.temp_db.name)
+        conn.execute("INSERT INTO projects (name) VALUES ('Script Project')")
+        conn.commit()
+        conn.close()
+
+        self.assertTrue(self.db.changes.poll())
+
+    def test_mark_seen_skips_pending_changes(self):
+        """Test mark_seen treats earlier commits as observed"""
+        self.db.add_project("Seen Project")
+        self.db.changes.mark_seen()
+        self.assertFalse(self.db.changes.poll())
+        self.assertEqual(self.events, [])
+
+    def test_poll_does_not_wait_for_locks(self):
+        """Test a poll during another connection's write returns at once"""
+        writer = sqlite3.connect(self.temp_db.name)
+        writer.execute("BEGIN EXCLUSIVE")
+        writer.execute("INSERT INTO projects (name) VALUES ('Locked Project')")
+
+        started = time.monotonic()
+        self.assertFalse(self.db.changes.poll())
+        self.assertLess(time.monotonic() - started, 1)
+
+        writer.commit()
+        writer.close()
+        self.assertTrue(self.db.changes.poll())
+        self.assertEqual(self.events, ["changed"])
+
+    def test_unsubscribe(self):
+        """Test unsubscribed callbacks are no longer called"""
+        watcher = ChangeWatcher(self.temp_db.name)
+        calls = []
+        unsubscribe = watcher.subscribe(lambda: calls.append(1))
+        unsubscribe()
+
+        self.db.add_project("Quiet Project")
+        self.assertTrue(watcher.poll())
+        self.assertEqual(calls, [])
+        watcher.close()
+
+    def test_failing_subscriber_does_not_block_others(self):
+        """Test one failing callback does not stop later callbacks"""
+        def broken():
+            raise RuntimeError("boom")
+
+        self.db.changes.subscribe(broken)
+        calls = []
+        self.db.changes.subscribe(lambda: calls.append(1))
+
+        self.db.add_project("Another Project")
+        self.assertTrue(self.db.changes.poll())
+        self.assertEqual(calls, [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
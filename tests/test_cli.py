@@ -0,0 +1,175 @@
+"""
+Unit tests for the headless command-line interface
+"""
+import unittest
+import tempfile
+import os
+import io
+import sys
+import sqlite3
+import subprocess
+from contextlib import redirect_stdout, redirect_stderr
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timetracking.database import TimeTrackerDB
+from timetracking.cli import main
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestCLI(unittest.TestCase):
+    """Test cases for the timetracking CLI"""
+
+    def setUp(self):
+        """Set up test database"""
+        self.temp_db = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
+        self.temp_db.close()
+        self.db = TimeTrackerDB(self.temp_db.name)
+        self.project_id = self.db.add_project("Client Work", rate=60.0)
+
+    def tearDown(self):
+        """Clean up test database"""
+        os.unlink(self.temp_db.name)
+
+    def run_cli(self, *args):
+        out, err = io.StringIO(), io.StringIO()
+        with redirect_stdout(out), redirect_stderr(err):
+            status = main(["--db", self.temp_db.name] + list(args))
+        return status, out.getvalue(), err.getvalue()
+
+    def test_start_status_stop(self):
+        """Test a timer can be driven by name"""
+        status, out, _ = self.run_cli("start", "client work", "-d", "Scripted")
+        self.assertEqual(status, 0)
+        self.assertIsNotNone(self.db.get_running_timer(self.project_id))
+
+        status, out, _ = self.run_cli("status")
+        self.assertIn("Client Work", out)
+        self.assertIn("Scripted", out)
+
+        status, out, _ = self.run_cli("stop")
+        self.assertEqual(status, 0)
+        self.assertIsNone(self.db.get_running_timer(self.project_id))
+
+        status, out, _ = self.run_cli("stop")
+        self.assertEqual(status, 1)
+
+    def test_unknown_project(self):
+        """Test unknown projects are reported as errors"""
+        status, _, err = self.run_cli("start", "Nobody")
+        self.assertEqual(status, 1)
+        self.assertIn("Unknown project", err)
+
+    def test_list_and_report(self):
+        """Test listing and summarizing entries"""
+        entry_id = self.db.start_timer(self.project_id, "Listed")
+        self.db.stop_timer(self.project_id)
+        self.db.update_entry(entry_id, start_time="2024-03-01T09:00:00", end_time="2024-03-01T10:30:00")
+
+        status, out, _ = self.run_cli("list", "--from", "2024-03-01", "--to", "2024-03-31")
+        self.assertIn("Listed", out)
+        self.assertIn("90 min", out)
+
+        status, out, _ = self.run_cli("report", "-g", "month", "-p", str(self.project_id))
+        self.assertIn("2024-03", out)
+        self.assertIn("1:30:00", out)
+        self.assertIn("90.00 EUR", out)
+
+    def test_export_csv_and_changeset_round_trip(self):
+        """Test CSV export and changeset export/import"""
+        self.db.start_timer(self.project_id, "Exported")
+        self.db.stop_timer(self.project_id)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            csv_path = os.path.join(temp_dir, "entries.csv")
+            self.assertEqual(self.run_cli("export", csv_path)[0], 0)
+            with open(csv_path, encoding="utf-8") as f:
+                self.assertIn("Exported", f.read())
+
+            changeset = os.path.join(temp_dir, "changes.gz")
+            self.assertEqual(self.run_cli("export", changeset)[0], 0)
+
+            other_path = os.path.join(temp_dir, "other.db")
+            out = io.StringIO()
+            with redirect_stdout(out):
+                self.assertEqual(main(["--db", other_path, "import", changeset]), 0)
+            self.assertEqual(len(TimeTrackerDB(other_path).get_time_entries()), 1)
+
+    def test_batch_export(self):
+        """Test one PDF per project and month"""
+        entry_id = self.db.start_timer(self.project_id, "March")
+        self.db.stop_timer(self.project_id)
+        self.db.update_entry(entry_id, start_time="2024-03-01T09:00:00", end_time="2024-03-01T10:30:00")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            status, out, _ = self.run_cli("batch-export", temp_dir, "-m", "2024-03", "-m", "2024-04", "-j", "1")
+            self.assertEqual(status, 0)
+            self.assertIn("[1/1]", out)
+            self.assertIn("Exported 1 of 1 reports", out)
+            self.assertTrue(os.path.exists(os.path.join(temp_dir, "2024-03", "Client_Work.pdf")))
+
+    def test_export_summary(self):
+        """Test a PDF of totals, read without loading the entries"""
+        self.db.start_timer(self.project_id, "Summarized")
+        self.db.stop_timer(self.project_id)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "summary.pdf")
+            with patch.object(TimeTrackerDB, "get_time_entries", side_effect=AssertionError("entries loaded")):
+                status, out, _ = self.run_cli("export", path, "--summary", "month")
+            self.assertEqual(status, 0)
+            self.assertIn("Exported totals of 1 entries per month", out)
+            self.assertIn(f"({os.path.getsize(path) / 1024:.0f} KB)", out)
+            self.assertGreater(os.path.getsize(path), 0)
+
+            status, _, err = self.run_cli("export", os.path.join(temp_dir, "summary.csv"), "-s", "week")
+            self.assertEqual(status, 1)
+            self.assertIn("--summary", err)
+
+    def test_export_needs_a_known_extension(self):
+        """Test an unknown extension is an error, not a changeset export"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "report.cvs")
+            status, _, err = self.run_cli("export", path)
+            self.assertEqual(status, 1)
+            self.assertIn("--format", err)
+            self.assertFalse(os.path.exists(path))
+
+        conn = sqlite3.connect(self.temp_db.name)
+        self.assertEqual(conn.execute("SELECT last_export_seq FROM sync_state").fetchone(), (0,))
+        conn.close()
+
+    def test_status_while_another_process_writes(self):
+        """Test read-only commands open the database without taking the write lock"""
+        self.db.start_timer(self.project_id, "Busy")
+        writer = sqlite3.connect(self.temp_db.name, timeout=0)
+        writer.execute("BEGIN IMMEDIATE")
+        try:
+            status, out, _ = self.run_cli("status")
+        finally:
+            writer.rollback()
+            writer.close()
+        self.assertEqual(status, 0)
+        self.assertIn("Busy", out)
+
+    def test_status_does_not_load_gui_dependencies(self):
+        """Test quick commands import neither tkinter nor the export libraries"""
+        code = (
+            "import sys\n"
+            "from timetracking.main import main\n"
+            f"sys.argv = ['timetracking', '--db', {self.temp_db.name!r}, 'status']\n"
+            "try:\n"
+            "    main()\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            "heavy = ['tkinter', 'reportlab', 'requests', 'cryptography']\n"
+            "print([name for name in heavy if name in sys.modules])\n"
+        )
+        result = subprocess.run([sys.executable, "-c", code], cwd=PACKAGE_ROOT,
+                                capture_output=True, text=True, timeout=60)
+        self.assertEqual(result.stdout.strip().splitlines()[-1], "[]", result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -11,6 +11,8 @@ from datetime import datetime, timedelta
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from timetracking.email_export import EmailExporter
+from timetracking import password_utils
+from timetracking.password_utils import PasswordEncryption
 
 
 class TestEmailExporter(unittest.TestCase):
@@ -21,6 +23,14 @@ class TestEmailExporter(unittest.TestCase):
         self.temp_config = tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False)
         self.temp_config.close()
         
+        # Keep the encryption key out of the home and working directories
+        self.key_dir = tempfile.TemporaryDirectory()
+        key_patcher = patch.object(password_utils, '_password_encryption',
+                                   PasswordEncryption(os.path.join(self.key_dir.name, 'email_key.key')))
+        key_patcher.start()
+        self.addCleanup(key_patcher.stop)
+        self.addCleanup(self.key_dir.cleanup)
+        
         # Create sample time entries (id, project_id, project_name, description, start_time, end_time, duration, rate, currency)
         self.sample_entries = [
             (1, 1, "Project A", "Test Task 1", "2024-01-01T09:00:00", "2024-01-01T10:30:00", 90, 25.0, "EUR"),
@@ -106,7 +116,7 @@ class TestEmailExporter(unittest.TestCase):
     
     def test_password_encryption(self):
         """Test password encryption and decryption"""
-        from password_utils import password_encryption
+        from timetracking.password_utils import password_encryption
         
         test_password = 'test_password_123'
         
@@ -188,6 +198,89 @@ class TestEmailExporter(unittest.TestCase):
             if os.path.exists(pdf_path):
                 os.unlink(pdf_path)
     
+    @patch('smtplib.SMTP')
+    def test_send_time_report_with_pdf_bytes(self, mock_smtp):
+        """Test attaching a PDF rendered in memory without touching the disk"""
+        from email import message_from_string
+        from timetracking.pdf_export import PDFExporter
+        mock_server = MagicMock()
+        mock_smtp.return_value = mock_server
+        
+        exporter = EmailExporter()
+        pdf_data = PDFExporter().render_time_report(self.sample_entries)
+        self.assertTrue(pdf_data.startswith(b"%PDF"))
+        
+        with patch('builtins.open', side_effect=AssertionError("file opened")), \
+             patch('tempfile.NamedTemporaryFile', side_effect=AssertionError("temp file created")):
+            success = exporter.send_time_report(
+                self.sample_entries,
+                "test@example.com",
+                "testpass",
+                "recipient@example.com",
+                pdf_data=pdf_data
+            )
+        
+        self.assertTrue(success)
+        message = message_from_string(mock_server.sendmail.call_args[0][2])
+        attachment = message.get_payload()[1]
+        self.assertIn("time_report.pdf", attachment["Content-Disposition"])
+        self.assertEqual(attachment.get_payload(decode=True), pdf_data)
+    
+    def test_values_are_escaped(self):
+        """Test that descriptions and project names cannot break the HTML, and stay as typed in the text"""
+        entries = [(1, 1, "R&D <lab>", "Fix <table> & \"quotes\"", "2024-01-01T09:00:00", "2024-01-01T10:00:00", 60,
+                    None, None)]
+        html, text = EmailExporter()._create_email_parts(entries, "R&D <lab>")
+        self.assertIn("<h3>Project: R&amp;D &lt;lab&gt;</h3>", html)
+        self.assertIn("<td>Fix &lt;table&gt; &amp; &quot;quotes&quot;</td>", html)
+        self.assertNotIn("<table> &", html)
+        self.assertIn("Project: R&D <lab>", text)
+        self.assertIn("2024-01-01  09:00-10:00  1h 0m 0s  R&D <lab>: Fix <table> & \"quotes\"", text)
+        self.assertIn("Total Time: 1 hours and 0 minutes", text)
+    
+    @patch('smtplib.SMTP')
+    def test_send_time_report_with_text_alternative(self, mock_smtp):
+        """Test that the email carries a plain-text alternative before the HTML"""
+        from email import message_from_string
+        success = EmailExporter().send_time_report(self.sample_entries, "test@example.com", "testpass",
+                                                   "recipient@example.com")
+        self.assertTrue(success)
+        message = message_from_string(mock_smtp.return_value.sendmail.call_args[0][2])
+        body = message.get_payload()[0]
+        self.assertEqual(body.get_content_type(), "multipart/alternative")
+        text, html = body.get_payload()
+        self.assertEqual((text.get_content_type(), html.get_content_type()), ("text/plain", "text/html"))
+        self.assertIn("Total Amount: €62.50", text.get_payload(decode=True).decode("utf-8"))
+        self.assertIn("<h2>Time Tracking Report</h2>", html.get_payload(decode=True).decode("utf-8"))
+    
+    def test_create_summary_body(self):
+        """Test that a summary report is sent as one row per group"""
+        from timetracking.report import SummaryReport
+        summary = SummaryReport("project", [(1, "Project A", "EUR", 2, 9000, 62.5),
+                                            (2, "Project B", "USD", 1, 3600, 30.0)])
+        body = EmailExporter()._create_email_body(summary, None, datetime(2024, 1, 1), datetime(2024, 3, 31))
+        self.assertIn("<h2>Time Tracking Summary</h2>", body)
+        self.assertIn("<th>Project</th>", body)
+        self.assertIn("<td>2.50</td>", body)
+        self.assertIn("<td>$30.00</td>", body)
+        self.assertNotIn("Start Time", body)
+        self.assertIn("Total Time: 3 hours and 30 minutes", body)
+        self.assertIn("Total Amount: €62.50", body)
+    
+    def test_create_email_body_progress_and_cancel(self):
+        """Test that building the body reports progress and stops when cancelled"""
+        from timetracking.background import CancelToken, TaskCancelled
+        entries = [(i, 1, "Project A", f"Task {i}", "2024-01-01T09:00:00", "2024-01-01T09:30:00", 30, None, None)
+                   for i in range(300)]
+        calls = []
+        EmailExporter()._create_email_body(entries, progress=lambda *args: calls.append(args))
+        self.assertEqual(calls, [(250, 300), (300, 300)])
+        
+        cancel = CancelToken()
+        cancel.cancel()
+        with self.assertRaises(TaskCancelled):
+            EmailExporter()._create_email_body(entries, cancel=cancel)
+    
     @patch('smtplib.SMTP')
     def test_send_time_report_connection_error(self, mock_smtp):
         """Test email sending with connection error"""
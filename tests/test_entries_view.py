@@ -0,0 +1,519 @@
+"""
+Tests for the virtualized time entries list
+"""
+import unittest
+import tempfile
+import os
+import sqlite3
+import sys
+from datetime import date, datetime, timedelta
+from unittest.mock import MagicMock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timetracking.database import ENTRY_SORTS, TimeTrackerDB, group_entry_filters
+from timetracking.background import RefreshScheduler
+from timetracking.gui import TimeTrackerGUI
+from timetracking.entries_view import (
+    GroupedEntriesView, VirtualEntriesView, PLACEHOLDER_VALUES, format_entry_row, sort_key
+)
+
+
+class FakeTree:
+    """The parts of ttk.Treeview the view uses, recording every item update"""
+
+    def __init__(self, height=10):
+        self.height = height
+        self.items = {}
+        self.order = []
+        self.children = {}
+        self.selected = ()
+        self.focused = ""
+        self.updates = 0
+        self.moved_to = None
+        self.next_id = 0
+
+    def cget(self, option):
+        return self.height
+
+    def configure(self, **options):
+        self.options = options
+
+    def bind(self, sequence, callback, add=None):
+        pass
+
+    def insert(self, parent, index, text="", values=(), tags=(), open=False):
+        self.next_id += 1
+        item = f"I{self.next_id}"
+        self.items[item] = {"text": text, "values": values, "tags": tags, "open": open, "parent": parent}
+        self.children[item] = []
+        (self.children[parent] if parent else self.order).append(item)
+        return item
+
+    def delete(self, *items):
+        for item in items:
+            self.delete(*self.children[item])
+            del self.children[item]
+            parent = self.items.pop(item)["parent"]
+            (self.children[parent] if parent else self.order).remove(item)
+
+    def item(self, item, option=None, **changes):
+        if changes:
+            self.updates += 1
+            self.items[item].update(changes)
+            return None
+        return self.items[item][option] if option else self.items[item]
+
+    def get_children(self, item=""):
+        return tuple(self.children[item] if item else self.order)
+
+    def selection(self):
+        return self.selected
+
+    def selection_set(self, items):
+        self.selected = tuple(items)
+
+    def focus(self, item=None):
+        if item is None:
+            return self.focused
+        self.focused = item
+
+    def yview_moveto(self, fraction):
+        self.moved_to = fraction
+
+
+class FakeScrollbar:
+    """Records the fractions the view shows"""
+
+    def configure(self, **options):
+        pass
+
+    def set(self, lo, hi):
+        self.fractions = (lo, hi)
+
+
+def make_rows(offset, limit, total):
+    """Entry rows as get_time_entry_page returns them, with IDs counting down from total"""
+    start = datetime(2024, 1, 1)
+    return [(total - index, 1, "Project", f"Task {index}",
+             (start - timedelta(hours=index)).isoformat(),
+             (start - timedelta(hours=index) + timedelta(minutes=30)).isoformat(), 30, None, "EUR")
+            for index in range(offset, min(total, offset + limit))]
+
+
+class TestVirtualEntriesView(unittest.TestCase):
+    """Test cases for windowing, paging and selection"""
+
+    def setUp(self):
+        """Create a view over a fake tree"""
+        self.tree = FakeTree(height=10)
+        self.scrollbar = FakeScrollbar()
+        self.requests = []
+        self.view = VirtualEntriesView(self.tree, self.scrollbar,
+                                       lambda *request: self.requests.append(request))
+
+    def load(self, total):
+        """Reset the view the way the GUI does: count plus the pages around the top"""
+        offset, limit = self.view.pages_around(0)
+        self.view.reset(total, offset, make_rows(offset, limit, total))
+
+    def test_only_a_window_of_rows_becomes_items(self):
+        """A huge result creates visible rows plus overscan as items"""
+        self.load(500000)
+        self.assertEqual(len(self.tree.order), 10 + 2 * VirtualEntriesView.OVERSCAN)
+        first = self.tree.items[self.tree.order[0]]
+        self.assertEqual(first["values"], format_entry_row(make_rows(0, 1, 500000)[0]))
+        self.assertEqual(self.requests, [])
+        self.assertEqual(self.scrollbar.fractions, (0.0, 10 / 500000))
+
+    def test_small_results_show_every_row(self):
+        """Fewer rows than the window fits are all shown"""
+        self.load(3)
+        self.assertEqual(len(self.tree.order), 3)
+        self.assertEqual(self.scrollbar.fractions, (0.0, 1.0))
+
+        self.view.reset(0)
+        self.assertEqual(self.tree.order, [])
+
+    def test_scrolling_requests_missing_pages(self):
+        """Jumping deep into the list shows placeholders and asks for those pages once"""
+        self.load(500000)
+        self.view.yview("moveto", "0.5")
+        self.assertEqual(self.view.top, 250000)
+        self.assertTrue(all(self.tree.items[item]["values"] == PLACEHOLDER_VALUES
+                            for item in self.tree.order))
+        generation = self.view.generation
+        self.assertEqual(self.requests, [(generation, 249900, 200)])
+
+        self.view.yview("scroll", "1", "units")
+        self.assertEqual(len(self.requests), 1)
+
+        self.view.rows_loaded(generation, 249900, make_rows(249900, 200, 500000))
+        top_item = self.tree.order[self.view.top - self.view.first]
+        self.assertEqual(self.view.entry_id(top_item), 500000 - 250001)
+
+    def test_stale_rows_are_ignored(self):
+        """Rows for an earlier result do not end up in the new one"""
+        self.load(500000)
+        self.view.yview("moveto", "0.5")
+        stale = self.view.generation
+        self.view.reset(5, 0, make_rows(0, 5, 5))
+        self.view.rows_loaded(stale, 249900, make_rows(249900, 200, 500000))
+        self.assertEqual([self.view.entry_id(item) for item in self.tree.order], [5, 4, 3, 2, 1])
+
+    def test_unchanged_rows_are_not_redrawn(self):
+        """Scrolling by a row within loaded pages only updates items whose row changed"""
+        self.load(1000)
+        self.view.rows_loaded(self.view.generation, 0, make_rows(0, 200, 1000))
+        self.view.scroll_to(100)
+        self.tree.updates = 0
+        self.view.scroll_to(100)
+        self.assertEqual(self.tree.updates, 0)
+
+    def test_selection_follows_the_entry(self):
+        """The selected entry stays selected when its item is reused or scrolled away"""
+        self.load(1000)
+        self.view.rows_loaded(self.view.generation, 0, make_rows(0, 300, 1000))
+        item = self.tree.order[2]
+        self.tree.selected = (item,)
+        self.view.on_select()
+        self.assertEqual(self.view.selected_entry_id(), 998)
+
+        self.view.scroll_to(200)
+        self.tree.selected = ()
+        self.view.on_select()
+        self.assertEqual(self.view.selected_entry_id(), 998)
+
+        self.view.scroll_to(0)
+        self.assertEqual(self.tree.selection(), (self.tree.order[2],))
+
+    def test_wheel_scrolling_recenters_the_window(self):
+        """Reaching the edge of the window moves it along"""
+        self.load(1000)
+        self.view.rows_loaded(self.view.generation, 0, make_rows(0, 300, 1000))
+        window = len(self.tree.order)
+        # The tree scrolled itself so that its last rows are visible
+        self.view.on_tree_scrolled((window - 10) / window, 1.0)
+        self.assertEqual(self.view.top, window - 10)
+        self.assertEqual(self.view.first, window - 10 - VirtualEntriesView.OVERSCAN)
+        self.assertEqual(self.tree.moved_to, VirtualEntriesView.OVERSCAN / window)
+
+
+class TestEntryChanges(unittest.TestCase):
+    """Test cases for patching the list instead of reloading it"""
+
+    def setUp(self):
+        """Create a view over a fake tree with the first 300 of 1000 rows loaded"""
+        self.tree = FakeTree(height=10)
+        self.view = VirtualEntriesView(self.tree, FakeScrollbar(), lambda *request: None)
+        self.rows = make_rows(0, 1000, 1000)
+        self.view.reset(1000, 0, self.rows[:300])
+
+    def shown_ids(self):
+        return [self.view.entry_id(item) for item in self.tree.order]
+
+    def test_edit_touches_one_row(self):
+        """Changing a description repaints only that entry's item"""
+        self.view.scroll_to(100)
+        before = self.shown_ids()
+        self.tree.updates = 0
+        edited = self.rows[105][:3] + ("Edited",) + self.rows[105][4:]
+        self.assertTrue(self.view.apply_changes([edited[0]], [edited], 1000))
+        self.assertEqual(self.tree.updates, 1)
+        self.assertEqual(self.shown_ids(), before)
+        self.assertEqual(self.view.top, 100)
+
+    def test_new_entry_keeps_the_scroll_position(self):
+        """An entry added above the visible rows does not move them"""
+        newest = (1001, 1, "Project", "New", "2024-06-01T09:00:00", None, None, None, "EUR")
+        self.view.scroll_to(100)
+        top_id = self.view.row(self.view.top)[0]
+        self.assertTrue(self.view.apply_changes([1001], [newest], 1001))
+        self.assertEqual(self.view.row(self.view.top)[0], top_id)
+        self.assertEqual(self.view.row(0), newest)
+
+        # At the top of the list the new entry shows up
+        self.view.scroll_to(0)
+        newer = (1002, 1, "Project", "Newer", "2024-07-01T09:00:00", None, None, None, "EUR")
+        self.assertTrue(self.view.apply_changes([1002], [newer], 1002))
+        self.assertEqual(self.shown_ids()[:2], [1002, 1001])
+
+    def test_deleting_the_selected_entry_clears_the_selection(self):
+        """A deleted entry leaves no selection behind; other selections survive changes"""
+        self.tree.selected = (self.tree.order[3],)
+        self.view.on_select()
+        deleted = self.rows[1][0]
+        self.assertTrue(self.view.apply_changes([deleted], [], 999))
+        self.assertEqual(self.view.selected_entry_id(), self.rows[3][0])
+        self.assertEqual(self.tree.selection(), (self.tree.order[2],))
+
+        self.assertTrue(self.view.apply_changes([self.rows[3][0]], [], 998))
+        self.assertIsNone(self.view.selected_entry_id())
+
+    def test_unknown_positions_ask_for_a_reload(self):
+        """Removing an entry that was not loaded cannot be patched"""
+        self.assertFalse(self.view.apply_changes([self.rows[500][0]], [], 999))
+
+
+class TestGroupedEntriesView(unittest.TestCase):
+    """Test cases for the grouped mode"""
+
+    GROUPS = [
+        ("2024-03-04", "2024-03-04", "EUR", 3, 5400, 45.0),
+        ("2024-03-04", "2024-03-04", "USD", 1, 1800, None),
+        ("2024-02-26", "2024-02-26", "EUR", 2, 3600, 30.0),
+    ]
+
+    def setUp(self):
+        """Create a grouped view over a fake tree"""
+        self.tree = FakeTree()
+        self.requests = []
+        self.view = GroupedEntriesView(self.tree, lambda *request: self.requests.append(request))
+        self.view.attach()
+
+    def open(self, item):
+        self.tree.focused = item
+        self.view.on_open()
+
+    def test_groups_are_one_row_each(self):
+        """Currencies of one group are merged into one collapsed row with subtotals"""
+        self.view.show_groups(self.GROUPS)
+        self.assertEqual(len(self.tree.order), 2)
+        first = self.tree.items[self.tree.order[0]]
+        self.assertEqual(first["text"], "2024-03-04")
+        self.assertEqual(first["values"], ("", "", "4 entries, 45.00 EUR", "", "", "2h 0m 0s"))
+        self.assertEqual(self.tree.get_children(self.tree.order[0]), (self.tree.children[self.tree.order[0]][0],))
+        self.assertEqual(self.requests, [])
+
+    def test_entries_load_when_a_group_opens(self):
+        """Opening a group asks for its entries once and shows them in place of the placeholder"""
+        self.view.show_groups(self.GROUPS)
+        group = self.tree.order[0]
+        self.open(group)
+        self.open(group)
+        self.assertEqual(self.requests, [(self.view.generation, group, "2024-03-04", GroupedEntriesView.CHILD_LIMIT)])
+
+        rows = make_rows(0, 3, 3)
+        self.view.children_loaded(self.view.generation, group, rows)
+        children = self.tree.get_children(group)
+        self.assertEqual([self.tree.items[child]["values"] for child in children[:3]],
+                         [format_entry_row(row) for row in rows])
+        # The group has 4 entries but only 3 were loaded
+        self.assertEqual(self.tree.items[children[3]]["values"][2], "1 more entries not shown")
+
+    def test_refresh_keeps_open_groups_and_selection(self):
+        """A refresh reopens the open groups and selects the same entry again"""
+        self.view.show_groups(self.GROUPS)
+        self.open(self.tree.order[1])
+        self.view.children_loaded(self.view.generation, self.tree.order[1], make_rows(0, 2, 2))
+        self.tree.selected = (self.tree.get_children(self.tree.order[1])[1],)
+        self.view.on_select()
+        stale = self.view.generation
+
+        self.view.show_groups(self.GROUPS, keep_open=True)
+        group = self.tree.order[1]
+        self.assertTrue(self.tree.items[group]["open"])
+        self.assertEqual(self.requests[-1], (self.view.generation, group, "2024-02-26", GroupedEntriesView.CHILD_LIMIT))
+        self.view.children_loaded(stale, group, [])
+        self.view.children_loaded(self.view.generation, group, make_rows(0, 2, 2))
+        self.assertEqual(self.view.selected_entry_id(), 1)
+
+        self.view.release()
+        self.assertEqual(self.tree.order, [])
+        self.assertEqual(self.tree.options, {"show": "headings"})
+
+
+class TestEntrySorting(unittest.TestCase):
+    """Test cases for sorting by clicking the column headings"""
+
+    def setUp(self):
+        """Build a GUI object without creating any Tk widgets"""
+        self.gui = TimeTrackerGUI.__new__(TimeTrackerGUI)
+        self.gui.entry_sort = ("date", True)
+        self.gui.entries_tree = MagicMock()
+        self.gui.schedule_entries_refresh = MagicMock()
+
+    def test_headings_sort_in_the_database(self):
+        """A new column sorts ascending, clicking it again reverses, and the list reloads each time"""
+        self.gui.sort_entries("Project")
+        self.assertEqual(self.gui.entry_sort, ("project", False))
+        self.gui.entries_tree.heading.assert_any_call("Project", text="Project \u25b2")
+        self.gui.entries_tree.heading.assert_any_call("Date", text="Date")
+
+        self.gui.sort_entries("Project")
+        self.assertEqual(self.gui.entry_sort, ("project", True))
+        self.gui.sort_entries("Date")
+        self.assertEqual(self.gui.entry_sort, ("date", True))
+        self.assertEqual(self.gui.schedule_entries_refresh.call_count, 3)
+
+
+class TestEntryRefreshes(unittest.TestCase):
+    """Test cases for how often the entries list reloads"""
+
+    def setUp(self):
+        """Build a GUI object whose refreshes are only recorded"""
+        self.gui = TimeTrackerGUI.__new__(TimeTrackerGUI)
+        self.gui.root = MagicMock()
+        self.gui.root.after.side_effect = lambda ms, callback: self.jobs.append((ms, callback)) or len(self.jobs)
+        self.jobs = []
+        self.gui.refreshes = RefreshScheduler(self.gui.root)
+        self.gui.refresh_entries = MagicMock()
+        self.gui.update_entries = MagicMock()
+
+    def run_last_job(self):
+        ms, callback = self.jobs[-1]
+        callback()
+        return ms
+
+    def test_stepping_through_filters_loads_once(self):
+        """Ten filter changes in a row issue one debounced reload"""
+        for _ in range(10):
+            self.gui.on_filter_change()
+        self.assertEqual(self.gui.root.after_cancel.call_count, 9)
+        self.assertEqual(self.run_last_job(), TimeTrackerGUI.FILTER_DEBOUNCE_MS)
+        self.gui.refresh_entries.assert_called_once_with()
+        self.assertEqual(self.gui.refreshes.saved["entries"], 9)
+
+    def test_changes_during_a_pending_reload_are_not_patched(self):
+        """A database change while a reload is pending needs no update of its own"""
+        self.gui.on_filter_change()
+        self.gui.schedule_entries_update()
+        self.run_last_job()
+        self.gui.update_entries.assert_not_called()
+        self.assertEqual(self.gui.refreshes.saved, {"entries": 0, "entry_updates": 1})
+
+
+class TestEntryPages(unittest.TestCase):
+    """Test cases for counting and paging entries in the database"""
+
+    def setUp(self):
+        """Create a database with entries on several days"""
+        self.temp_db = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
+        self.temp_db.close()
+        self.db = TimeTrackerDB(self.temp_db.name)
+        self.first = self.db.add_project("First")
+        self.second = self.db.add_project("Second")
+        conn = sqlite3.connect(self.temp_db.name)
+        start = datetime(2024, 3, 1, 9, 0)
+        for index in range(50):
+            entry_start = start + timedelta(hours=index * 5)
+            # Repeated descriptions and lengths, and a running entry, exercise the tiebreaks
+            end = None if index == 49 else (entry_start + timedelta(minutes=30 + index % 4 * 15)).isoformat()
+            conn.execute(
+                "INSERT INTO time_entries (project_id, description, start_time, end_time, duration_minutes) "
+                "VALUES (?, ?, ?, ?, 60)",
+                (self.first if index % 2 else self.second, f"Task {index % 7}" if index % 5 else None,
+                 entry_start.isoformat(), end)
+            )
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        """Clean up test database"""
+        os.unlink(self.temp_db.name)
+
+    def test_pages_match_the_full_list(self):
+        """Consecutive pages add up to get_time_entries, in the same order"""
+        for filters in [(), (self.first,), (None, date(2024, 3, 3), date(2024, 3, 5))]:
+            entries = self.db.get_time_entries(*filters)
+            self.assertEqual(self.db.count_time_entries(*filters), len(entries))
+            pages = []
+            for offset in range(0, len(entries), 7):
+                pages.extend(self.db.get_time_entry_page(offset, 7, *filters))
+            self.assertEqual(pages, entries)
+
+    def test_sorted_pages(self):
+        """Every sort key pages through the entries in the order sort_key gives, both ways"""
+        entries = self.db.get_time_entries()
+        for sort in ENTRY_SORTS:
+            for descending in (True, False):
+                pages = []
+                for offset in range(0, len(entries), 9):
+                    pages.extend(self.db.get_time_entry_page(offset, 9, sort=sort, descending=descending))
+                expected = sorted(entries, key=lambda entry: sort_key(entry, sort), reverse=descending)
+                self.assertEqual(pages, expected, (sort, descending))
+        with self.assertRaises(ValueError):
+            self.db.get_time_entry_page(0, 10, sort="te.id; DROP TABLE projects")
+
+    def test_sorts_use_indexes(self):
+        """No sort key needs a sort of all entries"""
+        conn = sqlite3.connect(self.temp_db.name)
+        for sort, expression in ENTRY_SORTS.items():
+            join = " JOIN projects p ON te.project_id = p.id" if sort == "project" else ""
+            order = "te.start_time DESC, te.id DESC"
+            if sort != "date":
+                order = f"{expression} DESC, " + order
+            plan = conn.execute(
+                f"EXPLAIN QUERY PLAN SELECT te.id FROM time_entries te{join} ORDER BY {order} LIMIT 10"
+            ).fetchall()
+            self.assertNotIn("TEMP B-TREE", " ".join(row[-1] for row in plan), sort)
+        conn.close()
+
+    def test_changes_keep_the_sort_order(self):
+        """Patching a list sorted by project puts changed entries where a reload would"""
+        view = VirtualEntriesView(FakeTree(height=10), FakeScrollbar(), lambda *request: None)
+        view.sort, view.descending = "project", False
+        seq = self.db.get_changelog_seq()
+        view.reset(self.db.count_time_entries(), 0, self.db.get_time_entry_page(0, 100, sort="project", descending=False))
+
+        entries = self.db.get_time_entries()
+        self.db.update_entry(entries[4][0], project_id=self.first if entries[4][1] == self.second else self.second)
+        self.db.update_entry(entries[7][0], description="Moved")
+
+        entry_ids = [row_id for _, table, row_id, _ in self.db.get_changes_since(seq) if table == "time_entries"]
+        self.assertTrue(view.apply_changes(entry_ids, self.db.get_time_entries_by_ids(entry_ids),
+                                           self.db.count_time_entries()))
+        expected = self.db.get_time_entry_page(0, 100, sort="project", descending=False)
+        self.assertEqual([view.row(index) for index in range(view.total)], expected)
+
+    def test_changelog_patches_match_a_reload(self):
+        """Replaying the changelog onto a loaded list gives what a reload would show"""
+        for filters in [(), (self.first,)]:
+            view = VirtualEntriesView(FakeTree(height=10), FakeScrollbar(), lambda *request: None)
+            seq = self.db.get_changelog_seq()
+            view.reset(self.db.count_time_entries(*filters), 0, self.db.get_time_entry_page(0, 100, *filters))
+
+            entries = self.db.get_time_entries()
+            self.db.update_entry(entries[3][0], description="Edited")
+            self.db.update_entry(entries[10][0], start_time="2024-03-20T08:00:00", project_id=self.first)
+            self.db.delete_entry(entries[20][0])
+            self.db.start_timer(self.second, "New")
+            self.db.stop_timer(self.second)
+
+            changes = self.db.get_changes_since(seq)
+            entry_ids = [row_id for _, table, row_id, _ in changes if table == "time_entries"]
+            self.assertTrue(view.apply_changes(entry_ids, self.db.get_time_entries_by_ids(entry_ids, *filters),
+                                               self.db.count_time_entries(*filters)))
+            expected = self.db.get_time_entry_page(0, 100, *filters)
+            self.assertEqual([view.row(index) for index in range(view.total)], expected)
+
+    def test_group_filters_select_the_group(self):
+        """Narrowing the filters to a group selects exactly the entries get_entry_groups counted"""
+        filters = (None, date(2024, 3, 4), date(2024, 3, 12))
+        for group_by in ("day", "week", "month", "project"):
+            groups = self.db.get_entry_groups(group_by, *filters)
+            self.assertTrue(groups)
+            for group_key, _, _, count, _, _ in groups:
+                narrowed = group_entry_filters(group_by, group_key, *filters)
+                self.assertEqual(self.db.count_time_entries(*narrowed), count)
+        self.assertIsNone(group_entry_filters("project", self.first, self.second))
+        self.assertIsNone(group_entry_filters("day", "2024-03-01", None, date(2024, 3, 2)))
+
+    def test_date_filters_include_the_whole_end_day(self):
+        """Entries late on the end date still count; the next day's do not"""
+        entries = self.db.get_time_entries(start_date=date(2024, 3, 2), end_date=date(2024, 3, 2))
+        self.assertEqual([entry[4][:10] for entry in entries], ["2024-03-02"] * len(entries))
+        self.assertEqual(len(entries), 5)
+
+    def test_entry_indexes_exist(self):
+        """Paging newest first uses the start_time indexes"""
+        conn = sqlite3.connect(self.temp_db.name)
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM time_entries WHERE project_id = ? "
+            "ORDER BY start_time DESC LIMIT 10", (self.first,)
+        ).fetchall()
+        conn.close()
+        self.assertIn("idx_time_entries_project_start", " ".join(row[-1] for row in plan))
+
+
+if __name__ == '__main__':
+    unittest.main()
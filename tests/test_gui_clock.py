@@ -0,0 +1,141 @@
+"""
+GUI logic tests for the live timer clock and timer state
+"""
+import unittest
+import os
+import sys
+from unittest.mock import MagicMock
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timetracking.background import RefreshScheduler
+from timetracking.gui import TimeTrackerGUI
+
+
+class FakeRoot:
+    """Just enough of tk.Tk for the clock: after, after_cancel and state"""
+
+    def __init__(self):
+        self.jobs = {}
+        self.window_state = "normal"
+        self.next_id = 0
+
+    def after(self, ms, callback):
+        self.next_id += 1
+        self.jobs[self.next_id] = (ms, callback)
+        return self.next_id
+
+    def after_cancel(self, job):
+        self.jobs.pop(job, None)
+
+    def state(self):
+        return self.window_state
+
+
+class TestTimerClock(unittest.TestCase):
+    """Test cases for the event-loop driven clock"""
+
+    def setUp(self):
+        """Build a GUI object without creating any Tk widgets"""
+        self.gui = TimeTrackerGUI.__new__(TimeTrackerGUI)
+        self.gui.root = FakeRoot()
+        self.gui.timer_label = MagicMock()
+        self.gui.timer_running = True
+        self.gui.timer_start = None
+        self.gui._clock_job = None
+
+    def shown_text(self):
+        return self.gui.timer_label.config.call_args[1]["text"]
+
+    def test_clock_uses_stored_start_time(self):
+        """Test elapsed time is measured from the persisted start"""
+        self.gui.start_clock(datetime.now() - timedelta(hours=1, minutes=2, seconds=3, milliseconds=400))
+        self.assertEqual(self.shown_text(), "01:02:03")
+
+    def test_single_job_aligned_to_next_second(self):
+        """Test exactly one redraw is pending, due just after the next elapsed second"""
+        self.gui.start_clock(datetime.now() - timedelta(seconds=5, milliseconds=300))
+        self.assertEqual(len(self.gui.root.jobs), 1)
+        delay, callback = next(iter(self.gui.root.jobs.values()))
+        self.assertGreater(delay, 600)
+        self.assertLessEqual(delay, 705)
+        self.assertEqual(callback, self.gui.update_clock)
+
+    def test_iconified_window_ticks_slowly(self):
+        """Test the clock backs off while iconified and catches up when mapped"""
+        self.gui.root.window_state = "iconic"
+        self.gui.start_clock(datetime.now())
+        delay, _ = next(iter(self.gui.root.jobs.values()))
+        self.assertGreater(delay, TimeTrackerGUI.CLOCK_TICK_MS)
+
+        self.gui.root.window_state = "normal"
+        self.gui.on_window_mapped()
+        self.assertEqual(len(self.gui.root.jobs), 1)
+        delay, _ = next(iter(self.gui.root.jobs.values()))
+        self.assertLessEqual(delay, TimeTrackerGUI.CLOCK_TICK_MS + 5)
+
+    def test_stop_clock_cancels_pending_redraw(self):
+        """Test stopping leaves no scheduled work behind"""
+        self.gui.start_clock(datetime.now())
+        self.gui.stop_clock()
+        self.assertEqual(self.gui.root.jobs, {})
+        self.assertIsNone(self.gui.timer_start)
+
+
+
+class TestTimerSync(unittest.TestCase):
+    """Test cases for keeping the timer controls in step with the database"""
+
+    def setUp(self):
+        """Build a GUI object without creating any Tk widgets"""
+        self.gui = TimeTrackerGUI.__new__(TimeTrackerGUI)
+        self.gui.root = FakeRoot()
+        for widget in ("timer_label", "start_button", "stop_button", "project_combo", "filter_combo",
+                       "date_range_var", "db", "background", "entries_view", "grouped_view", "group_by_var"):
+            setattr(self.gui, widget, MagicMock())
+        self.gui.entries_view.pages_around.return_value = (0, 100)
+        self.gui.background.running.return_value = False
+        self.gui.grouped_view.active = False
+        self.gui.refreshes = RefreshScheduler(self.gui.root)
+        self.gui.entry_filters = (None, None, None)
+        self.gui.shown_entries_query = (self.gui.entry_filters, ("date", True))
+        self.gui.entries_seq = 0
+        self.gui.timer_running = False
+        self.gui.current_timer = None
+        self.gui.timer_start = None
+        self.gui._clock_job = None
+
+    def test_timer_started_elsewhere_is_shown(self):
+        """Test a timer started by another instance starts the clock here"""
+        start = (datetime.now() - timedelta(minutes=5)).isoformat()
+        self.gui.show_running_timer([(7, 2, "Client", "Remote task", start)])
+
+        self.assertTrue(self.gui.timer_running)
+        self.assertEqual(self.gui.current_timer, 7)
+        self.gui.project_combo.set.assert_called_with("Client (ID: 2)")
+        self.gui.stop_button.config.assert_called_with(state="normal")
+        self.assertEqual(len(self.gui.root.jobs), 1)
+
+    def test_timer_stopped_elsewhere_resets_controls(self):
+        """Test a timer stopped by another instance stops the clock here"""
+        self.gui.show_running_timer([(7, 2, "Client", "", datetime.now().isoformat())])
+        self.gui.show_running_timer([])
+
+        self.assertFalse(self.gui.timer_running)
+        self.assertIsNone(self.gui.current_timer)
+        self.assertEqual(self.gui.root.jobs, {})
+        self.gui.start_button.config.assert_called_with(state="normal")
+        self.gui.timer_label.config.assert_called_with(text="00:00:00")
+
+    def test_own_writes_are_not_reloaded_twice(self):
+        """Test a local write marks the change seen before reloading"""
+        self.gui.refresh_after_write()
+        self.gui.db.changes.mark_seen.assert_called_once_with()
+        for _, callback in list(self.gui.root.jobs.values()):
+            callback()
+        keys = [call[0][0] for call in self.gui.background.submit.call_args_list]
+        self.assertEqual(keys, ["project_choices", "entry_changes"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -12,6 +12,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from timetracking.database import TimeTrackerDB
 from timetracking.pdf_export import PDFExporter
 from timetracking.email_export import EmailExporter
+from timetracking.email_body import timesheet_body
 
 
 class TestGUIDialogs(unittest.TestCase):
@@ -394,5 +395,112 @@ class TestGUIDialogs(unittest.TestCase):
         self.assertIsInstance(project_data["currency"], str)
 
 
+class TestReportAttachments(unittest.TestCase):
+    """Test cases for the PDF attachments of the email dialogs"""
+    
+    def setUp(self):
+        """A database with one entry and exporters that cannot reach a server"""
+        from timetracking.gui import EmailDialog, WeeklyReportDialog
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.db = TimeTrackerDB(os.path.join(self.temp_dir.name, "dialogs.db"))
+        project_id = self.db.add_project("Project A", rate=25.0)
+        self.db.start_timer(project_id, "Task")
+        self.db.stop_timer(project_id)
+        
+        self.email_exporter = MagicMock(sender_email="me@example.com", sender_password="secret",
+                                        smtp_server="smtp.example.com", smtp_port=587)
+        self.email_dialog = EmailDialog.__new__(EmailDialog)
+        self.weekly_dialog = WeeklyReportDialog.__new__(WeeklyReportDialog)
+        for dialog in (self.email_dialog, self.weekly_dialog):
+            dialog.db = self.db
+            dialog.pdf_exporter = PDFExporter()
+            dialog.email_exporter = self.email_exporter
+        
+        # Sending renders the PDF in memory: no temporary files
+        temp_patcher = patch("tempfile.NamedTemporaryFile", side_effect=AssertionError("temp file created"))
+        temp_patcher.start()
+        self.addCleanup(temp_patcher.stop)
+    
+    def test_email_report_attaches_rendered_bytes(self):
+        """Test that every recipient gets the same in-memory PDF"""
+        cancel = MagicMock()
+        self.email_exporter.send_time_report.return_value = True
+        
+        self.assertEqual(self.email_dialog.deliver_email_report(["a@example.com", "b@example.com"], True, cancel), 2)
+        
+        calls = self.email_exporter.send_time_report.call_args_list
+        self.assertTrue(calls[0].kwargs["pdf_data"].startswith(b"%PDF"))
+        self.assertIs(calls[0].kwargs["pdf_data"], calls[1].kwargs["pdf_data"])
+        self.email_exporter.send_time_report.reset_mock()
+        self.email_dialog.deliver_email_report(["a@example.com"], False, cancel)
+        self.assertIsNone(self.email_exporter.send_time_report.call_args.kwargs["pdf_data"])
+    
+    def test_unchanged_report_is_rendered_once(self):
+        """Test that sending the same report again uses the render cache until the data changes"""
+        cancel = MagicMock()
+        self.email_exporter.send_time_report.return_value = True
+        exporter = self.email_dialog.pdf_exporter
+        with patch.object(exporter, "render_time_report", wraps=exporter.render_time_report) as render:
+            self.email_dialog.deliver_email_report(["a@example.com"], True, cancel)
+            self.email_dialog.deliver_email_report(["a@example.com"], True, cancel)
+            self.assertEqual(render.call_count, 1)
+            first = self.email_exporter.send_time_report.call_args_list[0].kwargs["pdf_data"]
+            self.assertEqual(self.email_exporter.send_time_report.call_args.kwargs["pdf_data"], first)
+
+            self.db.update_project(1, rate=50.0)
+            self.email_dialog.deliver_email_report(["a@example.com"], True, cancel)
+            self.assertEqual(render.call_count, 2)
+
+    @patch("smtplib.SMTP")
+    def test_weekly_report_attaches_rendered_bytes(self, mock_smtp):
+        """Test that the weekly report attaches the PDF without writing it to disk"""
+        from email import message_from_string
+        from timetracking.report import ReportModel
+        
+        report = ReportModel.from_query(self.db)
+        self.assertTrue(self.weekly_dialog.send_custom_email(["a@example.com"], "Weekly", "<p>Hi</p>", report))
+        
+        message = message_from_string(mock_smtp.return_value.sendmail.call_args[0][2])
+        attachment = message.get_payload()[1]
+        self.assertIn("weekly_report.pdf", attachment["Content-Disposition"])
+        self.assertTrue(attachment.get_payload(decode=True).startswith(b"%PDF"))
+
+    
+    @patch("smtplib.SMTP")
+    def test_weekly_report_body(self, mock_smtp):
+        """Test the weekly email: escaped HTML, a plain-text alternative, and one render while unchanged"""
+        from email import message_from_string
+        self.email_exporter.student_name = "Sam"
+        reflection = "Learned that <b> & </b> need escaping"
+        cancel = MagicMock()
+        with patch("timetracking.gui.timesheet_body", wraps=timesheet_body) as render:
+            self.assertTrue(self.weekly_dialog.deliver_weekly_report(["a@example.com"], reflection, True, False, cancel))
+            self.assertTrue(self.weekly_dialog.deliver_weekly_report(["a@example.com"], reflection, True, False, cancel))
+        self.assertEqual(render.call_count, 1)
+        
+        message = message_from_string(mock_smtp.return_value.sendmail.call_args[0][2])
+        text, html = message.get_payload()[0].get_payload()
+        text = text.get_payload(decode=True).decode("utf-8")
+        html = html.get_payload(decode=True).decode("utf-8")
+        self.assertIn("Learned that &lt;b&gt; &amp; &lt;/b&gt; need escaping", html)
+        self.assertIn("TIMESHEET SUMMARY:", html)
+        self.assertIn("Project: Project A\nDescription: Task\n", text)
+        self.assertIn("WEEKLY REFLECTION:\n" + reflection, text)
+        self.assertIn("Best regards,\nSam", text)
+    
+    @patch("smtplib.SMTP")
+    def test_cancelled_weekly_report_is_not_sent(self, mock_smtp):
+        """Test that cancelling while the PDF renders stops the send instead of dropping the attachment"""
+        from timetracking.background import CancelToken, TaskCancelled
+        from timetracking.report import ReportModel
+        
+        cancel = CancelToken()
+        cancel.cancel()
+        with self.assertRaises(TaskCancelled):
+            self.weekly_dialog.send_custom_email(["a@example.com"], "Weekly", "<p>Hi</p>",
+                                                 ReportModel.from_query(self.db), cancel=cancel)
+        mock_smtp.assert_not_called()
+
 if __name__ == '__main__':
     unittest.main()
@@ -4,6 +4,7 @@ Unit tests for main application entry point
 import unittest
 import sys
 import os
+import tempfile
 from unittest.mock import patch, MagicMock
 
 # Add parent directory to path for imports
@@ -13,6 +14,17 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 class TestMainApplication(unittest.TestCase):
     """Test cases for main application"""
     
+    def setUp(self):
+        """Run from a temp dir: the legacy password_utils writes its key file to the working directory"""
+        self.old_cwd = os.getcwd()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.temp_dir.name)
+    
+    def tearDown(self):
+        """Restore the working directory"""
+        os.chdir(self.old_cwd)
+        self.temp_dir.cleanup()
+    
     @patch('timetracking.gui.tk.Tk')
     @patch('timetracking.gui.TimeTrackerGUI')
     def test_main_application_startup(self, mock_gui, mock_tk):
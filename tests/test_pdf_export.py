@@ -1,14 +1,22 @@
 """
 Unit tests for PDF export functionality
 """
+import re
 import unittest
+import zlib
 import tempfile
 import os
 import sys
 from datetime import datetime, timedelta
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from timetracking.pdf_export import PDFExporter
+from unittest.mock import patch
+from reportlab.platypus import Table
+
+from timetracking.pdf_export import PDFExporter, _CanvasReport, _LazyStory
+from timetracking.report import ReportModel, SummaryReport
+from timetracking.database import TimeTrackerDB
+from timetracking.background import CancelToken, TaskCancelled
 
 
 class TestPDFExporter(unittest.TestCase):
@@ -134,5 +142,259 @@ class TestPDFExporter(unittest.TestCase):
                     os.unlink(output_path)
 
 
+class TestLargeReports(unittest.TestCase):
+    """Test cases for the per-day, streamed layout of large reports"""
+    
+    def setUp(self):
+        """Two days of entries, the second with more entries than fit in one table"""
+        self.pdf_exporter = PDFExporter()
+        start = datetime(2024, 1, 2, 9, 0)
+        self.entries = [(i, 1, "Project A", f"Task {i}", (start - timedelta(hours=i)).isoformat(),
+                         (start - timedelta(hours=i) + timedelta(minutes=30)).isoformat(), 30, 20.0, "EUR")
+                        for i in range(12)]
+    
+    def test_day_tables(self):
+        """Test the headings, table sizes and subtotals of the per-day layout"""
+        report = ReportModel(self.entries)
+        with patch.object(PDFExporter, "MAX_TABLE_ROWS", 5):
+            flowables = list(self.pdf_exporter._day_tables(report, report.iter_rows()))
+        
+        headings = [f.text for f in flowables if not isinstance(f, Table) and getattr(f, "keepWithNext", 0)]
+        self.assertEqual(headings, ["Tuesday, January 02, 2024", "Monday, January 01, 2024"])
+        tables = [f for f in flowables if isinstance(f, Table)]
+        # 10 entries on the 2nd of January fill two tables, the second also holding the subtotal
+        self.assertEqual([len(t._cellvalues) - 1 for t in tables], [5, 5 + 1, 2 + 1])
+        self.assertEqual(tables[1]._cellvalues[-1][4], "5h 0m 0s")
+        self.assertEqual(tables[1]._cellvalues[-1][6], "€100.00")
+        self.assertEqual(tables[2]._cellvalues[-1][6], "€20.00")
+        self.assertIn("Total Amount: €120.00", flowables[-1].text)
+    
+    def test_large_reports_use_day_tables(self):
+        """Test that reports above LARGE_REPORT_ROWS switch layout"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_path = os.path.join(temp_dir, "report.pdf")
+            with patch.object(PDFExporter, "_day_tables", wraps=self.pdf_exporter._day_tables) as day_tables:
+                self.pdf_exporter.export_time_report(self.entries, output_path)
+                day_tables.assert_not_called()
+                with patch.object(PDFExporter, "LARGE_REPORT_ROWS", 10):
+                    self.pdf_exporter.export_time_report(self.entries, output_path)
+                day_tables.assert_called_once()
+            self.assertGreater(os.path.getsize(output_path), 0)
+    
+    def test_streamed_report_from_database(self):
+        """Test that a streamed report reads the database as the PDF is written"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db = TimeTrackerDB(os.path.join(temp_dir, "report.db"))
+            project_id = db.add_project("Project A", rate=20.0)
+            for _ in range(3):
+                db.start_timer(project_id, "Task")
+                db.stop_timer(project_id)
+            
+            report = ReportModel.stream_query(db, project_id)
+            self.assertTrue(report.streamed)
+            self.assertTrue(report.has_rates)
+            self.assertEqual(len(report), 0)
+            self.pdf_exporter.export_time_report(report, os.path.join(temp_dir, "report.pdf"))
+            self.assertEqual(len(report), 3)
+            self.assertEqual(report.rows, [])
+            self.assertFalse(db.entries_have_rates(project_id + 1))
+    
+    def test_lazy_story_pulls_flowables_on_demand(self):
+        """Test that the story only takes flowables from the iterator as they are needed"""
+        produced = []
+        
+        def flowables():
+            for i in range(100):
+                produced.append(i)
+                yield i
+        
+        story = _LazyStory(flowables())
+        self.assertEqual(len(story), 2)
+        self.assertEqual(story[0], 0)
+        del story[0]
+        self.assertEqual(story[0], 1)
+        self.assertEqual(len(produced), 2)
+        self.assertEqual(story[5], 6)
+        while len(story):
+            del story[0]
+        self.assertEqual(len(produced), 100)
+
+
+class TestProgressAndCancel(unittest.TestCase):
+    """Test cases for progress callbacks and cancelled exports"""
+    
+    def setUp(self):
+        """Enough entries for several progress reports"""
+        self.pdf_exporter = PDFExporter()
+        start = datetime(2024, 1, 1, 9, 0)
+        self.entries = [(i, 1, "Project A", f"Task {i}", (start + timedelta(minutes=i)).isoformat(),
+                         (start + timedelta(minutes=i + 1)).isoformat(), 1, None, None)
+                        for i in range(600)]
+    
+    def test_progress(self):
+        """Test that progress is reported every PROGRESS_ROWS rows and at the end, in every layout"""
+        for options in ({}, {"direct": True}):
+            calls = []
+            self.pdf_exporter.render_time_report(self.entries, progress=lambda *args: calls.append(args), **options)
+            self.assertEqual(calls, [(250, 600), (500, 600), (600, 600)])
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db = TimeTrackerDB(os.path.join(temp_dir, "report.db"))
+            project_id = db.add_project("Project A")
+            db.start_timer(project_id, "Task")
+            db.stop_timer(project_id)
+            calls = []
+            self.pdf_exporter.render_time_report(ReportModel.stream_query(db), progress=lambda *args: calls.append(args))
+            # A streamed report does not know its length up front
+            self.assertEqual(calls, [(1, None)])
+    
+    def test_cancelled_export_leaves_no_file(self):
+        """Test that cancelling stops the export and keeps the previous file in place"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_path = os.path.join(temp_dir, "report.pdf")
+            with open(output_path, "wb") as f:
+                f.write(b"previous")
+            
+            for options in ({}, {"direct": True}):
+                cancel = CancelToken()
+                calls = []
+                
+                def progress(done, total):
+                    calls.append(done)
+                    cancel.cancel()
+                
+                with self.assertRaises(TaskCancelled):
+                    self.pdf_exporter.export_time_report(self.entries, output_path, progress=progress,
+                                                         cancel=cancel, **options)
+                self.assertEqual(calls, [250])
+                self.assertEqual(os.listdir(temp_dir), ["report.pdf"])
+                with open(output_path, "rb") as f:
+                    self.assertEqual(f.read(), b"previous")
+
+
+class TestFastCells(unittest.TestCase):
+    """Test cases for plain string cells and the direct canvas renderer"""
+    
+    def setUp(self):
+        """One entry with short values and one whose description and duration wrap"""
+        self.entries = [
+            (1, 1, "Project A", "Short", "2024-01-01T09:00:00", "2024-01-01T10:00:00", 60, 25.0, "EUR"),
+            (2, 1, "Project <A> & Co", "A description long enough to wrap onto a second line in its column",
+             "2024-01-01T11:00:00", "2024-01-01T12:30:45", 90, 25.0, "EUR"),
+        ]
+    
+    def cells(self, exporter):
+        report = ReportModel(self.entries)
+        return exporter._entries_table(report, report.iter_rows())._cellvalues
+    
+    def test_fast_cells_are_strings_unless_they_wrap(self):
+        """Test that only text wider than its column becomes a Paragraph"""
+        header, short, long = self.cells(PDFExporter())
+        self.assertEqual(header[0], "Date")
+        self.assertNotIsInstance(header[3], str)  # "Start Time" wraps in a 0.8 inch column
+        self.assertEqual(short, ["2024-01-01", "Project A", "Short", "09:00", "10:00", "1h 0m 0s", "€25.00/h", "€25.00"])
+        self.assertEqual(long[1], "Project <A> & Co")
+        self.assertEqual(long[2].text, "A description long enough to wrap onto a second line in its column")
+        self.assertEqual(long[5].text, "1h 30m 45s")
+    
+    def test_slow_cells_are_escaped_paragraphs(self):
+        """Test that fast=False keeps a Paragraph in every cell, with markup characters escaped"""
+        header, short, long = self.cells(PDFExporter(fast=False))
+        self.assertFalse(any(isinstance(cell, str) for cell in header + short + long))
+        self.assertEqual(long[1].text, "Project &lt;A&gt; &amp; Co")
+    
+    def test_direct_renderer(self):
+        """Test that the canvas renderer writes a PDF with the header repeated on each page"""
+        start = datetime(2024, 1, 1)
+        entries = self.entries + [(i, 1, "Project A", f"Task {i}", (start + timedelta(hours=i)).isoformat(),
+                                   (start + timedelta(hours=i, minutes=30)).isoformat(), 30, None, "EUR")
+                                  for i in range(3, 62)]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_path = os.path.join(temp_dir, "report.pdf")
+            with patch("timetracking.pdf_export.SimpleDocTemplate") as doc_template:
+                pdf_exporter = PDFExporter()
+                self.assertEqual(pdf_exporter.export_time_report(entries, output_path, direct=True), output_path)
+                pdf_exporter.export_time_report([], output_path, direct=True)
+            doc_template.assert_not_called()
+            
+            with patch.object(_CanvasReport, "_header_row", autospec=True,
+                              side_effect=_CanvasReport._header_row) as header:
+                PDFExporter().export_time_report(entries, output_path, direct=True)
+            self.assertEqual(header.call_count, 3)
+            with open(output_path, "rb") as f:
+                self.assertEqual(len(re.findall(rb"/Type /Page\b(?!s)", f.read())), 3)
+
+
+class TestSummaryReports(unittest.TestCase):
+    """Test cases for summary reports rendered from aggregates"""
+    
+    def test_summary_table(self):
+        """Test that a summary renders one row per group and the totals"""
+        summary = SummaryReport("month", [("2024-01", "2024-01", "EUR", 12, 36000, 400.0),
+                                          ("2024-02", "2024-02", "EUR", 3, 5400, None)])
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_path = os.path.join(temp_dir, "summary.pdf")
+            self.assertEqual(PDFExporter().export_time_report(summary, output_path), output_path)
+            self.assertGreater(os.path.getsize(output_path), 0)
+            
+        with patch("timetracking.pdf_export.SimpleDocTemplate") as doc_template:
+            PDFExporter().render_time_report(summary)
+        story = doc_template.return_value.build.call_args[0][0]
+        self.assertEqual(story[0].text, "Time Tracking Summary")
+        table = next(flowable for flowable in story if isinstance(flowable, Table))
+        self.assertEqual(table._cellvalues, [["Month", "Entries", "Hours", "Amount"],
+                                             ["January 2024", "12", "10.00", "€400.00"],
+                                             ["February 2024", "3", "1.50", "N/A"]])
+        self.assertIn("Total Amount: €400.00", story[-1].text)
+
+
+class TestCompactOutput(unittest.TestCase):
+    """Test cases for compact mode and the reported size"""
+    
+    def setUp(self):
+        """A few pages of entries"""
+        start = datetime(2024, 1, 1, 9, 0)
+        self.entries = [(i, 1, "Project A", f"Task {i}", (start + timedelta(hours=i)).isoformat(),
+                         (start + timedelta(hours=i, minutes=30)).isoformat(), 30, 25.0, "EUR")
+                        for i in range(150)]
+    
+    def test_compact_is_smaller(self):
+        """Test that compact mode writes fewer bytes and reports the size"""
+        for direct in (False, True):
+            default, compact = PDFExporter(), PDFExporter(compact=True)
+            default_data = default.render_time_report(self.entries, direct=direct)
+            compact_data = compact.render_time_report(self.entries, direct=direct)
+            self.assertEqual((default.last_size, compact.last_size), (len(default_data), len(compact_data)))
+            self.assertLess(compact.last_size, default.last_size * 0.85)
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_path = os.path.join(temp_dir, "report.pdf")
+            compact.export_time_report(self.entries, output_path)
+            self.assertEqual(compact.last_size, os.path.getsize(output_path))
+    
+    def test_compact_streams_and_pages(self):
+        """Test binary deflated page streams and lean page dictionaries"""
+        data = PDFExporter(compact=True).render_time_report(self.entries)
+        self.assertNotIn(b"ASCII85Decode", data)
+        self.assertNotIn(b"/Trans", data)
+        self.assertNotIn(b"/ImageB", data)
+        pages = len(re.findall(rb"/Type /Page\b(?!s)", data))
+        self.assertGreater(pages, 1)
+        self.assertEqual(data.count(b"/Filter [ /FlateDecode ]"), pages)
+        streams = [zlib.decompress(data[match.end():match.end() + int(match.group(1))])
+                   for match in re.finditer(rb"/Filter \[ /FlateDecode \] /Length (\d+)\n>>\nstream\n", data)]
+        self.assertEqual(len(streams), pages)
+        self.assertIn(b"(Time Tracking Report) Tj", streams[0])
+    
+    def test_compact_table_style(self):
+        """Test rules instead of the full grid and no command overridden later"""
+        style = PDFExporter(compact=True).table_style
+        names = [command[0] for command in style]
+        self.assertNotIn("GRID", names)
+        self.assertIn("BOX", names)
+        self.assertEqual(len({command[:3] for command in style}), len(style))
+        self.assertIn("GRID", [command[0] for command in PDFExporter().table_style])
+
+
 if __name__ == '__main__':
     unittest.main()
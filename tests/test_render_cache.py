@@ -0,0 +1,90 @@
+"""
+Unit tests for the on-disk cache of rendered reports
+"""
+import unittest
+import tempfile
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timetracking.render_cache import RenderCache, cache_dir
+from timetracking.database import TimeTrackerDB
+
+
+class TestRenderCache(unittest.TestCase):
+    """Test cases for RenderCache"""
+
+    def setUp(self):
+        """Set up an empty cache directory"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.cache = RenderCache(os.path.join(self.temp_dir.name, "reports"), max_bytes=250)
+
+    def test_put_and_get(self):
+        """Test that a stored report is returned as is and a missing one is None"""
+        key = RenderCache.key("pdf", 1)
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, b"%PDF report")
+        self.assertEqual(self.cache.get(key), b"%PDF report")
+        self.assertEqual(os.listdir(self.cache.directory), [key])
+
+    def test_key_covers_data_filters_and_options(self):
+        """Test that the key changes with everything that goes into a report"""
+        key = RenderCache.key("pdf", 5, 1, None, None, project_name="A", fast=True)
+        self.assertEqual(key, RenderCache.key("pdf", 5, 1, None, None, fast=True, project_name="A"))
+        self.assertNotEqual(key, RenderCache.key("pdf", 6, 1, None, None, project_name="A", fast=True))
+        self.assertNotEqual(key, RenderCache.key("pdf", 5, 2, None, None, project_name="A", fast=True))
+        self.assertNotEqual(key, RenderCache.key("pdf", 5, 1, None, None, project_name="A", fast=False))
+        self.assertNotEqual(key, RenderCache.key("weekly-html", 5, 1, None, None, project_name="A", fast=True))
+
+    def test_fetch_renders_once(self):
+        """Test that fetch only renders on a miss"""
+        calls = []
+
+        def render():
+            calls.append(1)
+            return b"rendered"
+
+        key = RenderCache.key("pdf", 1)
+        self.assertEqual(self.cache.fetch(key, render), b"rendered")
+        self.assertEqual(self.cache.fetch(key, render), b"rendered")
+        self.assertEqual(len(calls), 1)
+
+    def test_least_recently_used_are_evicted(self):
+        """Test that the directory stays under max_bytes and recently read reports survive"""
+        keys = [RenderCache.key("pdf", seq) for seq in range(3)]
+        for age, key in zip((30, 20), keys):
+            self.cache.put(key, b"x" * 100)
+            os.utime(self.cache.path(key), (0, 1000 - age))
+        self.cache.get(keys[0])
+        self.cache.put(keys[2], b"x" * 100)
+        self.assertEqual(sorted(os.listdir(self.cache.directory)), sorted([keys[0], keys[2]]))
+        self.cache.put(RenderCache.key("pdf", 9), b"x" * 300)
+        self.assertIsNone(self.cache.get(RenderCache.key("pdf", 9)))
+
+    def test_copy_to_and_put_file(self):
+        """Test caching a report written to a file and writing it out again"""
+        source = os.path.join(self.temp_dir.name, "report.pdf")
+        with open(source, "wb") as f:
+            f.write(b"%PDF file")
+        key = RenderCache.key("pdf", 1)
+        target = os.path.join(self.temp_dir.name, "copy.pdf")
+        self.assertFalse(self.cache.copy_to(key, target))
+        self.cache.put_file(key, source)
+        self.assertTrue(self.cache.copy_to(key, target))
+        with open(target, "rb") as f:
+            self.assertEqual(f.read(), b"%PDF file")
+
+    def test_data_changes_move_the_key(self):
+        """Test that any write to the database invalidates keys built from its changelog"""
+        db = TimeTrackerDB(os.path.join(self.temp_dir.name, "tracker.db"))
+        self.assertEqual(cache_dir(db.db_path), os.path.join(self.temp_dir.name, "tracker.reports"))
+        project_id = db.add_project("Project A")
+        before = RenderCache.key("pdf", db.get_changelog_seq())
+        self.assertEqual(before, RenderCache.key("pdf", db.get_changelog_seq()))
+        db.update_project(project_id, rate=10.0)
+        self.assertNotEqual(before, RenderCache.key("pdf", db.get_changelog_seq()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+"""
+Unit tests for the shared report model
+"""
+import unittest
+import tempfile
+import os
+import sys
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timetracking.report import ReportModel, ReportRow, SummaryReport, as_report
+from timetracking.email_export import EmailExporter
+from timetracking.pdf_export import PDFExporter
+from timetracking.entries_view import format_entry_row
+from timetracking.database import TimeTrackerDB
+
+
+class TestReportModel(unittest.TestCase):
+    """Test cases for ReportRow and ReportModel"""
+
+    def setUp(self):
+        """Set up sample entries (id, project_id, project_name, description, start_time, end_time, duration, rate, currency)"""
+        self.entries = [
+            (1, 1, "Project A", "Task 1", "2024-01-01T09:00:00", "2024-01-01T10:30:45", 90, 25.0, "EUR"),
+            (2, 2, "Project B", "Task 2", "2024-01-01T11:00:00", "2024-01-01T12:00:00", 60, 30.0, "USD"),
+            (3, 3, "Project C", None, "2024-01-01T13:00:00", "2024-01-01T13:10:00", 10, None, "EUR"),
+            (4, 1, "Project A", "Running", "2024-01-01T14:00:00", None, None, 25.0, "EUR"),
+        ]
+
+    def test_rows_are_formatted(self):
+        """Test the display values of each row"""
+        report = ReportModel(self.entries)
+        self.assertEqual(report.rows[0].values,
+                         ("2024-01-01", "Project A", "Task 1", "09:00", "10:30", "1h 30m 45s"))
+        self.assertEqual(report.rows[2].description, "")
+        self.assertEqual((report.rows[3].end, report.rows[3].duration), ("Running", "Running"))
+        self.assertEqual([format_entry_row(entry) for entry in self.entries],
+                         [row.values for row in report.rows])
+
+    def test_amounts_are_billed_by_the_second(self):
+        """Test that amounts use the exact length, not the stored minutes"""
+        row = ReportRow(self.entries[0])
+        self.assertEqual(row.seconds, 5445)
+        self.assertAlmostEqual(row.amount, 5445 * 25.0 / 3600)
+        self.assertEqual(row.rate_text, "€25.00/h")
+        self.assertEqual(row.amount_text, "€37.81")
+
+    def test_rows_without_rate_or_end(self):
+        """Test the N/A and zero amounts"""
+        report = ReportModel(self.entries)
+        self.assertEqual((report.rows[2].rate_text, report.rows[2].amount_text), ("N/A", "N/A"))
+        self.assertEqual((report.rows[3].rate_text, report.rows[3].amount_text), ("€25.00/h", "€0.00"))
+        stored = ReportRow((5, 1, "Project A", "Imported", "2024-01-01T09:00:00", None, 75, 60.0, "EUR"))
+        self.assertEqual((stored.seconds, stored.duration, stored.amount_text), (4500, "1h 15m", "€75.00"))
+
+    def test_totals_per_currency(self):
+        """Test that totals are kept apart per currency and running entries are left out"""
+        report = ReportModel(self.entries)
+        self.assertTrue(report.has_rates)
+        self.assertEqual(report.total_seconds, 5445 + 3600 + 600)
+        self.assertEqual(report.total_time, "2 hours and 40 minutes")
+        self.assertEqual(report.amount_totals, ["€37.81", "$30.00"])
+        self.assertFalse(ReportModel(self.entries[2:3]).has_rates)
+        self.assertEqual(ReportModel([]).total_time, "0 minutes")
+
+    def test_from_query(self):
+        """Test building a report from the database filters"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db = TimeTrackerDB(os.path.join(temp_dir, "report.db"))
+            project_id = db.add_project("Project A", rate=40.0, currency="EUR")
+            entry_id = db.start_timer(project_id, "Task")
+            db.stop_timer(project_id)
+            db.update_entry(entry_id, start_time="2024-01-01T09:00:00", end_time="2024-01-01T09:30:00")
+            report = ReportModel.from_query(db, project_id)
+        self.assertEqual(len(report), 1)
+        self.assertEqual(report.amount_totals, ["€20.00"])
+
+    def test_renderers_share_one_model(self):
+        """Test that the PDF and email render a model without building rows again"""
+        report = as_report(self.entries)
+        self.assertIs(as_report(report), report)
+        with patch("timetracking.report.ReportRow", side_effect=AssertionError("rows built twice")):
+            body = EmailExporter()._create_email_body(report, "Project A")
+            with tempfile.TemporaryDirectory() as temp_dir:
+                PDFExporter().export_time_report(report, os.path.join(temp_dir, "report.pdf"))
+        self.assertIn("€37.81", body)
+        self.assertIn("Total Amount: $30.00", body)
+        self.assertIn("Total Time: 2 hours and 40 minutes", body)
+
+
+class TestSummaryReport(unittest.TestCase):
+    """Test cases for SummaryReport"""
+
+    def setUp(self):
+        """Entries in two currencies over two weeks"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.db = TimeTrackerDB(os.path.join(self.temp_dir.name, "summary.db"))
+        euro = self.db.add_project("Project A", rate=40.0, currency="EUR")
+        dollar = self.db.add_project("Project B", rate=30.0, currency="USD")
+        unbilled = self.db.add_project("Project C")
+        for project_id, day, hours in ((euro, "2024-01-01", 1), (euro, "2024-01-09", 2),
+                                       (dollar, "2024-01-02", 3), (unbilled, "2024-01-03", 1)):
+            entry_id = self.db.start_timer(project_id, "Task")
+            self.db.stop_timer(project_id)
+            self.db.update_entry(entry_id, start_time=f"{day}T09:00:00", end_time=f"{day}T{9 + hours:02d}:00:00")
+
+    def test_totals_match_the_detail_report(self):
+        """Test that the aggregate totals equal those of the entries"""
+        detail = ReportModel.from_query(self.db)
+        with patch.object(self.db, "get_time_entries", side_effect=AssertionError("entries loaded")):
+            summary = SummaryReport.from_query(self.db, "project")
+        self.assertEqual((len(summary), summary.total_seconds), (len(detail), detail.total_seconds))
+        self.assertEqual(summary.amount_totals, ["€120.00", "$90.00"])
+        self.assertEqual([(row.label, row.hours_text, row.amount_text) for row in summary.rows],
+                         [("Project A", "3.00", "€120.00"), ("Project B", "3.00", "$90.00"),
+                          ("Project C", "1.00", "N/A")])
+
+    def test_week_and_month_labels(self):
+        """Test the group labels and that currencies stay apart within a group"""
+        weeks = SummaryReport.from_query(self.db, "week")
+        self.assertEqual(weeks.label, "Week")
+        self.assertEqual(sorted((row.label, row.currency) for row in weeks.rows),
+                         [("Week of 2024-01-01", "EUR"), ("Week of 2024-01-01", "USD"),
+                          ("Week of 2024-01-08", "EUR")])
+        months = SummaryReport.from_query(self.db, "month", None, None, None)
+        self.assertEqual({row.label for row in months.rows}, {"January 2024"})
+        self.assertEqual(months.total_hours, 7.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,216 @@
+"""
+Unit tests for the local HTTP/JSON tracking service
+"""
+import unittest
+import tempfile
+import os
+import sys
+import json
+import asyncio
+import threading
+import http.client
+import socket
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timetracking.database import TimeTrackerDB
+from timetracking.server import TrackingServer, MAX_BODY_BYTES, load_or_create_token
+
+
+class TestTrackingServer(unittest.TestCase):
+    """Test cases for TrackingServer"""
+
+    def setUp(self):
+        """Start a server on a free port in a background event loop"""
+        self.temp_db = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
+        self.temp_db.close()
+        self.db = TimeTrackerDB(self.temp_db.name)
+        self.project_id = self.db.add_project("Served Project", rate=60.0)
+
+        self.loop = asyncio.new_event_loop()
+        self.server = TrackingServer(self.temp_db.name, port=0, token="test-token",
+                                     allowed_origins=["chrome-extension://tracker"])
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_until_complete(self.server.start())
+            ready.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        ready.wait(5)
+        self.conn = http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=5)
+
+    def tearDown(self):
+        """Stop the server and clean up test database"""
+        self.conn.close()
+        asyncio.run_coroutine_threadsafe(self.server.close(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+        self.loop.close()
+        self.db.changes.close()
+        os.unlink(self.temp_db.name)
+
+    def request(self, method, path, body=None, **headers):
+        payload = json.dumps(body) if body is not None else None
+        headers = {"Content-Type": "application/json", "Authorization": "Bearer test-token",
+                   **{name.replace("_", "-"): value for name, value in headers.items()}}
+        self.conn.request(method, path, body=payload, headers=headers)
+        response = self.conn.getresponse()
+        data = response.read()
+        if response.getheader("Content-Type") == "application/json":
+            data = json.loads(data)
+        return response.status, data
+
+    def test_timer_lifecycle_over_keep_alive(self):
+        """Test starting and stopping a timer on one connection"""
+        status, body = self.request("POST", "/timers/start", {"project_id": self.project_id, "description": "API task"})
+        self.assertEqual(status, 201)
+        entry_id = body["entry_id"]
+
+        status, timers = self.request("GET", "/timers")
+        self.assertEqual(status, 200)
+        self.assertEqual([t["entry_id"] for t in timers], [entry_id])
+        self.assertEqual(timers[0]["project"], "Served Project")
+
+        status, body = self.request("POST", "/timers/stop", {"project_id": self.project_id})
+        self.assertEqual(status, 201)
+        self.assertEqual(body["duration_minutes"], 0)
+        self.assertIsNotNone(self.db.get_entry(entry_id)[5])
+
+    def test_start_timer_unknown_project(self):
+        """Test starting a timer for a missing project returns 404"""
+        status, body = self.request("POST", "/timers/start", {"project_id": 9999})
+        self.assertEqual(status, 404)
+        self.assertIn("error", body)
+
+    def test_project_cache_sees_external_writes(self):
+        """Test projects added by another process are listed"""
+        status, projects = self.request("GET", "/projects")
+        self.assertEqual([p["name"] for p in projects], ["Served Project"])
+
+        self.db.add_project("Added Elsewhere")
+        status, projects = self.request("GET", "/projects")
+        self.assertEqual(sorted(p["name"] for p in projects), ["Added Elsewhere", "Served Project"])
+
+        status, body = self.request("POST", "/projects", {"name": "Added Here"})
+        self.assertEqual(status, 201)
+        status, projects = self.request("GET", "/projects")
+        self.assertEqual(len(projects), 3)
+
+    def test_entry_update_and_delete(self):
+        """Test editing and deleting entries"""
+        entry_id = self.db.start_timer(self.project_id, "Edit me")
+        self.db.stop_timer(self.project_id)
+
+        status, entry = self.request("PATCH", f"/entries/{entry_id}", {
+            "start_time": "2024-01-01T09:00:00", "end_time": "2024-01-01T10:30:00"
+        })
+        self.assertEqual(status, 200)
+        self.assertEqual(entry["duration_minutes"], 90)
+
+        status, entries = self.request("GET", "/entries?start=2024-01-01&end=2024-01-01")
+        self.assertEqual([e["id"] for e in entries], [entry_id])
+
+        status, body = self.request("DELETE", f"/entries/{entry_id}")
+        self.assertEqual(status, 200)
+        status, body = self.request("GET", f"/entries/{entry_id}")
+        self.assertEqual(status, 404)
+
+    def test_aggregates(self):
+        """Test aggregates bill by seconds per group"""
+        entry_id = self.db.start_timer(self.project_id)
+        self.db.stop_timer(self.project_id)
+        self.db.update_entry(entry_id, start_time="2024-01-01T09:00:00", end_time="2024-01-01T09:30:00")
+
+        status, groups = self.request("GET", "/aggregates?group=day")
+        self.assertEqual(status, 200)
+        self.assertEqual(groups[0]["key"], "2024-01-01")
+        self.assertEqual(groups[0]["seconds"], 1800)
+        self.assertAlmostEqual(groups[0]["amount"], 30.0)
+
+        status, body = self.request("GET", "/aggregates?group=year")
+        self.assertEqual(status, 400)
+
+    def test_exports(self):
+        """Test CSV and PDF exports"""
+        self.db.start_timer(self.project_id, "Exported")
+        self.db.stop_timer(self.project_id)
+
+        status, body = self.request("GET", "/exports/csv")
+        self.assertEqual(status, 200)
+        self.assertIn(b"Exported", body)
+
+        status, body = self.request("GET", f"/exports/pdf?project_id={self.project_id}")
+        self.assertEqual(status, 200)
+        self.assertTrue(body.startswith(b"%PDF"))
+
+    def test_errors(self):
+        """Test bad input, unknown routes and methods"""
+        self.assertEqual(self.request("GET", "/entries?start=yesterday")[0], 400)
+        self.assertEqual(self.request("GET", "/nowhere")[0], 404)
+        self.assertEqual(self.request("DELETE", "/projects")[0], 405)
+
+        self.conn.request("POST", "/projects", body="{not json",
+                          headers={"Content-Type": "application/json", "Authorization": "Bearer test-token"})
+        response = self.conn.getresponse()
+        response.read()
+        self.assertEqual(response.status, 400)
+
+    def test_body_limit(self):
+        """Test oversized bodies are rejected without being read"""
+        self.conn.putrequest("POST", "/projects")
+        self.conn.putheader("Content-Length", str(MAX_BODY_BYTES + 1))
+        self.conn.endheaders()
+        response = self.conn.getresponse()
+        response.read()
+        self.assertEqual(response.status, 413)
+
+    def test_requests_from_web_pages_are_refused(self):
+        """Test token, Host, Origin and Content-Type checks"""
+        self.assertEqual(self.request("GET", "/projects", Authorization="")[0], 401)
+        self.assertEqual(self.request("GET", "/projects", Authorization="Bearer wrong")[0], 401)
+        # DNS rebinding: the browser sends the attacker's host name
+        self.assertEqual(self.request("GET", "/entries", Host="evil.example:8765")[0], 403)
+        self.assertEqual(self.request("GET", "/projects", Origin="https://evil.example")[0], 403)
+        self.assertEqual(self.request("GET", "/projects", Origin="chrome-extension://tracker")[0], 200)
+        # A cross-site form or fetch can only send "simple" content types without a preflight
+        status, body = self.request("POST", "/projects", {"name": "Forged"}, Content_Type="text/plain")
+        self.assertEqual(status, 415)
+        self.assertEqual([p["name"] for p in self.request("GET", "/projects")[1]], ["Served Project"])
+
+    def test_invalid_content_length(self):
+        """Test malformed Content-Length headers get a 400"""
+        for length in ("abc", "-5"):
+            with socket.create_connection(("127.0.0.1", self.server.port), timeout=5) as sock:
+                sock.sendall(f"POST /projects HTTP/1.1\r\nHost: localhost\r\n"
+                             f"Content-Length: {length}\r\n\r\n".encode())
+                self.assertTrue(sock.recv(1024).startswith(b"HTTP/1.1 400 "))
+
+    def test_metrics(self):
+        """Test request counts and latency percentiles are reported"""
+        for _ in range(3):
+            self.request("GET", "/projects")
+        status, metrics = self.request("GET", "/metrics")
+        self.assertEqual(status, 200)
+        self.assertEqual(metrics["requests"], 3)
+        route = metrics["routes"]["GET /projects"]
+        self.assertEqual(route["count"], 3)
+        self.assertLessEqual(route["p50_ms"], route["p99_ms"])
+
+
+class TestServiceToken(unittest.TestCase):
+    """Test cases for the per-install service token"""
+
+    def test_token_is_created_once_and_private(self):
+        """Test the token file is user-only and reused"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "token")
+            token = load_or_create_token(path)
+            self.assertGreaterEqual(len(token), 32)
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+            self.assertEqual(load_or_create_token(path), token)
+
+if __name__ == '__main__':
+    unittest.main()
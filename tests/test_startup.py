@@ -0,0 +1,74 @@
+"""
+Startup budget tests: the GUI module must not load heavy dependencies at import
+"""
+import unittest
+import os
+import re
+import sys
+import subprocess
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative `-X importtime` budget for timetracking.gui. It is about 60 ms with
+# deferred imports and was over 350 ms when reportlab, requests and
+# cryptography loaded eagerly; benchmarks/bench_startup.py shows the breakdown.
+IMPORT_BUDGET_MS = 200
+
+DEFERRED_MODULES = ("reportlab", "requests", "cryptography", "subprocess", "smtplib")
+
+
+class TestStartupBudget(unittest.TestCase):
+    """Test cases for deferred imports"""
+
+    def run_python(self, code, *flags):
+        with tempfile.TemporaryDirectory() as home:
+            env = dict(os.environ, HOME=home)
+            result = subprocess.run([sys.executable] + list(flags) + ["-c", code], cwd=PACKAGE_ROOT,
+                                    env=env, capture_output=True, text=True, timeout=120)
+            files = os.listdir(home)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result, files
+
+    def test_gui_import_defers_heavy_modules(self):
+        """Test importing the GUI loads none of the deferred modules"""
+        code = (
+            "import sys\n"
+            "import timetracking.gui\n"
+            f"print([name for name in {DEFERRED_MODULES!r} if name in sys.modules])\n"
+        )
+        result, _ = self.run_python(code)
+        self.assertEqual(result.stdout.strip(), "[]")
+
+    def test_gui_import_time_budget(self):
+        """Test the cumulative import time of the GUI stays within budget"""
+        # Warm run first so bytecode compilation is not counted
+        self.run_python("import timetracking.gui")
+        result, _ = self.run_python("import timetracking.gui", "-X", "importtime")
+        match = re.search(r"import time:\s+\d+ \|\s+(\d+) \| timetracking\.gui$", result.stderr, re.M)
+        self.assertIsNotNone(match, result.stderr[-500:])
+        self.assertLess(int(match.group(1)) / 1000, IMPORT_BUDGET_MS)
+
+    def test_email_import_does_not_touch_key_file(self):
+        """Test the encryption key is only created when a password is used"""
+        code = (
+            "import sys\n"
+            "from timetracking.email_export import EmailExporter\n"
+            "EmailExporter()\n"
+            "print('cryptography' in sys.modules)\n"
+        )
+        result, files = self.run_python(code)
+        self.assertEqual(result.stdout.strip(), "False")
+        self.assertNotIn("email_key.key", files)
+
+        result, files = self.run_python(
+            "from timetracking.password_utils import password_encryption\n"
+            "print(password_encryption.decrypt_password(password_encryption.encrypt_password('x')))\n"
+        )
+        self.assertEqual(result.stdout.strip(), "x")
+        self.assertIn("email_key.key", files)
+
+
+if __name__ == '__main__':
+    unittest.main()
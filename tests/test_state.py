@@ -0,0 +1,119 @@
+"""
+Unit tests for the prompt state file
+"""
+import unittest
+import tempfile
+import os
+import sys
+import time
+import datetime
+import subprocess
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timetracking.database import TimeTrackerDB
+from timetracking.state import state_path, read_state, write_state, format_prompt, STATE_VERSION
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestStateFile(unittest.TestCase):
+    """Test cases for the state file maintained by TimeTrackerDB"""
+
+    def setUp(self):
+        """Set up test database"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "tracker.db")
+        self.db = TimeTrackerDB(self.db_path)
+        self.project_id = self.db.add_project("Prompt Project")
+        self.path = state_path(self.db_path)
+
+    def tearDown(self):
+        """Clean up test files"""
+        self.temp_dir.cleanup()
+
+    def test_state_path(self):
+        """Test the state file sits next to the database"""
+        self.assertEqual(self.path, os.path.join(self.temp_dir.name, "tracker.state.json"))
+
+    def test_start_and_stop_update_state(self):
+        """Test timer operations rewrite the state file"""
+        entry_id = self.db.start_timer(self.project_id, "Writing")
+        state = read_state(self.path)
+        self.assertEqual(len(state["running"]), 1)
+        timer = state["running"][0]
+        self.assertEqual(timer["entry_id"], entry_id)
+        self.assertEqual(timer["project"], "Prompt Project")
+        self.assertEqual(timer["description"], "Writing")
+        self.assertAlmostEqual(timer["started"], time.time(), delta=5)
+
+        self.db.stop_timer(self.project_id)
+        state = read_state(self.path)
+        self.assertEqual(state["running"], [])
+        self.assertEqual(state["day"], datetime.date.today().isoformat())
+        self.assertEqual(os.listdir(self.temp_dir.name).count("tracker.state.json"), 1)
+        self.assertFalse([name for name in os.listdir(self.temp_dir.name) if name.endswith(".tmp")])
+
+    def test_today_total_follows_edits(self):
+        """Test closed time today is tracked through edits and deletes"""
+        entry_id = self.db.start_timer(self.project_id)
+        self.db.stop_timer(self.project_id)
+        today = datetime.date.today().isoformat()
+        self.db.update_entry(entry_id, start_time=f"{today}T08:00:00", end_time=f"{today}T08:45:00")
+        self.assertEqual(read_state(self.path)["today_seconds"], 2700)
+
+        self.db.delete_entry(entry_id)
+        self.assertEqual(read_state(self.path)["today_seconds"], 0)
+
+    def test_project_rename_updates_state(self):
+        """Test renaming a project is reflected in running timers"""
+        self.db.start_timer(self.project_id)
+        self.db.update_project(self.project_id, name="Renamed")
+        self.assertEqual(read_state(self.path)["running"][0]["project"], "Renamed")
+
+    def test_missing_or_corrupt_file(self):
+        """Test unreadable state files render as idle"""
+        self.assertIsNone(read_state(os.path.join(self.temp_dir.name, "missing.json")))
+        with open(self.path, "w") as f:
+            f.write("{truncated")
+        self.assertIsNone(read_state(self.path))
+        self.assertEqual(format_prompt(read_state(self.path), idle="-"), "-")
+
+    def test_format_prompt(self):
+        """Test prompt formatting of elapsed and today's time"""
+        now = datetime.datetime.combine(datetime.date.today(), datetime.time(12, 0)).timestamp()
+        state = {
+            "version": STATE_VERSION,
+            "day": datetime.date.today().isoformat(),
+            "today_seconds": 600,
+            "running": [{"project": "X", "description": "Calls", "started": now - 83}],
+        }
+        self.assertEqual(format_prompt(state, now=now), "X 0:01:23")
+        self.assertEqual(format_prompt(state, "{project}: {description} {today}", now=now), "X: Calls 0:11:23")
+
+        state["day"] = "2000-01-01"
+        self.assertEqual(format_prompt(state, "{today}", now=now), "0:01:23")
+
+    def test_write_state_replaces_file(self):
+        """Test write_state replaces the previous content"""
+        write_state(self.path, {"version": STATE_VERSION, "running": []})
+        write_state(self.path, {"version": STATE_VERSION, "running": [], "today_seconds": 5})
+        self.assertEqual(read_state(self.path)["today_seconds"], 5)
+
+    def test_prompt_command_does_not_open_database(self):
+        """Test the prompt command reads only the state file"""
+        self.db.start_timer(self.project_id)
+        code = (
+            "import sys\n"
+            "from timetracking.cli import main\n"
+            f"main(['--db', {self.db_path!r}, 'prompt'])\n"
+            "print('sqlite3' in sys.modules)\n"
+        )
+        result = subprocess.run([sys.executable, "-c", code], cwd=PACKAGE_ROOT,
+                                capture_output=True, text=True, timeout=60)
+        lines = result.stdout.strip().splitlines()
+        self.assertTrue(lines[0].startswith("Prompt Project 0:00:"), result.stderr)
+        self.assertEqual(lines[-1], "False")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,198 @@
+"""
+Unit tests for changelog-based sync between database files
+"""
+import unittest
+import tempfile
+import os
+import sqlite3
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timetracking.database import TimeTrackerDB
+from timetracking.sync import export_changeset, import_changeset, get_origin
+
+
+class TestSync(unittest.TestCase):
+    """Test cases for changeset export and import"""
+
+    def setUp(self):
+        """Create a laptop and a desktop database"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.laptop = TimeTrackerDB(os.path.join(self.temp_dir.name, "laptop.db"))
+        self.desktop = TimeTrackerDB(os.path.join(self.temp_dir.name, "desktop.db"))
+        self.changeset = os.path.join(self.temp_dir.name, "changes.tcs")
+
+    def tearDown(self):
+        """Clean up test databases"""
+        self.temp_dir.cleanup()
+
+    def sync(self, source, target):
+        export_changeset(source, self.changeset, exclude_origin=get_origin(target))
+        return import_changeset(target, self.changeset)
+
+    def test_changelog_records_writes(self):
+        """Test triggers log inserts, updates and deletes once per row"""
+        project_id = self.laptop.add_project("Client")
+        entry_id = self.laptop.start_timer(project_id, "Work")
+        self.laptop.stop_timer(project_id)
+        self.laptop.update_entry(entry_id, description="Edited")
+
+        changes = self.laptop.get_changes_since(0)
+        self.assertEqual([(c[1], c[2], c[3]) for c in changes],
+                         [("projects", project_id, "I"), ("time_entries", entry_id, "U")])
+
+        self.laptop.delete_entry(entry_id)
+        self.assertEqual(self.laptop.get_changes_since(changes[-1][0])[0][1:], ("time_entries", entry_id, "D"))
+
+    def test_existing_rows_are_logged_on_migration(self):
+        """Test rows created before the changelog existed get logged"""
+        path = os.path.join(self.temp_dir.name, "legacy.db")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE projects (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL UNIQUE, description TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+        conn.execute("INSERT INTO projects (name) VALUES ('Legacy')")
+        conn.commit()
+        conn.close()
+
+        legacy = TimeTrackerDB(path)
+        self.assertEqual(len(legacy.get_changes_since(0)), 1)
+        self.sync(legacy, self.desktop)
+        self.assertEqual([p[1] for p in self.desktop.get_projects()], ["Legacy"])
+
+    def test_reopening_does_not_write(self):
+        """Test opening a migrated file works while another connection is writing"""
+        origin = get_origin(self.laptop)
+        writer = sqlite3.connect(self.laptop.db_path, timeout=0)
+        writer.execute("BEGIN IMMEDIATE")
+        try:
+            reopened = TimeTrackerDB(self.laptop.db_path)
+        finally:
+            writer.rollback()
+            writer.close()
+        self.assertEqual(get_origin(reopened), origin)
+
+    def test_sync_copies_projects_entries_and_emails(self):
+        """Test a changeset recreates rows with remapped foreign keys"""
+        self.desktop.add_project("Desktop Only")
+        project_id = self.laptop.add_project("Client", "Desc", "", 50.0, "USD")
+        self.laptop.add_project_email(project_id, "client@example.com", is_primary=True)
+        self.laptop.start_timer(project_id, "Laptop work")
+        self.laptop.stop_timer(project_id)
+
+        result = self.sync(self.laptop, self.desktop)
+        self.assertEqual(result["applied"], 3)
+
+        projects = {p[1]: p for p in self.desktop.get_projects()}
+        client = projects["Client"]
+        self.assertEqual(client[4:], (50.0, "USD"))
+        self.assertEqual(self.desktop.get_project_emails(client[0])[0][1:], ("client@example.com", 1))
+        entries = self.desktop.get_time_entries(client[0])
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0][3], "Laptop work")
+
+    def test_watermark_limits_changeset_to_new_changes(self):
+        """Test a second export only carries changes made since the first"""
+        project_id = self.laptop.add_project("Client")
+        for i in range(20):
+            self.laptop.start_timer(project_id, f"Task {i}")
+            self.laptop.stop_timer(project_id)
+        self.sync(self.laptop, self.desktop)
+
+        self.laptop.start_timer(project_id, "Tomorrow")
+        self.laptop.stop_timer(project_id)
+        result = self.sync(self.laptop, self.desktop)
+        self.assertEqual(result, {"applied": 1, "skipped": 0, "conflicts": 0})
+        self.assertEqual(len(self.desktop.get_time_entries()), 21)
+
+    def test_import_is_idempotent(self):
+        """Test importing the same changeset twice changes nothing"""
+        project_id = self.laptop.add_project("Client")
+        self.laptop.start_timer(project_id, "Work")
+        export_changeset(self.laptop, self.changeset)
+        import_changeset(self.desktop, self.changeset)
+
+        result = import_changeset(self.desktop, self.changeset)
+        self.assertEqual(result["applied"], 0)
+        self.assertEqual(result["skipped"], 2)
+        self.assertEqual(len(self.desktop.get_time_entries()), 1)
+
+    def test_imported_changes_are_not_relogged(self):
+        """Test applied remote changes do not bump the local clock per row"""
+        self.laptop.add_project("Client")
+        self.sync(self.laptop, self.desktop)
+        self.assertEqual(len(self.desktop.get_changes_since(0)), 1)
+
+        # Sending the desktop state back must not echo anything new into the laptop
+        result = self.sync(self.desktop, self.laptop)
+        self.assertEqual(result["applied"], 0)
+
+    def test_deletes_propagate(self):
+        """Test deleted rows are removed on the other side"""
+        project_id = self.laptop.add_project("Client")
+        entry_id = self.laptop.start_timer(project_id, "Mistake")
+        self.sync(self.laptop, self.desktop)
+
+        self.laptop.delete_entry(entry_id)
+        self.sync(self.laptop, self.desktop)
+        self.assertEqual(self.desktop.get_time_entries(), [])
+
+    def test_concurrent_edits_resolve_the_same_way_on_both_sides(self):
+        """Test conflicting edits converge to the same winner"""
+        project_id = self.laptop.add_project("Client")
+        entry_id = self.laptop.start_timer(project_id, "Original")
+        self.laptop.stop_timer(project_id)
+        self.sync(self.laptop, self.desktop)
+        desktop_entry_id = self.desktop.get_time_entries()[0][0]
+
+        self.laptop.update_entry(entry_id, description="Laptop edit")
+        self.desktop.update_entry(desktop_entry_id, description="Desktop edit")
+        self.desktop.update_entry(desktop_entry_id, description="Desktop edit again")
+
+        laptop_changes = os.path.join(self.temp_dir.name, "laptop.tcs")
+        desktop_changes = os.path.join(self.temp_dir.name, "desktop.tcs")
+        export_changeset(self.laptop, laptop_changes)
+        export_changeset(self.desktop, desktop_changes)
+        import_changeset(self.desktop, laptop_changes)
+        import_changeset(self.laptop, desktop_changes)
+
+        # The desktop made more edits, so its Lamport clock is higher
+        self.assertEqual(self.laptop.get_entry(entry_id)[3], "Desktop edit again")
+        self.assertEqual(self.desktop.get_entry(desktop_entry_id)[3], "Desktop edit again")
+
+    def test_project_name_collision_keeps_both_projects(self):
+        """Test same-named projects from both sides converge without losing data"""
+        self.laptop.add_project("Acme")
+        self.desktop.add_project("Acme")
+        laptop_changes = os.path.join(self.temp_dir.name, "laptop.tcs")
+        desktop_changes = os.path.join(self.temp_dir.name, "desktop.tcs")
+        export_changeset(self.laptop, laptop_changes)
+        export_changeset(self.desktop, desktop_changes)
+        import_changeset(self.desktop, laptop_changes)
+        import_changeset(self.laptop, desktop_changes)
+
+        laptop_names = sorted(p[1] for p in self.laptop.get_projects())
+        desktop_names = sorted(p[1] for p in self.desktop.get_projects())
+        self.assertEqual(len(laptop_names), 2)
+        self.assertEqual(laptop_names, desktop_names)
+
+    def test_failed_import_leaves_triggers_enabled(self):
+        """Test a broken changeset rolls back and local logging keeps working"""
+        import gzip
+        import json
+        with gzip.open(self.changeset, "wt", encoding="utf-8") as f:
+            json.dump({
+                "format": "timetracking-changeset", "version": 1, "origin": "x", "since": 0, "until": 1,
+                "columns": {"projects": ["name"], "time_entries": ["no_such_column"]},
+                "changes": [
+                    {"table": "projects", "uid": "a" * 32, "op": "I", "clock": 1, "origin": "x", "row": ["Good"]},
+                    {"table": "time_entries", "uid": "b" * 32, "op": "I", "clock": 2, "origin": "x", "row": [1]},
+                ],
+            }, f)
+        with self.assertRaises(sqlite3.OperationalError):
+            import_changeset(self.desktop, self.changeset)
+
+        self.assertEqual(self.desktop.get_projects(), [])
+        self.desktop.add_project("After failure")
+        self.assertEqual(len(self.desktop.get_changes_since(0)), 1)
+
+if __name__ == '__main__':
+    unittest.main()
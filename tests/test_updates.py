@@ -0,0 +1,133 @@
+"""
+Unit tests for the update checker, using a local stand-in for the package index
+"""
+import unittest
+import tempfile
+import os
+import sys
+import json
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timetracking.updates import UpdateChecker, get_current_version, version_tuple
+
+
+class FakeIndexHandler(BaseHTTPRequestHandler):
+    """Serves {"info": {"version": ...}} like the PyPI JSON API"""
+
+    def do_GET(self):
+        self.server.hits += 1
+        if self.server.version is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = json.dumps({"info": {"version": self.server.version}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestUpdateChecker(unittest.TestCase):
+    """Test cases for UpdateChecker"""
+
+    def setUp(self):
+        """Start the fake index and point the cache at a temp file"""
+        self.server = HTTPServer(("127.0.0.1", 0), FakeIndexHandler)
+        self.server.hits = 0
+        self.server.version = "2.0.0"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.checker = UpdateChecker(
+            index_url=f"http://127.0.0.1:{self.server.server_port}/pypi/{{package}}/json",
+            cache_path=os.path.join(self.temp_dir.name, "update.json"),
+        )
+
+    def tearDown(self):
+        """Stop the fake index"""
+        self.server.shutdown()
+        self.server.server_close()
+        self.temp_dir.cleanup()
+
+    def test_version_tuple(self):
+        """Test version comparison tolerates suffixes"""
+        self.assertLess(version_tuple("1.0.9"), version_tuple("1.0.10"))
+        self.assertEqual(version_tuple("1.2.0rc1"), (1, 2, 0))
+        self.assertEqual(version_tuple("garbage"), ())
+
+    def test_current_version_from_checkout(self):
+        """Test the version falls back to pyproject.toml when not installed"""
+        from importlib import metadata
+        with patch.object(metadata, "version", side_effect=metadata.PackageNotFoundError("timetracking")):
+            version = get_current_version()
+            self.assertIsNone(get_current_version("some-other-package"))
+        with open(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               "pyproject.toml"), encoding="utf-8") as f:
+            self.assertIn(f'version = "{version}"', f.read())
+
+    @patch("timetracking.updates.get_current_version", return_value="1.0.51")
+    def test_check_reports_update(self, mock_version):
+        """Test a newer release on the index is reported"""
+        result = self.checker.check()
+        self.assertEqual(result["latest"], "2.0.0")
+        self.assertTrue(result["update_available"])
+        self.assertFalse(result["cached"])
+
+    @patch("timetracking.updates.get_current_version", return_value="2.0.0")
+    def test_check_uses_cache_within_ttl(self, mock_version):
+        """Test repeated checks are answered from the disk cache"""
+        self.checker.check()
+        self.server.version = "3.0.0"
+
+        result = self.checker.check()
+        self.assertTrue(result["cached"])
+        self.assertEqual(result["latest"], "2.0.0")
+        self.assertFalse(result["update_available"])
+        self.assertEqual(self.server.hits, 1)
+
+        result = self.checker.check(force=True)
+        self.assertEqual(result["latest"], "3.0.0")
+        self.assertEqual(self.server.hits, 2)
+
+    @patch("timetracking.updates.get_current_version", return_value="2.0.0")
+    def test_expired_cache_is_refreshed(self, mock_version):
+        """Test the cache is ignored once the TTL has passed"""
+        self.checker.ttl = 0
+        self.checker.check()
+        self.checker.check()
+        self.assertEqual(self.server.hits, 2)
+
+    def test_index_errors_propagate(self):
+        """Test a failing index raises instead of reporting a version"""
+        self.server.version = None
+        with self.assertRaises(OSError):
+            self.checker.check()
+        self.assertIsNone(self.checker.cached_latest_version())
+
+    @patch("timetracking.updates.get_current_version")
+    def test_upgrade_retries_until_version_visible(self, mock_version):
+        """Test upgrade retries and reports progress"""
+        mock_version.side_effect = ["1.0.0", "2.0.0"]
+        messages = []
+        with patch.object(self.checker, "upgrade_command", return_value=[sys.executable, "-c", "pass"]):
+            version = self.checker.upgrade("2.0.0", progress=messages.append, retry_delay=0)
+        self.assertEqual(version, "2.0.0")
+        self.assertEqual(sum("attempt" in message for message in messages), 2)
+
+    @patch("timetracking.updates.get_current_version", return_value="1.0.0")
+    def test_upgrade_gives_up(self, mock_version):
+        """Test upgrade raises once the wait is exhausted"""
+        with patch.object(self.checker, "upgrade_command", return_value=[sys.executable, "-c", "raise SystemExit(1)"]):
+            with self.assertRaises(RuntimeError):
+                self.checker.upgrade("2.0.0", max_wait=0, retry_delay=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
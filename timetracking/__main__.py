@@ -0,0 +1,4 @@
+"""Allow ``python -m timetracking``"""
+from .main import main
+
+main()
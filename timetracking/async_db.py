@@ -0,0 +1,138 @@
+"""
+Asyncio facade over TimeTrackerDB for services and automation.
+
+Every public ``TimeTrackerDB`` method is available as a coroutine. Calls run
+on bounded thread pools so the event loop never blocks on SQLite: reads go to
+a pool of reader threads, writes are serialized on a single writer thread.
+Each worker thread keeps its own long-lived connection instead of opening one
+per call.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from .database import TimeTrackerDB, WorkerDB
+
+# TimeTrackerDB methods that never write; everything else goes to the writer thread
+READ_METHODS = frozenset({
+    "get_projects",
+    "get_time_entries",
+    "count_time_entries",
+    "get_time_entry_page",
+    "get_time_entries_by_ids",
+    "get_entry_groups",
+    "get_running_timers",
+    "get_running_timer",
+    "get_entry",
+    "get_latest_entry_project",
+    "get_project_emails",
+    "get_changes_since",
+    "get_changelog_seq",
+})
+
+
+class _Call:
+    """Cancellation flag for one call, checked by SQLite while its statement runs"""
+
+    def __init__(self):
+        self.cancelled = False
+
+
+class AsyncTimeTrackerDB:
+    """Coroutine version of TimeTrackerDB.
+
+    Usage::
+
+        async with AsyncTimeTrackerDB(path) as db:
+            project_id = await db.add_project("Client")
+            entries = await db.get_time_entries(project_id)
+
+    Cancelling a call that has not started yet drops it; cancelling a running
+    call aborts its SQLite statement, which rolls back any partial write. At
+    most ``max_pending`` calls are queued or running at any time.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, readers: int = 4,
+                 max_pending: int = 64, wal: bool = False):
+        # Run migrations once, synchronously, before any worker touches the file
+        self.db_path = TimeTrackerDB(db_path).db_path
+        self.max_pending = max_pending
+        self._reader_db = WorkerDB(self.db_path)
+        self._writer_db = WorkerDB(self.db_path)
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="timetracking-read")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="timetracking-write")
+        self._slots = None
+        self._methods = {}
+
+        if wal:
+            # WAL lets readers keep going while the writer commits
+            self._writer.submit(
+                lambda: self._writer_db.current_connection().execute("PRAGMA journal_mode=WAL")
+            ).result()
+
+    def __getattr__(self, name):
+        if name.startswith("_") or not callable(getattr(TimeTrackerDB, name, None)):
+            raise AttributeError(name)
+        method = self._methods.get(name)
+        if method is None:
+            async def method(*args, **kwargs):
+                return await self._call(name, args, kwargs)
+            method.__name__ = name
+            method.__doc__ = getattr(TimeTrackerDB, name).__doc__
+            self._methods[name] = method
+        return method
+
+    async def _call(self, name, args, kwargs):
+        if name in READ_METHODS:
+            executor, db = self._readers, self._reader_db
+        else:
+            executor, db = self._writer, self._writer_db
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+
+        # Bound the number of queued calls so a burst cannot grow memory without limit
+        await self._slots.acquire()
+        loop = asyncio.get_running_loop()
+        call = _Call()
+
+        def run():
+            with db.cancellable(call):
+                return getattr(db, name)(*args, **kwargs)
+
+        try:
+            job = executor.submit(run)
+        except BaseException:
+            self._slots.release()
+            raise
+        # A cancelled caller stops waiting at once, but the slot stays taken until the worker is done
+        job.add_done_callback(lambda _: self._release_slot(loop))
+        try:
+            return await asyncio.wrap_future(job)
+        except asyncio.CancelledError:
+            call.cancelled = True
+            raise
+
+    def _release_slot(self, loop):
+        try:
+            loop.call_soon_threadsafe(self._slots.release)
+        except RuntimeError:
+            # Event loop already closed; nobody is waiting for the slot
+            pass
+
+    async def close(self):
+        """Wait for queued calls to finish and close all connections"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._shutdown)
+
+    def _shutdown(self):
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+        self._writer_db.close()
+        self._reader_db.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
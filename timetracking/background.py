@@ -0,0 +1,301 @@
+"""
+Run slow work off the Tk thread and deliver results back on it.
+
+Tk widgets may only be touched from the thread running ``mainloop``. Worker
+threads therefore never call into the UI: they queue callbacks, and the UI
+thread drains the queue from ``root.after`` while any work is outstanding.
+``TaskExecutor`` adds a worker pool whose tasks can be cancelled and are
+coalesced per key, so a burst of filter changes runs one query, not ten.
+``RefreshScheduler`` debounces the refresh requests themselves, before any
+work is submitted. This module does not import tkinter, so it can be used and tested headless.
+"""
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+
+class UIDispatcher:
+    """Run functions in worker threads and call their callbacks on the UI thread.
+
+    ``root`` is anything with Tk's ``after(ms, callback)``. ``run`` must be
+    called from the UI thread; ``post`` may be called from any thread.
+    """
+
+    POLL_MS = 50
+
+    def __init__(self, root, poll_ms: Optional[int] = None):
+        self.root = root
+        self.poll_ms = poll_ms or self.POLL_MS
+        self._queue = queue.Queue()
+        self._active = 0
+        self._scheduled = False
+
+    def post(self, callback: Callable, *args):
+        """Queue ``callback(*args)`` to run on the UI thread.
+
+        Delivered while work started with ``run`` is outstanding, or by ``drain``.
+        """
+        self._queue.put((callback, args))
+
+    def run(self, func: Callable, *args,
+            on_done: Optional[Callable] = None,
+            on_error: Optional[Callable[[Exception], None]] = None,
+            on_progress: Optional[Callable[[str], None]] = None) -> threading.Thread:
+        """Run ``func(*args)`` in a daemon thread.
+
+        ``on_done(result)`` or ``on_error(exception)`` runs on the UI thread when
+        it finishes. With ``on_progress``, ``func`` also receives a
+        ``progress(message)`` keyword argument whose messages are delivered to
+        ``on_progress`` on the UI thread, in order.
+        """
+        kwargs = {}
+        if on_progress is not None:
+            kwargs["progress"] = lambda message: self.post(on_progress, message)
+
+        def work():
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                self.post(self._finish, on_error, e)
+            else:
+                self.post(self._finish, on_done, result)
+
+        self._active += 1
+        self._schedule()
+        thread = threading.Thread(target=work, daemon=True)
+        thread.start()
+        return thread
+
+    @property
+    def busy(self) -> bool:
+        """Whether any work started with ``run`` has not been delivered yet"""
+        return self._active > 0
+
+    def _finish(self, callback, value):
+        self._active -= 1
+        if callback is not None:
+            callback(value)
+        elif isinstance(value, Exception):
+            print(f"Background task failed: {value}")
+
+    def _schedule(self):
+        if not self._scheduled:
+            self._scheduled = True
+            self.root.after(self.poll_ms, self._pump)
+
+    def _pump(self):
+        self._scheduled = False
+        self.drain()
+        if self._active > 0 or not self._queue.empty():
+            self._schedule()
+
+    def drain(self):
+        """Run every queued callback now; call from the UI thread"""
+        while True:
+            try:
+                callback, args = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                callback(*args)
+            except Exception as e:
+                # A broken callback must not stop delivery of the others
+                print(f"Error in UI callback: {e}")
+
+
+class TaskCancelled(Exception):
+    """Raised by CancelToken.check() inside a task that was superseded"""
+
+
+class CancelToken:
+    """Cancellation flag handed to each task run by TaskExecutor"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._finished = False
+        self._callbacks = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def cancel(self):
+        """Mark the task cancelled and run its cancel callbacks (once)"""
+        with self._lock:
+            if self._cancelled or self._finished:
+                return
+            self._cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+            # Run under the lock: the task cannot finish, and its worker cannot
+            # start the next task, until the callbacks are done with it
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"Error in cancel callback: {e}")
+
+    def on_cancel(self, callback: Callable[[], None]):
+        """Run ``callback`` if the task is cancelled while still running.
+
+        Callbacks must not call back into the token. For SQLite queries use
+        ``WorkerDB.cancellable`` instead, which cannot miss a cancel.
+        """
+        with self._lock:
+            if not self._cancelled:
+                if not self._finished:
+                    self._callbacks.append(callback)
+                return
+        callback()
+
+    def check(self):
+        """Raise TaskCancelled if the task was cancelled"""
+        if self._cancelled:
+            raise TaskCancelled()
+
+    def _finish(self):
+        # After this, cancel() must not fire callbacks that could hit the next task
+        with self._lock:
+            self._finished = True
+            self._callbacks = []
+
+
+class TaskExecutor(UIDispatcher):
+    """Worker pool for UI-triggered work, with cancellation and coalescing.
+
+    Tasks are submitted under a key such as ``"entries"``. Submitting a new
+    task for a key cancels the previous one: if it has not started it never
+    runs, and if it is running its token is cancelled and its result is
+    dropped. Each task function receives its CancelToken as the ``cancel``
+    keyword argument. ``on_busy`` is called on the UI thread with the labels
+    of unfinished tasks whenever that list changes.
+    """
+
+    def __init__(self, root, workers: int = 2, poll_ms: Optional[int] = None,
+                 on_busy: Optional[Callable[[list], None]] = None):
+        super().__init__(root, poll_ms)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="timetracking-ui")
+        self._current = {}
+        self._labels = {}
+        self.on_busy = on_busy
+
+    def submit(self, key: str, func: Callable, *args,
+               on_done: Optional[Callable] = None,
+               on_error: Optional[Callable[[Exception], None]] = None,
+               label: Optional[str] = None) -> CancelToken:
+        """Run ``func(*args, cancel=token)`` on the pool, replacing any task under ``key``"""
+        previous = self._current.get(key)
+        if previous is not None:
+            previous.cancel()
+
+        token = CancelToken()
+        self._current[key] = token
+        self._labels[key] = label
+
+        def work():
+            try:
+                if token.cancelled:
+                    result = None
+                else:
+                    result = func(*args, cancel=token)
+            except Exception as e:
+                self.post(self._complete, key, token, on_error, e)
+            else:
+                self.post(self._complete, key, token, on_done, result)
+            finally:
+                token._finish()
+
+        self._active += 1
+        self._busy_changed()
+        self._schedule()
+        self._pool.submit(work)
+        return token
+
+    def cancel(self, key: str):
+        """Cancel the task running under ``key``, if any"""
+        token = self._current.get(key)
+        if token is not None:
+            token.cancel()
+
+    def running(self, key: str) -> bool:
+        """Whether a task under ``key`` has not been delivered yet"""
+        return key in self._current
+
+    def shutdown(self):
+        """Cancel every task and stop accepting work"""
+        for token in list(self._current.values()):
+            token.cancel()
+        self._pool.shutdown(wait=False)
+
+    def _complete(self, key, token, callback, value):
+        self._active -= 1
+        if self._current.get(key) is token:
+            del self._current[key]
+            del self._labels[key]
+            self._busy_changed()
+        # Superseded tasks are dropped silently, including errors caused by interrupting them
+        if token.cancelled:
+            return
+        if callback is not None:
+            callback(value)
+        elif isinstance(value, Exception):
+            print(f"Background task '{key}' failed: {value}")
+
+    def _busy_changed(self):
+        if self.on_busy is not None:
+            self.on_busy([label for label in self._labels.values() if label])
+
+
+class RefreshScheduler:
+    """Debounce and coalesce UI refreshes before they reach the TaskExecutor.
+
+    ``request(name, callback)`` runs ``callback`` ``delay_ms`` after the last
+    request made under ``name``; requests arriving before it runs replace it,
+    so a burst of filter changes or back-to-back refreshes from a dialog
+    becomes one call. Even with no delay the call waits for ``root.after(0)``,
+    which merges requests made while handling the same event. Must be used
+    from the UI thread.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._jobs = {}
+        self.requested = {}
+        self.ran = {}
+
+    def request(self, name: str, callback: Callable, *args, delay_ms: int = 0,
+                covered_by: Optional[str] = None, supersedes: Optional[str] = None):
+        """Run ``callback(*args)`` once things settle, replacing a pending refresh under ``name``.
+
+        The request is dropped while the broader refresh ``covered_by`` is
+        pending, and a pending narrower refresh ``supersedes`` is dropped.
+        """
+        self.requested[name] = self.requested.get(name, 0) + 1
+        if covered_by is not None and self.pending(covered_by):
+            return
+        if supersedes is not None:
+            self.drop(supersedes)
+        self.drop(name)
+        self._jobs[name] = self.root.after(delay_ms, lambda: self._run(name, callback, args))
+
+    def pending(self, name: str) -> bool:
+        """Whether a refresh under ``name`` is waiting to run"""
+        return name in self._jobs
+
+    def drop(self, name: str):
+        """Forget a pending refresh; it counts as saved"""
+        job = self._jobs.pop(name, None)
+        if job is not None:
+            self.root.after_cancel(job)
+
+    @property
+    def saved(self) -> dict:
+        """Requests that did not need a refresh of their own, per name"""
+        return {name: count - self.ran.get(name, 0) - self.pending(name)
+                for name, count in self.requested.items()}
+
+    def _run(self, name, callback, args):
+        self._jobs.pop(name, None)
+        self.ran[name] = self.ran.get(name, 0) + 1
+        callback(*args)
@@ -0,0 +1,188 @@
+"""
+Batch export of PDF reports, one per project and period.
+
+At month end every client gets a report, and going through the export dialog
+once per project renders them one at a time. A batch is a list of BatchJob
+(project, period) pairs. BatchExporter reads the entries of all of them with
+one query and renders the PDFs in a pool of processes, one per core by
+default, since laying out a PDF is pure Python and a thread pool would
+share one interpreter lock.
+
+Reports are written as ``<output_dir>/<period>/<project>.pdf``, where the
+period is ``YYYY-MM`` for a calendar month. Each is written to a temporary
+file and renamed into place, so a directory never holds half a report. run()
+yields a BatchResult as each report finishes, with its render time, which
+serves as the progress stream; a failed job is reported there and does not
+stop the others.
+"""
+import datetime
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from typing import Iterator, List, Optional, Tuple
+
+
+def month_range(month: str) -> Tuple[datetime.date, datetime.date]:
+    """First and last day of a YYYY-MM month"""
+    year, number = map(int, month.split("-"))
+    first = datetime.date(year, number, 1)
+    last = datetime.date(year + number // 12, number % 12 + 1, 1) - datetime.timedelta(days=1)
+    return first, last
+
+
+def period_label(start_date: Optional[datetime.date], end_date: Optional[datetime.date]) -> str:
+    """Directory name of a period: YYYY-MM for a calendar month, otherwise first_last"""
+    if start_date and end_date and start_date.day == 1 and month_range(start_date.strftime("%Y-%m"))[1] == end_date:
+        return start_date.strftime("%Y-%m")
+    return f"{start_date or 'start'}_{end_date or 'end'}"
+
+
+def file_name(project_name: str, project_id: int) -> str:
+    """PDF file name for a project, safe on every file system"""
+    slug = re.sub(r"[^\w.-]+", "_", project_name).strip("._")
+    return f"{slug or f'project_{project_id}'}.pdf"
+
+
+class BatchJob:
+    """One report: a project over a period"""
+
+    __slots__ = ("project_id", "project_name", "start_date", "end_date")
+
+    def __init__(self, project_id: int, project_name: str,
+                 start_date: Optional[datetime.date] = None, end_date: Optional[datetime.date] = None):
+        self.project_id = project_id
+        self.project_name = project_name
+        self.start_date = start_date
+        self.end_date = end_date
+
+    @property
+    def relative_path(self) -> str:
+        """Where the report goes in the output directory"""
+        return os.path.join(period_label(self.start_date, self.end_date),
+                            file_name(self.project_name, self.project_id))
+
+    def includes(self, entry: Tuple) -> bool:
+        """Whether an entry of the project falls in the period"""
+        day = entry[4][:10]
+        if self.start_date and day < self.start_date.isoformat():
+            return False
+        return not (self.end_date and day > self.end_date.isoformat())
+
+    def __repr__(self):
+        return f"BatchJob({self.project_id}, {self.project_name!r}, {self.start_date}, {self.end_date})"
+
+
+class BatchResult:
+    """Outcome of one job: the file written, or the error, and how long rendering took"""
+
+    __slots__ = ("job", "path", "entries", "seconds", "size", "error")
+
+    def __init__(self, job: BatchJob, path: str, entries: int, seconds: float = 0.0,
+                 size: int = 0, error: Optional[str] = None):
+        self.job = job
+        self.path = path
+        self.entries = entries
+        self.seconds = seconds
+        self.size = size
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def monthly_jobs(db, months: List[str], project_ids: Optional[List[int]] = None) -> List[BatchJob]:
+    """A job per project and YYYY-MM month; without project_ids, every project with entries that month"""
+    names = {project[0]: project[1] for project in db.get_projects()}
+    jobs = []
+    for month in months:
+        first, last = month_range(month)
+        if project_ids is None:
+            ids = [group[0] for group in db.get_entry_groups("project", None, first, last)]
+        else:
+            ids = project_ids
+        for project_id in dict.fromkeys(ids):
+            jobs.append(BatchJob(project_id, names.get(project_id, f"Project {project_id}"), first, last))
+    return jobs
+
+
+# A worker process keeps one exporter per compact flag, so reportlab's styles are built once, not per report
+_exporters = {}
+
+
+def render_job(entries: List[Tuple], path: str, project_name: str,
+               start_date: Optional[datetime.date], end_date: Optional[datetime.date],
+               compact: bool = False) -> Tuple[float, int]:
+    """Render one report to path; returns (seconds, bytes). Runs in a worker process."""
+    started = time.perf_counter()
+    exporter = _exporters.get(compact)
+    if exporter is None:
+        from .pdf_export import PDFExporter
+        exporter = _exporters[compact] = PDFExporter(compact=compact)
+    # Written to a temporary file and renamed into place by the exporter
+    exporter.export_time_report(entries, path, project_name, start_date, end_date)
+    return time.perf_counter() - started, exporter.last_size
+
+
+class BatchExporter:
+    """Render a batch of reports into a directory, in parallel"""
+
+    def __init__(self, db, output_dir: str, workers: Optional[int] = None, compact: bool = False):
+        self.db = db
+        self.output_dir = output_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.compact = compact
+
+    def fetch(self, jobs: List[BatchJob]) -> List[List[Tuple]]:
+        """Entries of every job, read with one query over all their projects and periods"""
+        starts = [job.start_date for job in jobs]
+        ends = [job.end_date for job in jobs]
+        entries = self.db.get_project_time_entries(
+            [job.project_id for job in jobs],
+            None if None in starts else min(starts),
+            None if None in ends else max(ends)
+        )
+        return [[entry for entry in entries[job.project_id] if job.includes(entry)] for job in jobs]
+
+    def run(self, jobs: List[BatchJob]) -> Iterator[BatchResult]:
+        """Render the jobs and yield a BatchResult for each as it finishes"""
+        if not jobs:
+            return
+        tasks = []
+        paths = set()
+        for job, entries in zip(jobs, self.fetch(jobs)):
+            path = os.path.join(self.output_dir, job.relative_path)
+            if path in paths:
+                # Two project names that differ only in punctuation
+                path = f"{os.path.splitext(path)[0]}_{job.project_id}.pdf"
+            paths.add(path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tasks.append((job, entries, path))
+
+        workers = min(self.workers, len(tasks))
+        if workers == 1:
+            for job, entries, path in tasks:
+                yield self._result(job, entries, path, lambda: render_job(
+                    entries, path, job.project_name, job.start_date, job.end_date, self.compact))
+            return
+
+        # Spawned rather than forked: the GUI and the server run threads, which fork does not copy safely
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+            futures = {
+                pool.submit(render_job, entries, path, job.project_name, job.start_date, job.end_date, self.compact):
+                    (job, entries, path)
+                for job, entries, path in tasks
+            }
+            for future in as_completed(futures):
+                job, entries, path = futures[future]
+                yield self._result(job, entries, path, future.result)
+
+    @staticmethod
+    def _result(job, entries, path, render) -> BatchResult:
+        try:
+            seconds, size = render()
+        except Exception as e:
+            return BatchResult(job, path, len(entries), error=str(e))
+        return BatchResult(job, path, len(entries), seconds, size)
@@ -0,0 +1,318 @@
+"""
+Headless command-line interface.
+
+``timetracking <command>`` works directly on TimeTrackerDB and never imports
+tkinter. Modules that are slow to import (reportlab for PDF export, the sync
+and server modules) are only loaded by the commands that use them, so quick
+commands such as ``status`` start as fast as the interpreter does.
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+from typing import List, Optional
+
+COMMANDS = ("start", "stop", "status", "prompt", "list", "report", "export", "batch-export", "import", "serve")
+
+# File extensions that select an export format when --format is not given
+EXPORT_EXTENSIONS = {".pdf": "pdf", ".csv": "csv", ".gz": "changeset", ".changeset": "changeset"}
+
+
+def _format_seconds(seconds: float) -> str:
+    """Format a duration as H:MM:SS"""
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def _parse_date(value: str) -> datetime.date:
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date '{value}', expected YYYY-MM-DD")
+
+
+def _open_db(args):
+    from .database import TimeTrackerDB
+    return TimeTrackerDB(args.db)
+
+
+def _find_project(db, value: str) -> int:
+    """Resolve a project given by ID or (case-insensitive) name"""
+    projects = db.get_projects()
+    for project in projects:
+        if value.isdigit() and project[0] == int(value):
+            return project[0]
+    for project in projects:
+        if project[1].lower() == value.lower():
+            return project[0]
+    raise ValueError(f"Unknown project '{value}'")
+
+
+def _filters(db, args):
+    project_id = _find_project(db, args.project) if args.project else None
+    return project_id, args.start, args.end
+
+
+def cmd_start(args) -> int:
+    db = _open_db(args)
+    project_id = _find_project(db, args.project)
+    entry_id = db.start_timer(project_id, args.description)
+    print(f"Started timer for {args.project} (entry {entry_id})")
+    return 0
+
+
+def cmd_stop(args) -> int:
+    db = _open_db(args)
+    if args.project:
+        project_ids = [_find_project(db, args.project)]
+    else:
+        project_ids = [timer[1] for timer in db.get_running_timers()]
+    if not project_ids:
+        print("No timer is running")
+        return 1
+
+    stopped = False
+    for project_id in project_ids:
+        duration = db.stop_timer(project_id)
+        if duration is not None:
+            stopped = True
+            print(f"Stopped timer for project {project_id} after {duration} minutes")
+    if not stopped:
+        print("No timer is running for this project")
+        return 1
+    return 0
+
+
+def cmd_status(args) -> int:
+    db = _open_db(args)
+    timers = db.get_running_timers()
+    if not timers:
+        print("No timer is running")
+        return 0
+    now = datetime.datetime.now()
+    for entry_id, project_id, name, description, start_time in timers:
+        elapsed = (now - datetime.datetime.fromisoformat(start_time)).total_seconds()
+        line = f"{name}  {_format_seconds(elapsed)}"
+        if description:
+            line += f"  {description}"
+        print(line)
+    return 0
+
+
+def cmd_prompt(args) -> int:
+    # Reads only the state file: no SQLite, safe to run every second from a prompt
+    from .state import DEFAULT_PROMPT_FORMAT, format_prompt, read_state, state_path
+    state = read_state(state_path(args.db))
+    print(format_prompt(state, args.format or DEFAULT_PROMPT_FORMAT, args.idle))
+    return 0
+
+
+def cmd_list(args) -> int:
+    db = _open_db(args)
+    entries = db.get_time_entries(*_filters(db, args))
+    for entry in entries[:args.limit]:
+        entry_id, _, name, description, start_time, end_time, duration = entry[:7]
+        duration = "running" if end_time is None else f"{duration or 0} min"
+        print(f"{entry_id:>6}  {start_time[:16]}  {name:<20}  {duration:>10}  {description or ''}")
+    return 0
+
+
+def cmd_report(args) -> int:
+    db = _open_db(args)
+    groups = db.get_entry_groups(args.group, *_filters(db, args))
+    total_seconds = 0
+    for _, label, currency, count, seconds, amount in groups:
+        total_seconds += seconds
+        line = f"{label:<20}  {count:>5} entries  {_format_seconds(seconds):>10}"
+        if amount is not None:
+            line += f"  {amount:>10.2f} {currency}"
+        print(line)
+    print(f"{'Total':<20}  {'':>13}  {_format_seconds(total_seconds):>10}")
+    return 0
+
+
+def cmd_export(args) -> int:
+    output_format = args.format
+    if output_format is None:
+        # Never guess: a changeset export advances the sync watermark
+        extension = os.path.splitext(args.path)[1].lower()
+        output_format = EXPORT_EXTENSIONS.get(extension)
+        if output_format is None:
+            raise ValueError(f"Cannot tell the export format from '{args.path}'; "
+                             f"use a {', '.join(EXPORT_EXTENSIONS)} file or --format")
+
+    db = _open_db(args)
+    if output_format == "changeset":
+        from .sync import export_changeset
+        watermark = export_changeset(db, args.path, since=args.since)
+        print(f"Exported changes up to {watermark} to {args.path}")
+        return 0
+
+    project_id, start_date, end_date = _filters(db, args)
+    project_name = args.project if project_id else None
+    if args.summary:
+        # Totals from one GROUP BY; the entries themselves are never loaded
+        if output_format != "pdf":
+            raise ValueError("--summary only applies to PDF exports")
+        from .pdf_export import PDFExporter
+        from .report import SummaryReport
+        summary = SummaryReport.from_query(db, args.summary, project_id, start_date, end_date)
+        exporter = PDFExporter(compact=args.compact)
+        exporter.export_time_report(summary, args.path, project_name, start_date, end_date)
+        print(f"Exported totals of {len(summary)} entries per {args.summary} to {args.path} "
+              f"({exporter.last_size / 1024:.0f} KB)")
+        return 0
+
+    entries = db.get_time_entries(project_id, start_date, end_date)
+    if output_format == "csv":
+        import csv
+        with open(args.path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "project_id", "project", "description", "start_time",
+                             "end_time", "duration_minutes", "rate", "currency"])
+            writer.writerows(entries)
+    else:
+        from .pdf_export import PDFExporter
+        PDFExporter(compact=args.compact).export_time_report(entries, args.path, project_name, start_date, end_date)
+    print(f"Exported {len(entries)} entries to {args.path} ({os.path.getsize(args.path) / 1024:.0f} KB)")
+    return 0
+
+
+def cmd_batch_export(args) -> int:
+    from .batch_export import BatchExporter, BatchJob, monthly_jobs
+    db = _open_db(args)
+    project_ids = [_find_project(db, project) for project in args.project] if args.project else None
+    if args.month:
+        jobs = monthly_jobs(db, args.month, project_ids)
+    else:
+        if project_ids is None:
+            project_ids = [group[0] for group in db.get_entry_groups("project", None, args.start, args.end)]
+        names = {project[0]: project[1] for project in db.get_projects()}
+        jobs = [BatchJob(project_id, names[project_id], args.start, args.end) for project_id in project_ids]
+    if not jobs:
+        print("No time entries found to export")
+        return 1
+
+    started = time.perf_counter()
+    failed = 0
+    results = []
+    for done, result in enumerate(BatchExporter(db, args.output_dir, args.jobs, args.compact).run(jobs), 1):
+        results.append(result)
+        line = f"[{done}/{len(jobs)}] {result.path}"
+        if result.ok:
+            print(f"{line}  {result.entries} entries  {result.seconds:.2f}s  {result.size / 1024:.0f} KB")
+        else:
+            failed += 1
+            print(f"{line}  failed: {result.error}", file=sys.stderr)
+    total_size = sum(result.size for result in results)
+    print(f"Exported {len(jobs) - failed} of {len(jobs)} reports ({total_size / 1024:.0f} KB) "
+          f"in {time.perf_counter() - started:.1f}s")
+    return 1 if failed else 0
+
+
+def cmd_import(args) -> int:
+    from .sync import import_changeset
+    result = import_changeset(_open_db(args), args.path)
+    print(f"Applied {result['applied']} changes, skipped {result['skipped']}, "
+          f"{result['conflicts']} conflicts kept the local version")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="timetracking", description="Time Tracker command-line interface")
+    parser.add_argument("--db", default=None, help="database file (default: ~/time_tracker.db)")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+
+    start = commands.add_parser("start", help="start a timer")
+    start.add_argument("project", help="project ID or name")
+    start.add_argument("-d", "--description", default="")
+    start.set_defaults(func=cmd_start)
+
+    stop = commands.add_parser("stop", help="stop a timer (all running timers by default)")
+    stop.add_argument("project", nargs="?", help="project ID or name")
+    stop.set_defaults(func=cmd_stop)
+
+    status = commands.add_parser("status", help="show running timers")
+    status.set_defaults(func=cmd_status)
+
+    prompt = commands.add_parser("prompt", help="one-line timer status for shell prompts and status bars")
+    prompt.add_argument("-f", "--format", help="fields: {project}, {description}, {elapsed}, {today} "
+                                               "(default: \"{project} {elapsed}\")")
+    prompt.add_argument("--idle", default="", help="text shown when no timer is running")
+    prompt.set_defaults(func=cmd_prompt)
+
+    def add_filters(command):
+        command.add_argument("-p", "--project", help="project ID or name")
+        command.add_argument("--from", dest="start", type=_parse_date, help="first day (YYYY-MM-DD)")
+        command.add_argument("--to", dest="end", type=_parse_date, help="last day (YYYY-MM-DD)")
+
+    list_entries = commands.add_parser("list", help="list time entries, newest first")
+    add_filters(list_entries)
+    list_entries.add_argument("-n", "--limit", type=int, default=20)
+    list_entries.set_defaults(func=cmd_list)
+
+    report = commands.add_parser("report", help="summarize time per project, day, week or month")
+    add_filters(report)
+    report.add_argument("-g", "--group", choices=("project", "day", "week", "month"), default="project")
+    report.set_defaults(func=cmd_report)
+
+    export = commands.add_parser("export", help="export entries to PDF/CSV or changes to a sync changeset")
+    export.add_argument("path")
+    add_filters(export)
+    export.add_argument("--format", choices=("pdf", "csv", "changeset"),
+                        help="output format (default: from the extension: .pdf, .csv, .gz or .changeset)")
+    export.add_argument("-s", "--summary", choices=("project", "day", "week", "month"),
+                        help="PDF of the totals per project, day, week or month instead of every entry")
+    export.add_argument("--compact", action="store_true", help="smaller PDF: binary streams, rules instead of a grid")
+    export.add_argument("--since", type=int, default=None,
+                        help="changeset watermark (default: continue from the last export)")
+    export.set_defaults(func=cmd_export)
+
+    batch = commands.add_parser("batch-export", help="export one PDF per project and period, in parallel")
+    batch.add_argument("output_dir")
+    batch.add_argument("-p", "--project", action="append",
+                       help="project ID or name, repeatable (default: every project with entries)")
+    batch.add_argument("-m", "--month", action="append",
+                       help="YYYY-MM, repeatable; one report per project and month")
+    batch.add_argument("--from", dest="start", type=_parse_date, help="first day, instead of --month")
+    batch.add_argument("--to", dest="end", type=_parse_date, help="last day, instead of --month")
+    batch.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: one per core)")
+    batch.add_argument("--compact", action="store_true", help="smaller PDFs: binary streams, rules instead of a grid")
+    batch.set_defaults(func=cmd_batch_export)
+
+    import_changes = commands.add_parser("import", help="apply a sync changeset")
+    import_changes.add_argument("path")
+    import_changes.set_defaults(func=cmd_import)
+
+    # Options after "serve" are parsed by the server itself, see main()
+    commands.add_parser("serve", help="run the local HTTP/JSON tracking service", add_help=False)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run a CLI command and return the exit status"""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "serve":
+        from .server import main as serve
+        return serve(argv[1:])
+
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if args.command == "serve":
+        from .server import main as serve
+        return serve((["--db", args.db] if args.db else []) + extra)
+    if extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    if args.command is None:
+        parser.print_help()
+        return 1
+    try:
+        return args.func(args)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,157 @@
 import sqlite3
 import datetime
 import os
-from typing import List, Optional, Tuple
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .state import STATE_VERSION, state_path, write_state
+
+# Stored in PRAGMA user_version once init_database has run; bump it when adding a migration
+SCHEMA_VERSION = 3
+
+# Tables whose changes are recorded in the changelog for syncing between files
+SYNCED_TABLES = ("projects", "project_emails", "time_entries")
+
+# Exact entry length in seconds, computed in SQL; NULL while the timer is running
+ENTRY_SECONDS_SQL = "CAST((julianday(te.end_time) - julianday(te.start_time)) * 86400 + 0.001 AS INTEGER)"
+
+# Sort keys of get_time_entry_page. Each is indexed together with start_time,
+# the first tiebreak; "project" walks projects by name and each project's entries by start time.
+ENTRY_SORTS = {
+    "date": "te.start_time",
+    "project": "p.name",
+    "description": "te.description",
+    "end": "te.end_time",
+    "duration": ENTRY_SECONDS_SQL,
+}
+
+# (key, label) expressions for get_entry_groups; weeks start on Monday
+GROUP_EXPRESSIONS = {
+    "day": ("DATE(te.start_time)", "DATE(te.start_time)"),
+    "week": ("DATE(te.start_time, 'weekday 0', '-6 days')", "DATE(te.start_time, 'weekday 0', '-6 days')"),
+    "month": ("strftime('%Y-%m', te.start_time)", "strftime('%Y-%m', te.start_time)"),
+    "project": ("te.project_id", "p.name"),
+}
+GROUP_ORDER = {
+    "day": "group_key DESC",
+    "week": "group_key DESC",
+    "month": "group_key DESC",
+    "project": "p.name",
+}
+
+
+def group_entry_filters(group_by: str, group_key, project_id: Optional[int] = None,
+                        start_date: Optional[datetime.date] = None,
+                        end_date: Optional[datetime.date] = None):
+    """Narrow (project_id, start_date, end_date) filters to one group of get_entry_groups.
+    
+    Returns None when the group lies outside the filters. Date groups become a
+    date range rather than a comparison on the group expression, so the
+    start_time indexes still apply.
+    """
+    if group_by == "project":
+        if project_id and project_id != group_key:
+            return None
+        return group_key, start_date, end_date
+    if group_by not in GROUP_EXPRESSIONS:
+        raise ValueError(f"Cannot group entries by '{group_by}'")
+    
+    if group_by == "month":
+        year, month = map(int, group_key.split("-"))
+        first = datetime.date(year, month, 1)
+        last = datetime.date(year + month // 12, month % 12 + 1, 1) - datetime.timedelta(days=1)
+    else:
+        first = datetime.date.fromisoformat(group_key)
+        last = first + datetime.timedelta(days=6 if group_by == "week" else 0)
+    first = max(first, start_date) if start_date else first
+    last = min(last, end_date) if end_date else last
+    if first > last:
+        return None
+    return project_id, first, last
+
+
+class ChangeWatcher:
+    """Detect commits made to the database file by other connections.
+
+    Keeps one long-lived connection open and compares ``PRAGMA data_version``
+    between polls. SQLite bumps that value whenever any *other* connection
+    commits, so writes from a second window, a script, or even the short-lived
+    connections used by ``TimeTrackerDB`` itself are all reported, while an
+    idle poll is a single cheap pragma with no table access.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._conn = None
+        self._version = None
+        self._lock = threading.Lock()
+        self._subscribers: List[Callable[[], None]] = []
+
+    def _read_version(self) -> Optional[int]:
+        """Current data_version, or None while another connection holds a lock"""
+        if self._conn is None:
+            # Never wait for a lock: polls run on the UI thread and simply retry next time
+            self._conn = sqlite3.connect(self.db_path, timeout=0, check_same_thread=False)
+        try:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.OperationalError as e:
+            if "locked" in str(e):
+                return None
+            raise
+
+    def subscribe(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Register a callback run after a change is detected; returns an unsubscribe function"""
+        with self._lock:
+            if self._version is None:
+                self._version = self._read_version()
+            self._subscribers.append(callback)
+        return lambda: self.unsubscribe(callback)
+
+    def unsubscribe(self, callback: Callable[[], None]):
+        """Remove a previously registered callback"""
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def mark_seen(self):
+        """Treat everything committed so far as already observed"""
+        with self._lock:
+            version = self._read_version()
+            if version is not None:
+                self._version = version
+
+    def poll(self) -> bool:
+        """Check for new commits and notify subscribers; return True if data changed"""
+        with self._lock:
+            version = self._read_version()
+            if version is None:
+                # Busy: another connection is mid-write, its commit shows up next poll
+                return False
+            if self._version is None:
+                self._version = version
+                return False
+            if version == self._version:
+                return False
+            self._version = version
+            subscribers = list(self._subscribers)
+        
+        for callback in subscribers:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Change subscriber failed: {e}")
+        return True
+
+    def close(self):
+        """Close the watcher connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._version = None
+
 
 class TimeTrackerDB:
     def __init__(self, db_path: str = None):
@@ -11,11 +161,32 @@ class TimeTrackerDB:
             self.db_path = os.path.join(home_dir, "time_tracker.db")
         else:
             self.db_path = db_path
-        self.init_database()
+        self._changes = None
+        # An up-to-date file is opened without DDL, so opening never needs the write lock
+        if self._schema_version() != SCHEMA_VERSION:
+            self.init_database()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection for one method call; the caller closes it"""
+        return sqlite3.connect(self.db_path)
+    
+    def _schema_version(self) -> int:
+        """Schema version recorded in the file, 0 for a new or older file"""
+        conn = self._connect()
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        conn.close()
+        return version
+    
+    @property
+    def changes(self) -> ChangeWatcher:
+        """Change watcher for this database, created on first use"""
+        if self._changes is None:
+            self._changes = ChangeWatcher(self.db_path)
+        return self._changes
     
     def init_database(self):
         """Initialize the database with required tables"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         # Create projects table
@@ -75,12 +246,145 @@ class TimeTrackerDB:
             )
         ''')
         
+        self._init_changelog(cursor)
+        
+        # The entries list pages through entries newest first, optionally for one project
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_time_entries_start ON time_entries (start_time)")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_time_entries_project_start ON time_entries (project_id, start_time)"
+        )
+        # ... and sorted by the other ENTRY_SORTS keys; the duration index must use the same expression
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_time_entries_end ON time_entries (end_time, start_time)")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_time_entries_description ON time_entries (description, start_time)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_time_entries_duration ON time_entries "
+            f"({ENTRY_SECONDS_SQL.replace('te.', '')}, start_time)"
+        )
+        
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        
         conn.commit()
         conn.close()
     
+    def _init_changelog(self, cursor):
+        """Create the changelog and the triggers that maintain it"""
+        # Single-row table with this file's origin id and Lamport clock.
+        # "applying" is set while importing a changeset so the triggers stay quiet.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sync_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                origin TEXT NOT NULL,
+                clock INTEGER NOT NULL DEFAULT 0,
+                applying INTEGER NOT NULL DEFAULT 0,
+                last_export_seq INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        # Only write when the row is missing: a write here would make every open wait for other writers
+        cursor.execute("SELECT 1 FROM sync_state WHERE id = 1")
+        if cursor.fetchone() is None:
+            cursor.execute(
+                "INSERT OR IGNORE INTO sync_state (id, origin) VALUES (1, lower(hex(randomblob(16))))"
+            )
+        
+        # One row per changed record: only the latest change of each row is kept
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS changelog (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                table_name TEXT NOT NULL,
+                row_id INTEGER NOT NULL,
+                row_uid TEXT,
+                op TEXT NOT NULL,
+                clock INTEGER NOT NULL,
+                origin TEXT NOT NULL
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_changelog_row ON changelog (table_name, row_uid)")
+        
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_projects_insert'")
+        if cursor.fetchone():
+            return
+        
+        # First run on this file: give every row a global uid and log it once
+        for table in SYNCED_TABLES:
+            try:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN uid TEXT")
+            except sqlite3.OperationalError:
+                # Column already exists, ignore
+                pass
+            cursor.execute(f"UPDATE {table} SET uid = lower(hex(randomblob(16))) WHERE uid IS NULL")
+            cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_uid ON {table} (uid)")
+        
+        cursor.execute("UPDATE sync_state SET clock = clock + 1 WHERE id = 1")
+        for table in SYNCED_TABLES:
+            cursor.execute(f'''
+                INSERT INTO changelog (table_name, row_id, row_uid, op, clock, origin)
+                SELECT '{table}', t.id, t.uid, 'I', s.clock, s.origin
+                FROM {table} t, sync_state s WHERE s.id = 1
+            ''')
+        
+        for table in SYNCED_TABLES:
+            log_change = f'''
+                UPDATE sync_state SET clock = clock + 1 WHERE id = 1;
+                DELETE FROM changelog WHERE table_name = '{table}' AND row_uid = {{ref}}.uid;
+                INSERT INTO changelog (table_name, row_id, row_uid, op, clock, origin)
+                SELECT '{table}', {{ref}}.id, {{ref}}.uid, '{{op}}', clock, origin FROM sync_state WHERE id = 1;
+            '''
+            quiet = "(SELECT applying FROM sync_state WHERE id = 1) = 0"
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_insert AFTER INSERT ON {table}
+                WHEN {quiet}
+                BEGIN
+                    UPDATE {table} SET uid = lower(hex(randomblob(16))) WHERE id = NEW.id AND uid IS NULL;
+                    UPDATE sync_state SET clock = clock + 1 WHERE id = 1;
+                    INSERT INTO changelog (table_name, row_id, row_uid, op, clock, origin)
+                    SELECT '{table}', NEW.id, (SELECT uid FROM {table} WHERE id = NEW.id), 'I', clock, origin
+                    FROM sync_state WHERE id = 1;
+                END
+            ''')
+            # The uid assignment above is an UPDATE with OLD.uid NULL, which must not be logged twice
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_update AFTER UPDATE ON {table}
+                WHEN OLD.uid IS NOT NULL AND {quiet}
+                BEGIN
+                    {log_change.format(ref="NEW", op="U")}
+                END
+            ''')
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_delete AFTER DELETE ON {table}
+                WHEN {quiet}
+                BEGIN
+                    {log_change.format(ref="OLD", op="D")}
+                END
+            ''')
+    
+    def get_changes_since(self, seq: int = 0) -> List[Tuple[int, str, int, str]]:
+        """Get (seq, table_name, row_id, op) for every change logged after seq"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            "SELECT seq, table_name, row_id, op FROM changelog WHERE seq > ? ORDER BY seq",
+            (seq,)
+        )
+        changes = cursor.fetchall()
+        conn.close()
+        return changes
+    
+    def get_changelog_seq(self) -> int:
+        """Get the sequence number of the latest logged change"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM changelog")
+        seq = cursor.fetchone()[0]
+        conn.close()
+        return seq
+    
     def add_project(self, name: str, description: str = "", default_email: str = "", rate: float = None, currency: str = "EUR") -> int:
         """Add a new project and return its ID"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         try:
@@ -98,7 +402,7 @@ class TimeTrackerDB:
     
     def get_projects(self) -> List[Tuple[int, str, str, str, float, str]]:
         """Get all projects"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute("SELECT id, name, description, default_email, rate, currency FROM projects ORDER BY name")
@@ -108,7 +412,7 @@ class TimeTrackerDB:
     
     def start_timer(self, project_id: int, description: str = "") -> int:
         """Start a new time entry and return its ID"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         # Validate project exists
@@ -134,11 +438,12 @@ class TimeTrackerDB:
         entry_id = cursor.lastrowid
         conn.commit()
         conn.close()
+        self.refresh_state()
         return entry_id
     
     def stop_timer(self, project_id: int) -> Optional[int]:
         """Stop the running timer for a project and return duration in minutes"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute(
@@ -163,46 +468,282 @@ class TimeTrackerDB:
         
         conn.commit()
         conn.close()
+        self.refresh_state()
         return duration
     
+    def _entry_filters(self, project_id: Optional[int] = None,
+                       start_date: Optional[datetime.date] = None,
+                       end_date: Optional[datetime.date] = None) -> Tuple[str, List]:
+        """Build the WHERE clause shared by the time entry queries"""
+        query = " WHERE 1=1"
+        params = []
+        
+        if project_id:
+            query += " AND te.project_id = ?"
+            params.append(project_id)
+        
+        # Compare the raw ISO strings rather than DATE(start_time) so the start_time indexes apply
+        if start_date:
+            query += " AND te.start_time >= ?"
+            params.append(start_date.isoformat())
+        
+        if end_date:
+            query += " AND te.start_time < ?"
+            params.append((end_date + datetime.timedelta(days=1)).isoformat())
+        
+        return query, params
+    
     def get_time_entries(self, project_id: Optional[int] = None, 
                         start_date: Optional[datetime.date] = None,
                         end_date: Optional[datetime.date] = None) -> List[Tuple]:
         """Get time entries with optional filters"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
+        cursor.execute(*self._entries_query(project_id, start_date, end_date))
+        entries = cursor.fetchall()
+        conn.close()
+        return entries
+    
+    def iter_time_entries(self, project_id: Optional[int] = None,
+                          start_date: Optional[datetime.date] = None,
+                          end_date: Optional[datetime.date] = None,
+                          batch_size: int = 1000) -> Iterator[Tuple]:
+        """Yield the entries get_time_entries returns, fetching batch_size rows at a time"""
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(*self._entries_query(project_id, start_date, end_date))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            conn.close()
+    
+    def get_project_time_entries(self, project_ids: List[int],
+                                 start_date: Optional[datetime.date] = None,
+                                 end_date: Optional[datetime.date] = None) -> Dict[int, List[Tuple]]:
+        """Entries of several projects read with one query, per project and newest first like get_time_entries"""
+        entries = {project_id: [] for project_id in project_ids}
+        if not project_ids:
+            return entries
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        where, params = self._entry_filters(None, start_date, end_date)
+        cursor.execute("""
+            SELECT te.id, te.project_id, p.name, te.description,
+                   te.start_time, te.end_time, te.duration_minutes, p.rate, p.currency
+            FROM time_entries te
+            JOIN projects p ON te.project_id = p.id
+        """ + where + f" AND te.project_id IN ({', '.join('?' * len(entries))})"
+            " ORDER BY te.project_id, te.start_time DESC", params + list(entries))
+        for entry in cursor:
+            entries[entry[1]].append(entry)
+        conn.close()
+        return entries
+    
+    def _entries_query(self, project_id, start_date, end_date) -> Tuple[str, List]:
+        """Query and parameters of get_time_entries"""
+        where, params = self._entry_filters(project_id, start_date, end_date)
         query = """
             SELECT te.id, te.project_id, p.name, te.description, 
                    te.start_time, te.end_time, te.duration_minutes, p.rate, p.currency
             FROM time_entries te
             JOIN projects p ON te.project_id = p.id
-            WHERE 1=1
+        """ + where + " ORDER BY te.start_time DESC"
+        return query, params
+    
+    def entries_have_rates(self, project_id: Optional[int] = None,
+                           start_date: Optional[datetime.date] = None,
+                           end_date: Optional[datetime.date] = None) -> bool:
+        """Whether any of the filtered entries belongs to a project with a rate set"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        where, params = self._entry_filters(project_id, start_date, end_date)
+        cursor.execute("""
+            SELECT EXISTS (
+                SELECT 1 FROM time_entries te
+                JOIN projects p ON te.project_id = p.id
+        """ + where + " AND p.rate IS NOT NULL)", params)
+        has_rates = bool(cursor.fetchone()[0])
+        conn.close()
+        return has_rates
+    
+    def count_time_entries(self, project_id: Optional[int] = None,
+                           start_date: Optional[datetime.date] = None,
+                           end_date: Optional[datetime.date] = None) -> int:
+        """Count the entries get_time_entry_page pages through"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        where, params = self._entry_filters(project_id, start_date, end_date)
+        cursor.execute("SELECT COUNT(*) FROM time_entries te" + where, params)
+        count = cursor.fetchone()[0]
+        conn.close()
+        return count
+    
+    def get_time_entry_page(self, offset: int, limit: int,
+                            project_id: Optional[int] = None,
+                            start_date: Optional[datetime.date] = None,
+                            end_date: Optional[datetime.date] = None,
+                            sort: str = "date", descending: bool = True) -> List[Tuple]:
+        """Get ``limit`` entries starting at ``offset`` in get_time_entries' row format.
+        
+        Entries are ordered by the ENTRY_SORTS key ``sort``, then by start time
+        and ID, all in the same direction; the default is newest first. Only
+        the rows of the page are joined with their project, so a page deep
+        into a long history costs little more than the first one.
         """
-        params = []
+        if sort not in ENTRY_SORTS:
+            raise ValueError(f"Cannot sort entries by '{sort}'")
+        direction = "DESC" if descending else "ASC"
+        order = f"te.start_time {direction}, te.id {direction}"
+        if sort != "date":
+            order = f"{ENTRY_SORTS[sort]} {direction}, " + order
+        # Only sorting by project name needs the projects while picking the page
+        join = " JOIN projects p ON te.project_id = p.id" if sort == "project" else ""
         
-        if project_id:
-            query += " AND te.project_id = ?"
-            params.append(project_id)
+        conn = self._connect()
+        cursor = conn.cursor()
         
-        if start_date:
-            query += " AND DATE(te.start_time) >= ?"
-            params.append(start_date.isoformat())
+        where, params = self._entry_filters(project_id, start_date, end_date)
+        query = f"""
+            SELECT te.id, te.project_id, p.name, te.description,
+                   te.start_time, te.end_time, te.duration_minutes, p.rate, p.currency
+            FROM (
+                SELECT te.id FROM time_entries te{join}{where}
+                ORDER BY {order} LIMIT ? OFFSET ?
+            ) page
+            JOIN time_entries te ON te.id = page.id
+            LEFT JOIN projects p ON te.project_id = p.id
+            ORDER BY {order}
+        """
         
-        if end_date:
-            query += " AND DATE(te.start_time) <= ?"
-            params.append(end_date.isoformat())
+        cursor.execute(query, params + [limit, offset])
+        entries = cursor.fetchall()
+        conn.close()
+        return entries
+    
+    def get_time_entries_by_ids(self, entry_ids: List[int],
+                                project_id: Optional[int] = None,
+                                start_date: Optional[datetime.date] = None,
+                                end_date: Optional[datetime.date] = None) -> List[Tuple]:
+        """Get those of the given entries that match the filters, in get_time_entries' row format"""
+        if not entry_ids:
+            return []
+        conn = self._connect()
+        cursor = conn.cursor()
         
-        query += " ORDER BY te.start_time DESC"
+        where, params = self._entry_filters(project_id, start_date, end_date)
+        placeholders = ", ".join("?" * len(entry_ids))
+        query = """
+            SELECT te.id, te.project_id, p.name, te.description,
+                   te.start_time, te.end_time, te.duration_minutes, p.rate, p.currency
+            FROM time_entries te
+            LEFT JOIN projects p ON te.project_id = p.id
+        """ + where + f" AND te.id IN ({placeholders}) ORDER BY te.start_time DESC, te.id DESC"
         
-        cursor.execute(query, params)
+        cursor.execute(query, params + list(entry_ids))
         entries = cursor.fetchall()
         conn.close()
         return entries
     
+    def get_entry_groups(self, group_by: str = "project",
+                         project_id: Optional[int] = None,
+                         start_date: Optional[datetime.date] = None,
+                         end_date: Optional[datetime.date] = None) -> List[Tuple]:
+        """Aggregate entries per day, week, month or project.
+        
+        Returns (group_key, label, currency, entry_count, total_seconds, amount)
+        rows, one per group and currency, newest group first. Running entries are
+        counted but add no time; amount is None when no entry has a rate.
+        """
+        if group_by not in GROUP_EXPRESSIONS:
+            raise ValueError(f"Cannot group entries by '{group_by}'")
+        key, label = GROUP_EXPRESSIONS[group_by]
+        
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        where, params = self._entry_filters(project_id, start_date, end_date)
+        query = f"""
+            SELECT {key} AS group_key, {label}, p.currency, COUNT(*),
+                   COALESCE(SUM({ENTRY_SECONDS_SQL}), 0),
+                   SUM(CASE WHEN p.rate > 0 THEN {ENTRY_SECONDS_SQL} * p.rate / 3600.0 END)
+            FROM time_entries te
+            JOIN projects p ON te.project_id = p.id
+        """ + where + f" GROUP BY group_key, p.currency ORDER BY {GROUP_ORDER[group_by]}"
+        
+        cursor.execute(query, params)
+        groups = cursor.fetchall()
+        conn.close()
+        return groups
+    
+    def get_running_timers(self) -> List[Tuple]:
+        """Get (entry_id, project_id, project_name, description, start_time) for every running timer"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT te.id, te.project_id, p.name, te.description, te.start_time
+            FROM time_entries te
+            JOIN projects p ON te.project_id = p.id
+            WHERE te.end_time IS NULL
+            ORDER BY te.start_time
+        """)
+        timers = cursor.fetchall()
+        conn.close()
+        return timers
+    
+    def refresh_state(self):
+        """Rewrite the prompt state file (see timetracking.state) from the database"""
+        today = datetime.date.today()
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT te.id, te.project_id, p.name, te.description, te.start_time
+                FROM time_entries te
+                JOIN projects p ON te.project_id = p.id
+                WHERE te.end_time IS NULL
+                ORDER BY te.start_time
+            """)
+            running = cursor.fetchall()
+            cursor.execute(f"""
+                SELECT COALESCE(SUM({ENTRY_SECONDS_SQL}), 0)
+                FROM time_entries te
+                WHERE te.end_time IS NOT NULL AND DATE(te.start_time) = ?
+            """, (today.isoformat(),))
+            today_seconds = cursor.fetchone()[0]
+            conn.close()
+            
+            write_state(state_path(self.db_path), {
+                "version": STATE_VERSION,
+                "updated": time.time(),
+                "day": today.isoformat(),
+                "today_seconds": today_seconds,
+                "running": [
+                    {
+                        "entry_id": entry_id,
+                        "project_id": project_id,
+                        "project": name,
+                        "description": description,
+                        "started": datetime.datetime.fromisoformat(start_time).timestamp(),
+                    }
+                    for entry_id, project_id, name, description, start_time in running
+                ],
+            })
+        except (sqlite3.Error, OSError, TypeError, ValueError) as e:
+            # The state file only feeds prompts; never fail a timer operation over it
+            print(f"Warning: could not update timer state file: {e}")
+    
     def get_running_timer(self, project_id: int) -> Optional[Tuple]:
         """Get the currently running timer for a project"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute(
@@ -216,7 +757,7 @@ class TimeTrackerDB:
     def update_entry(self, entry_id: int, description: str = None, 
                     start_time: str = None, end_time: str = None, project_id: int = None) -> bool:
         """Update a time entry"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         # Build update query dynamically based on provided parameters
@@ -280,11 +821,13 @@ class TimeTrackerDB:
         updated = cursor.rowcount > 0
         conn.commit()
         conn.close()
+        if updated:
+            self.refresh_state()
         return updated
     
     def get_entry(self, entry_id: int) -> Optional[Tuple]:
         """Get a specific time entry by ID"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -301,18 +844,20 @@ class TimeTrackerDB:
     
     def delete_entry(self, entry_id: int) -> bool:
         """Delete a time entry"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute("DELETE FROM time_entries WHERE id = ?", (entry_id,))
         deleted = cursor.rowcount > 0
         conn.commit()
         conn.close()
+        if deleted:
+            self.refresh_state()
         return deleted
     
     def get_latest_entry_project(self) -> Optional[int]:
         """Get the project ID of the most recent time entry"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -329,7 +874,7 @@ class TimeTrackerDB:
     
     def add_project_email(self, project_id: int, email: str, is_primary: bool = False) -> int:
         """Add an email to a project"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         # If this is primary, unset other primary emails for this project
@@ -347,7 +892,7 @@ class TimeTrackerDB:
     
     def get_project_emails(self, project_id: int) -> List[Tuple[int, str, bool]]:
         """Get all emails for a project"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute(
@@ -360,7 +905,7 @@ class TimeTrackerDB:
     
     def delete_project_email(self, email_id: int) -> bool:
         """Delete a project email"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute("DELETE FROM project_emails WHERE id = ?", (email_id,))
@@ -377,7 +922,7 @@ class TimeTrackerDB:
 
     def set_primary_email(self, project_id: int, email_id: int) -> bool:
         """Set a specific email as primary for a project"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         try:
             cursor.execute("UPDATE project_emails SET is_primary = 0 WHERE project_id = ?", (project_id,))
@@ -389,7 +934,7 @@ class TimeTrackerDB:
     
     def update_project(self, project_id: int, name: str = None, description: str = None, rate: float = None, currency: str = None) -> bool:
         """Update a project"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         updates = []
@@ -422,4 +967,75 @@ class TimeTrackerDB:
         updated = cursor.rowcount > 0
         conn.commit()
         conn.close()
+        if updated and name is not None:
+            self.refresh_state()
         return updated
+
+
+class _PinnedConnection:
+    """Connection proxy whose close() keeps the connection open for the next call"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.raw = conn
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    def close(self):
+        # Closing an uncommitted connection discards its work, so do the same here
+        if self.raw.in_transaction:
+            self.raw.rollback()
+
+
+class WorkerDB(TimeTrackerDB):
+    """TimeTrackerDB that reuses one connection per worker thread.
+
+    Used by thread pools (AsyncTimeTrackerDB, the GUI's background queries).
+    It does not run migrations, so open the file with TimeTrackerDB first.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._changes = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            raw = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn = self._local.conn = _PinnedConnection(raw)
+            with self._lock:
+                self._connections.append(raw)
+        return conn
+
+    # SQLite virtual machine steps between cancellation checks
+    CANCEL_CHECK_STEPS = 1000
+
+    def current_connection(self) -> sqlite3.Connection:
+        """Connection owned by the calling worker thread"""
+        return self._connect().raw
+
+    @contextmanager
+    def cancellable(self, cancel):
+        """Abort statements run by this thread once ``cancel.cancelled`` is true.
+
+        SQLite polls the flag while a statement runs, so a cancel that arrives
+        before or during a query aborts it with ``sqlite3.OperationalError``.
+        Only this thread's connection checks this task's flag, so the cancel
+        cannot hit the next task's statement. Check the flag again after the
+        block: a statement that finished first is not aborted.
+        """
+        conn = self.current_connection()
+        conn.set_progress_handler(lambda: cancel.cancelled, self.CANCEL_CHECK_STEPS)
+        try:
+            yield conn
+        finally:
+            conn.set_progress_handler(None, 0)
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
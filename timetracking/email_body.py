@@ -0,0 +1,225 @@
+"""
+HTML bodies of the report emails, and their plain-text alternatives.
+
+The bodies used to be built with ``html += f"..."`` once per row. That copies
+the body built so far whenever the string cannot grow in place, repeats the
+whole inline-styled fragment in the source for every row, and pastes the
+descriptions in unescaped, so an entry reading "<b" broke the table for the
+rest of the email.
+
+Here each kind of row is a template compiled once, a function around one
+f-string, filled with escaped values. The fragments go into a BodyWriter and
+are joined once at the end. With ``text=True`` the plain-text alternative is
+written in the same pass over the rows.
+"""
+from datetime import date, datetime
+from html import escape
+from typing import List, Optional, Tuple, Union
+
+from .report import ProgressCallback, ReportModel, SummaryReport, Totals, as_report, tracked_rows
+
+
+class BodyWriter:
+    """Fragments of an HTML body and, optionally, of its plain-text alternative"""
+
+    __slots__ = ("html", "text")
+
+    def __init__(self, text: bool = False):
+        self.html: List[str] = []
+        self.text: Optional[List[str]] = [] if text else None
+
+    def write(self, html: str, text: Optional[str] = None):
+        """Add a fragment to the HTML body and, when kept, its counterpart to the text"""
+        self.html.append(html)
+        if self.text is not None and text is not None:
+            self.text.append(text)
+
+    def getvalue(self) -> Tuple[str, Optional[str]]:
+        """The HTML body and the text body, or None when no text is kept"""
+        return "".join(self.html), None if self.text is None else "".join(self.text)
+
+
+# Row templates are functions around one f-string each, compiled once with the module;
+# str.format would parse its template again for every row, which costs several times more
+
+# Report emails (EmailExporter)
+REPORT_TABLE = ('<table border="1" cellpadding="5" cellspacing="0" style="border-collapse: collapse; width: 100%;">\n'
+                '<tr style="background-color: #f2f2f2;">{}</tr>\n')
+ENTRY_COLUMNS = ("Date", "Project", "Description", "Start Time", "End Time", "Duration")
+RATE_COLUMNS = ("Rate", "Amount")
+
+
+def _entry_row(day, project, description, start, end, duration) -> str:
+    return (f"<tr><td>{day}</td><td>{project}</td><td>{description}</td>"
+            f"<td>{start}</td><td>{end}</td><td>{duration}</td></tr>\n")
+
+
+def _rated_entry_row(day, project, description, start, end, duration, rate, amount) -> str:
+    return (f"<tr><td>{day}</td><td>{project}</td><td>{description}</td>"
+            f"<td>{start}</td><td>{end}</td><td>{duration}</td><td>{rate}</td><td>{amount}</td></tr>\n")
+
+
+def _entry_text(day, project, description, start, end, duration) -> str:
+    return f"{day}  {start}-{end}  {duration}  {project}: {description}\n"
+
+
+def _rated_entry_text(day, project, description, start, end, duration, rate, amount) -> str:
+    return f"{day}  {start}-{end}  {duration}  {project}: {description}  ({amount} at {rate})\n"
+
+
+# Weekly timesheets (WeeklyReportDialog)
+TIMESHEET_HEAD = """<h3 style='color: #2c3e50; margin-bottom: 15px;'>TIMESHEET SUMMARY:</h3>
+<table border='1' cellpadding='8' cellspacing='0' style='border-collapse: collapse; width: 100%; font-family: Arial, sans-serif; font-size: 14px;'>
+<thead>
+<tr style='background-color: #34495e; color: white; font-weight: bold;'>
+<th style='padding: 10px; text-align: left;'>Date</th>
+<th style='padding: 10px; text-align: left;'>Project</th>
+<th style='padding: 10px; text-align: left;'>Description</th>
+<th style='padding: 10px; text-align: left;'>Time</th>
+<th style='padding: 10px; text-align: left;'>Duration</th>
+</tr>
+</thead>
+<tbody>
+"""
+
+
+def _timesheet_row(day, project, description, start, end, duration) -> str:
+    return (f"<tr style='background-color: #f8f9fa; border-bottom: 1px solid #dee2e6;'>"
+            f"<td style='padding: 10px; border-right: 1px solid #dee2e6;'>{day}</td>"
+            f"<td style='padding: 10px; border-right: 1px solid #dee2e6; font-weight: bold; color: #2c3e50;'>{project}</td>"
+            f"<td style='padding: 10px; border-right: 1px solid #dee2e6;'>{description}</td>"
+            f"<td style='padding: 10px; border-right: 1px solid #dee2e6;'>{start} - {end}</td>"
+            f"<td style='padding: 10px; font-weight: bold; color: #27ae60;'>{duration}</td></tr>\n")
+
+
+def _timesheet_text(day, project, description, start, end, duration) -> str:
+    return f"Date: {day}\nProject: {project}\nDescription: {description}\nTime: {start} - {end}\nDuration: {duration}\n\n"
+
+
+def _timesheet_foot(total_hours: float) -> str:
+    return f"""</tbody>
+<tfoot>
+<tr style='background-color: #3498db; color: white; font-weight: bold; font-size: 16px;'>
+<td colspan='4' style='padding: 15px; text-align: right;'>Total Hours:</td>
+<td style='padding: 15px; text-align: center; font-size: 18px;'>{total_hours:.1f}</td>
+</tr>
+</tfoot>
+</table>
+"""
+
+
+def _as_date(value):
+    """A date, or an ISO date string parsed"""
+    return value if value is None or hasattr(value, "strftime") else date.fromisoformat(str(value))
+
+
+def date_range_text(start_date=None, end_date=None) -> str:
+    """Period of a report, e.g. From January 01, 2024 to January 31, 2024; dates may be ISO strings"""
+    try:
+        start, end = _as_date(start_date), _as_date(end_date)
+    except ValueError:
+        start = end = None
+    if start and end:
+        return f"From {start.strftime('%B %d, %Y')} to {end.strftime('%B %d, %Y')}"
+    if start:
+        return f"From {start.strftime('%B %d, %Y')}"
+    if end:
+        return f"Until {end.strftime('%B %d, %Y')}"
+    return f"Generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}"
+
+
+def report_body(time_entries: Union[List[Tuple], ReportModel, SummaryReport],
+                project_name: Optional[str] = None, start_date=None, end_date=None, text: bool = False,
+                progress: Optional[ProgressCallback] = None, cancel=None) -> Tuple[str, Optional[str]]:
+    """HTML body of a report email, and its plain-text alternative when text is true.
+
+    A SummaryReport gets one row per group instead of one per entry.
+    progress is called and cancel checked every PROGRESS_ROWS rows, see tracked_rows.
+    """
+    summary = isinstance(time_entries, SummaryReport)
+    report = time_entries if summary else as_report(time_entries)
+    title = f"Time Tracking {'Summary' if summary else 'Report'}"
+    date_range = date_range_text(start_date, end_date)
+
+    writer = BodyWriter(text)
+    writer.write(f"<html>\n<body>\n<h2>{title}</h2>\n", f"{title}\n\n")
+    if project_name:
+        writer.write(f"<h3>Project: {escape(project_name)}</h3>\n", f"Project: {project_name}\n")
+    writer.write(f"<p><strong>{date_range}</strong></p>\n", f"{date_range}\n\n")
+
+    if not report.rows:
+        message = "No time entries found for the selected criteria."
+        writer.write(f"<p>{message}</p>\n", f"{message}\n")
+    else:
+        if summary:
+            columns = (report.label, "Entries", "Hours") + (("Amount",) if report.has_rates else ())
+        else:
+            columns = ENTRY_COLUMNS + (RATE_COLUMNS if report.has_rates else ())
+        writer.write(REPORT_TABLE.format("".join(f"<th>{escape(column)}</th>" for column in columns)))
+        rows = tracked_rows(report.rows, len(report.rows), progress, cancel)
+        if summary:
+            _write_summary_rows(writer, rows, report.has_rates)
+        else:
+            _write_entry_rows(writer, rows, report.has_rates)
+        writer.write("</table>\n", "\n")
+        _write_totals(writer, report)
+
+    writer.write("</body>\n</html>\n")
+    return writer.getvalue()
+
+
+def _write_entry_rows(writer: BodyWriter, rows, has_rates: bool):
+    """One table row, and one line of text, per entry"""
+    # The per-row loop of large reports: append without going through write()
+    add_html = writer.html.append
+    add_text = writer.text.append if writer.text is not None else None
+    for row in rows:
+        project, description = escape(row.project), escape(row.description)
+        if has_rates:
+            add_html(_rated_entry_row(row.date, project, description, row.start, row.end, row.duration,
+                                      row.rate_text, row.amount_text))
+            if add_text is not None:
+                add_text(_rated_entry_text(row.date, row.project, row.description, row.start, row.end, row.duration,
+                                           row.rate_text, row.amount_text))
+        else:
+            add_html(_entry_row(row.date, project, description, row.start, row.end, row.duration))
+            if add_text is not None:
+                add_text(_entry_text(row.date, row.project, row.description, row.start, row.end, row.duration))
+
+
+def _write_summary_rows(writer: BodyWriter, rows, has_rates: bool):
+    """One table row, and one line of text, per group"""
+    for row in rows:
+        # A few hundred groups at most: no need for the unrolled appends of _write_entry_rows
+        label = escape(row.label)
+        if has_rates:
+            writer.write(f"<tr><td>{label}</td><td>{row.count}</td><td>{row.hours_text}</td><td>{row.amount_text}</td></tr>\n",
+                         f"{row.label}: {row.count} entries, {row.hours_text} h, {row.amount_text}\n")
+        else:
+            writer.write(f"<tr><td>{label}</td><td>{row.count}</td><td>{row.hours_text}</td></tr>\n",
+                         f"{row.label}: {row.count} entries, {row.hours_text} h\n")
+
+
+def _write_totals(writer: BodyWriter, report: Totals):
+    """Total time and the total amount per currency"""
+    writer.write(f"<p><strong>Total Time: {report.total_time}</strong></p>\n", f"Total Time: {report.total_time}\n")
+    # One total per currency; amounts in different currencies are not added up
+    for amount in report.amount_totals:
+        writer.write(f"<p><strong>Total Amount: {amount}</strong></p>\n", f"Total Amount: {amount}\n")
+
+
+def timesheet_body(time_entries: Union[List[Tuple], ReportModel], text: bool = False,
+                   progress: Optional[ProgressCallback] = None, cancel=None) -> Tuple[str, Optional[str]]:
+    """Timesheet table of the weekly report email, and its plain-text version when text is true"""
+    report = as_report(time_entries)
+    writer = BodyWriter(text)
+    writer.write(TIMESHEET_HEAD, "TIMESHEET SUMMARY:\n\n")
+    add_html = writer.html.append
+    add_text = writer.text.append if writer.text is not None else None
+    for row in tracked_rows(report.rows, len(report.rows), progress, cancel):
+        description = row.description or "N/A"
+        add_html(_timesheet_row(row.date, escape(row.project), escape(description), row.start, row.end, row.duration))
+        if add_text is not None:
+            add_text(_timesheet_text(row.date, row.project, description, row.start, row.end, row.duration))
+    writer.write(_timesheet_foot(report.total_hours), f"Total Hours: {report.total_hours:.1f}\n")
+    return writer.getvalue()
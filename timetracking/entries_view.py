@@ -0,0 +1,460 @@
+"""
+Virtualized time entries list for the main window.
+
+A ttk.Treeview gets slower with every item it holds, so the entries view only
+keeps a window of rows as Tk items: the rows on screen plus some overscan
+above and below. Rows are loaded from the database a page at a time as the
+window moves, and the scrollbar is driven by the view rather than by the
+Treeview, so it still reflects the position within the whole list.
+
+The view never queries the database itself. It asks for missing rows through
+the ``load_rows(generation, offset, limit)`` callback and is handed them back
+through ``rows_loaded``; the GUI runs those queries on its TaskExecutor.
+
+GroupedEntriesView shares the Treeview for the grouped mode: one node per day,
+week or project with subtotals, whose entries are loaded when it is opened.
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .report import ReportRow, entry_seconds, format_seconds
+
+PLACEHOLDER_VALUES = ("", "Loading...", "", "", "", "")
+
+
+def format_entry_row(entry: Tuple) -> Tuple[str, ...]:
+    """Treeview values (Date, Project, Description, Start, End, Duration) for an entry row"""
+    return ReportRow(entry).values
+
+
+# The values database.ENTRY_SORTS orders by, taken from an entry row
+ROW_SORT_VALUES = {
+    "date": lambda entry: entry[4],
+    "project": lambda entry: entry[2],
+    "description": lambda entry: entry[3],
+    "end": lambda entry: entry[5],
+    "duration": entry_seconds,
+}
+
+
+def sort_key(entry: Tuple, sort: str = "date") -> Tuple:
+    """Key that orders entries ascending the way get_time_entry_page does, NULLs first like SQLite"""
+    value = ROW_SORT_VALUES[sort](entry)
+    return value is not None, value, entry[4], entry[0]
+
+
+class VirtualEntriesView:
+    """Show a very long list of entries in a Treeview holding only a window of items.
+
+    ``tree`` is the Treeview, ``scrollbar`` the vertical scrollbar next to
+    it. The view takes over both their scroll commands.
+    """
+
+    PAGE_SIZE = 100
+    OVERSCAN = 20
+    MAX_CACHED_ROWS = 5000
+    DEFAULT_ROW_HEIGHT = 20
+
+    def __init__(self, tree, scrollbar, load_rows: Callable[[int, int, int], None]):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.load_rows = load_rows
+        self.total = 0
+        self.top = 0
+        self.first = 0
+        self.generation = 0
+        self.sort = "date"
+        self.descending = True
+        self.visible_rows = int(tree.cget("height"))
+        self._rows: Dict[int, Tuple] = {}
+        self._pending = None
+        self._items: List[str] = []
+        self._painted: List[Optional[Tuple]] = []
+        self._item_of: Dict[int, str] = {}
+        self._selected_id = None
+        self._recentering = False
+        self._row_height = None
+        self.active = True
+
+        tree.configure(yscrollcommand=self.on_tree_scrolled)
+        scrollbar.configure(command=self.yview)
+        tree.bind("<<TreeviewSelect>>", self.on_select, add="+")
+        tree.bind("<Configure>", self.on_resize, add="+")
+
+    def release(self):
+        """Remove the view's items and let the tree scroll itself, for the grouped view"""
+        self.reset(0)
+        self.active = False
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.configure(command=self.tree.yview)
+
+    def attach(self):
+        """Take over the tree and scrollbar again after release"""
+        self.active = True
+        self.tree.configure(yscrollcommand=self.on_tree_scrolled)
+        self.scrollbar.configure(command=self.yview)
+
+    # Data
+
+    def reset(self, total: int, offset: int = 0, rows: Optional[List[Tuple]] = None, top: int = 0,
+              keep_selection: bool = False):
+        """Show a new result: ``total`` rows, of which ``rows`` start at ``offset``"""
+        self.generation += 1
+        self.total = total
+        self._rows.clear()
+        self._pending = None
+        if not keep_selection:
+            self._selected_id = None
+        if rows:
+            self._store(offset, rows)
+        self.top = -1
+        self.scroll_to(top)
+
+    def rows_loaded(self, generation: int, offset: int, rows: List[Tuple]):
+        """Deliver rows requested through ``load_rows``; stale generations are ignored"""
+        if generation != self.generation:
+            return
+        self._pending = None
+        self._store(offset, rows)
+        self._render()
+
+    def row(self, index: int) -> Optional[Tuple]:
+        """Entry row at ``index`` in the whole list, or None if it is not loaded"""
+        return self._rows.get(index)
+
+    def pages_around(self, top: int) -> Tuple[int, int]:
+        """``(offset, limit)`` of the whole pages the window needs when ``top`` is the first visible row"""
+        first = max(0, top - self.OVERSCAN)
+        last = top + self.visible_rows + self.OVERSCAN
+        offset = first // self.PAGE_SIZE * self.PAGE_SIZE
+        return offset, (last // self.PAGE_SIZE + 1) * self.PAGE_SIZE - offset
+
+    def _store(self, offset: int, rows: List[Tuple]):
+        for position, row in enumerate(rows):
+            self._rows[offset + position] = row
+        if len(self._rows) > self.MAX_CACHED_ROWS:
+            # Forget the rows farthest from what is on screen
+            keep = sorted(self._rows, key=lambda index: abs(index - self.top))[:self.MAX_CACHED_ROWS]
+            self._rows = {index: self._rows[index] for index in keep}
+
+    def _request_missing(self):
+        missing = [index for index in range(self.first, self.first + len(self._items)) if index not in self._rows]
+        if not missing:
+            return
+        offset = missing[0] // self.PAGE_SIZE * self.PAGE_SIZE
+        request = (self.generation, offset, (missing[-1] // self.PAGE_SIZE + 1) * self.PAGE_SIZE - offset)
+        if request != self._pending:
+            # A newer request replaces the one in flight; the GUI cancels the old query
+            self._pending = request
+            self.load_rows(*request)
+
+    # Changes
+
+    def apply_changes(self, entry_ids: List[int], rows: List[Tuple], total: int) -> bool:
+        """Patch the list after the entries ``entry_ids`` changed, without reloading it.
+
+        ``rows`` are those of the changed entries that match the filters now,
+        ``total`` the number of entries matching them. Each change moves the
+        loaded rows after it by one, so the cost does not depend on the
+        length of the list. Returns False when the loaded rows cannot tell
+        where a changed entry was; the caller then reloads.
+        """
+        focus_id = self.entry_id(self.tree.focus()) if self.tree.focus() else None
+        expected = self.total
+        for entry_id in entry_ids:
+            index = self._find(entry_id)
+            if index is not None:
+                self._shift(index + 1, -1)
+                expected -= 1
+        for row in rows:
+            self._insert(row)
+            expected += 1
+        if expected != total:
+            # An entry that was not loaded left the list, so the loaded rows after it are off by one
+            return False
+
+        if self._selected_id in entry_ids and self._selected_id not in {row[0] for row in rows}:
+            self._selected_id = None
+        # Rows already requested would land at their old positions
+        self.generation += 1
+        self._pending = None
+        self.total = total
+        top, self.top = self.top, -1
+        self.scroll_to(top, focus_id)
+        return True
+
+    def _find(self, entry_id: int) -> Optional[int]:
+        for index, row in self._rows.items():
+            if row[0] == entry_id:
+                return index
+        return None
+
+    def _shift(self, start: int, delta: int):
+        """Move loaded rows at ``start`` and after by ``delta``; a deletion drops the row before ``start``"""
+        self._rows = {index if index < start else index + delta: row
+                      for index, row in self._rows.items() if not (delta < 0 and index == start - 1)}
+        # Keep the same rows on screen, except that a row added right at the top shows up there
+        changed = start - 1 if delta < 0 else start
+        if changed < self.top:
+            self.top = max(0, self.top + delta)
+        self.total += delta
+
+    def _insert(self, row: Tuple):
+        key = sort_key(row, self.sort)
+        keys = {index: sort_key(cached, self.sort) for index, cached in self._rows.items()}
+        after = [index for index, cached in keys.items() if (cached < key) == self.descending and cached != key]
+        before = [index for index, cached in keys.items() if (cached > key) == self.descending and cached != key]
+        index = min(after) if after else self.total
+        exact = (max(before) if before else -1) == index - 1
+        self._shift(index, 1)
+        if exact:
+            self._rows[index] = row
+
+    # Scrolling
+
+    def yview(self, *args):
+        """Scrollbar command: ``moveto fraction`` or ``scroll n units|pages``"""
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * self.total))
+        elif args[0] == "scroll":
+            step = int(args[1]) * (self.visible_rows if args[2] == "pages" else 1)
+            self.scroll_to(self.top + step)
+
+    def scroll_to(self, top: int, focus_id: Optional[int] = None):
+        """Make the row at index ``top`` the first visible row"""
+        top = max(0, min(top, self.total - self.visible_rows))
+        window_size = min(self.visible_rows + 2 * self.OVERSCAN, self.total)
+        if top == self.top and len(self._items) == window_size:
+            return
+        if focus_id is None and self.tree.focus():
+            focus_id = self.entry_id(self.tree.focus())
+        self.top = top
+        self.first = max(0, min(top - self.OVERSCAN, self.total - window_size))
+        self._render(focus_id)
+        self._show_top()
+
+    def on_tree_scrolled(self, lo, hi):
+        """Treeview yscrollcommand: the tree scrolled within the window (wheel, keys)"""
+        if self._items and not self._recentering:
+            top = self.first + round(float(lo) * len(self._items))
+            self.top = top
+            window_end = self.first + len(self._items)
+            near_start = self.first > 0 and top - self.first < self.OVERSCAN // 2
+            near_end = window_end < self.total and window_end - (top + self.visible_rows) < self.OVERSCAN // 2
+            if near_start or near_end:
+                # Move the window so there is overscan on both sides again
+                self.top = -1
+                self.scroll_to(top)
+                return
+        self._update_scrollbar()
+
+    def on_resize(self, event):
+        """Track how many rows fit in the Treeview"""
+        if self._row_height is None:
+            try:
+                from tkinter import ttk
+                self._row_height = int(ttk.Style().lookup("Treeview", "rowheight") or self.DEFAULT_ROW_HEIGHT)
+            except (ValueError, RuntimeError):
+                self._row_height = self.DEFAULT_ROW_HEIGHT
+        # The heading row takes about one row of space
+        rows = max(1, event.height // self._row_height - 1)
+        if rows != self.visible_rows and self.active:
+            self.visible_rows = rows
+            top, self.top = self.top, -1
+            self.scroll_to(top)
+
+    def _show_top(self):
+        self._recentering = True
+        try:
+            if self._items:
+                self.tree.yview_moveto((self.top - self.first) / len(self._items))
+        finally:
+            self._recentering = False
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        if self.total <= 0:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        self.scrollbar.set(self.top / self.total, min(1.0, (self.top + self.visible_rows) / self.total))
+
+    # Painting
+
+    def _render(self, focus_id: Optional[int] = None):
+        window_size = max(0, min(self.visible_rows + 2 * self.OVERSCAN, self.total - self.first))
+
+        while len(self._items) < window_size:
+            self._items.append(self.tree.insert("", "end", values=PLACEHOLDER_VALUES))
+            self._painted.append(None)
+        if len(self._items) > window_size:
+            self.tree.delete(*self._items[window_size:])
+            del self._items[window_size:]
+            del self._painted[window_size:]
+
+        self._item_of = {}
+        for position, item in enumerate(self._items):
+            row = self.row(self.first + position)
+            # Unchanged rows are not touched; Tk item updates are the expensive part
+            if row is None or row != self._painted[position]:
+                if row is None:
+                    self.tree.item(item, values=PLACEHOLDER_VALUES, tags=())
+                else:
+                    self.tree.item(item, values=format_entry_row(row), tags=(str(row[0]),))
+                self._painted[position] = row
+            if row is not None:
+                self._item_of[row[0]] = item
+
+        # Items are reused for other rows, so selection and focus follow the rows
+        selected = [self._item_of[self._selected_id]] if self._selected_id in self._item_of else []
+        if tuple(self.tree.selection()) != tuple(selected):
+            self.tree.selection_set(selected)
+        if focus_id in self._item_of:
+            self.tree.focus(self._item_of[focus_id])
+        self._request_missing()
+
+    # Selection
+
+    def on_select(self, event=None):
+        """Remember the selected entry so it stays selected while rows move"""
+        if not self.active:
+            return
+        selection = self.tree.selection()
+        if selection:
+            entry_id = self.entry_id(selection[0])
+            if entry_id is not None:
+                self._selected_id = entry_id
+        elif self._selected_id in self._item_of:
+            # Deselected by the user; a selected row that scrolled out of the window stays selected
+            self._selected_id = None
+
+    def entry_id(self, item) -> Optional[int]:
+        """Entry ID shown by a Treeview item, None for a row still loading"""
+        tags = self.tree.item(item, "tags")
+        return int(tags[0]) if tags else None
+
+    def selected_entry_id(self) -> Optional[int]:
+        """ID of the selected entry, if any, including one scrolled out of the window"""
+        selection = self.tree.selection()
+        if selection:
+            return self.entry_id(selection[0])
+        return self._selected_id
+
+
+class GroupedEntriesView:
+    """Entries grouped per day, week or project, each group opened on demand.
+
+    A collapsed group is one Treeview item showing the subtotals computed by
+    get_entry_groups; its entries are requested through
+    ``load_children(generation, item, group_key, limit)`` when it is opened and
+    handed back through ``children_loaded``. Groups with more than
+    CHILD_LIMIT entries show the newest ones and a note.
+    """
+
+    CHILD_LIMIT = 500
+
+    def __init__(self, tree, load_children: Callable[[int, str, object, int], None]):
+        self.tree = tree
+        self.load_children = load_children
+        self.active = False
+        self.generation = 0
+        self._groups: Dict[str, Tuple] = {}
+        self._loaded = set()
+        self._open = set()
+        self._selected_id = None
+
+        tree.bind("<<TreeviewOpen>>", self.on_open, add="+")
+        tree.bind("<<TreeviewClose>>", self.on_close, add="+")
+        tree.bind("<<TreeviewSelect>>", self.on_select, add="+")
+
+    def attach(self):
+        """Show the tree column holding the group labels"""
+        self.active = True
+        self.tree.configure(show="tree headings")
+
+    def release(self):
+        """Remove the groups and hide the tree column again"""
+        self.show_groups([])
+        self.active = False
+        self._open.clear()
+        self.tree.configure(show="headings")
+
+    def show_groups(self, groups: List[Tuple], keep_open: bool = False):
+        """Replace the groups with get_entry_groups rows; rows of one group in several currencies are merged"""
+        self.generation += 1
+        for item in self._groups:
+            self.tree.delete(item)
+        self._groups = {}
+        self._loaded = set()
+        if not keep_open:
+            self._open.clear()
+            self._selected_id = None
+
+        merged: Dict[object, list] = {}
+        for group_key, label, currency, count, seconds, amount in groups:
+            group = merged.setdefault(group_key, [label, 0, 0, []])
+            group[1] += count
+            group[2] += seconds
+            if amount is not None:
+                group[3].append(f"{amount:.2f} {currency}")
+
+        for group_key, (label, count, seconds, amounts) in merged.items():
+            summary = f"{count} entries" + (f", {', '.join(amounts)}" if amounts else "")
+            is_open = group_key in self._open
+            item = self.tree.insert("", "end", text=str(label), open=is_open,
+                                    values=("", "", summary, "", "", format_seconds(seconds)))
+            # The placeholder child gives the group its expander
+            self.tree.insert(item, "end", values=PLACEHOLDER_VALUES)
+            self._groups[item] = (group_key, count)
+            if is_open:
+                self._request(item)
+
+    def on_open(self, event=None):
+        """Load the entries of the group being opened"""
+        item = self.tree.focus()
+        if item in self._groups:
+            self._open.add(self._groups[item][0])
+            self._request(item)
+
+    def on_close(self, event=None):
+        """Forget a closed group so refreshes leave it closed"""
+        item = self.tree.focus()
+        if item in self._groups:
+            self._open.discard(self._groups[item][0])
+
+    def _request(self, item: str):
+        if item not in self._loaded:
+            self._loaded.add(item)
+            self.load_children(self.generation, item, self._groups[item][0], self.CHILD_LIMIT)
+
+    def children_loaded(self, generation: int, item: str, rows: List[Tuple]):
+        """Deliver the entries requested through ``load_children``; stale generations are ignored"""
+        if generation != self.generation or item not in self._groups:
+            return
+        self.tree.delete(*self.tree.get_children(item))
+        selected = None
+        for row in rows:
+            child = self.tree.insert(item, "end", values=format_entry_row(row), tags=(str(row[0]),))
+            if row[0] == self._selected_id:
+                selected = child
+        hidden = self._groups[item][1] - len(rows)
+        if hidden > 0:
+            self.tree.insert(item, "end", values=("", "", f"{hidden} more entries not shown", "", "", ""))
+        if selected is not None:
+            self.tree.selection_set([selected])
+
+    def on_select(self, event=None):
+        """Remember the selected entry so it is selected again after a refresh"""
+        if not self.active:
+            return
+        entry_id = self.selected_entry_id()
+        if entry_id is not None:
+            self._selected_id = entry_id
+
+    def selected_entry_id(self) -> Optional[int]:
+        """ID of the selected entry; None when a group or nothing is selected"""
+        selection = self.tree.selection()
+        if not selection:
+            return None
+        tags = self.tree.item(selection[0], "tags")
+        return int(tags[0]) if tags else None
@@ -2,25 +2,41 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from datetime import datetime, date, timedelta
 from typing import Optional
-import threading
-import time
+from html import escape
+import json
 import os
 import sqlite3
-import subprocess
 import sys
-import shutil
-import requests
-import json
 
-from .database import TimeTrackerDB
-from .pdf_export import PDFExporter
-from .email_export import EmailExporter
+from .background import RefreshScheduler, TaskCancelled, TaskExecutor
+from .database import TimeTrackerDB, WorkerDB, group_entry_filters
+from .email_body import timesheet_body
+from .entries_view import GroupedEntriesView, VirtualEntriesView
+from .render_cache import RenderCache
+from .report import ReportModel, ReportRow, format_minutes
+
+# reportlab, cryptography, requests and subprocess are imported on first use so
+# the window appears without paying for them; see tests/test_startup.py
 
 class TimeTrackerGUI:
+    # How often to check whether another window or script changed the database
+    CHANGE_POLL_MS = 1000
+    # Live clock redraw interval while the window is shown and while it is iconified
+    CLOCK_TICK_MS = 1000
+    CLOCK_ICONIFIED_TICK_MS = 30000
+    # Filter changes closer together than this load the entries once
+    FILTER_DEBOUNCE_MS = 250
+    # Sort key of get_time_entry_page behind each entries column
+    COLUMN_SORTS = {"Date": "date", "Project": "project", "Description": "description",
+                    "Start": "date", "End": "end", "Duration": "duration"}
+    # "Group By" choices and the get_entry_groups grouping they stand for
+    ENTRY_GROUPINGS = {"None": None, "Day": "day", "Week": "week", "Month": "month", "Project": "project"}
+    
     def __init__(self):
         self.db = TimeTrackerDB()
-        self.pdf_exporter = PDFExporter()
-        self.email_exporter = EmailExporter()
+        self._pdf_exporter = None
+        self._email_exporter = None
+        self._update_checker = None
         
         self.root = tk.Tk()
         self.root.title("Time Tracker")
@@ -32,14 +48,60 @@ class TimeTrackerGUI:
         except Exception:
             pass
         
+        # Queries, exports and update checks run on worker threads; results come back via root.after
+        self.query_db = WorkerDB(self.db.db_path)
+        self.background = TaskExecutor(self.root, on_busy=self.show_busy)
+        # Refresh requests go through here so bursts of them run once
+        self.refreshes = RefreshScheduler(self.root)
+        
         # Timer variables
         self.current_timer = None
         self.timer_running = False
-        self.timer_thread = None
+        self.timer_start = None
+        self._clock_job = None
+        
+        # Filters and changelog position of the entries list, set when it loads
+        self.entry_filters = (None, None, None)
+        self.entry_sort = ("date", True)
+        self.shown_entries_query = (self.entry_filters, self.entry_sort)
+        self.entries_seq = 0
+        self.entry_grouping = None
         
         self.setup_ui()
         self.refresh_projects()
         self.refresh_entries()
+        self.refresh_running_timer()
+        
+        self.root.bind("<Map>", self.on_window_mapped)
+        
+        # Refresh only when the database actually changed
+        self.db.changes.subscribe(self.on_database_changed)
+        self.root.after(self.CHANGE_POLL_MS, self.poll_database_changes)
+    
+    @property
+    def pdf_exporter(self):
+        """PDF exporter, created (and reportlab imported) on first use"""
+        if self._pdf_exporter is None:
+            from .pdf_export import PDFExporter
+            # Compact files: reports are mostly attached to emails and archived
+            self._pdf_exporter = PDFExporter(compact=True)
+        return self._pdf_exporter
+    
+    @pdf_exporter.setter
+    def pdf_exporter(self, exporter):
+        self._pdf_exporter = exporter
+    
+    @property
+    def email_exporter(self):
+        """Email exporter, created (and its config loaded) on first use"""
+        if self._email_exporter is None:
+            from .email_export import EmailExporter
+            self._email_exporter = EmailExporter()
+        return self._email_exporter
+    
+    @email_exporter.setter
+    def email_exporter(self, exporter):
+        self._email_exporter = exporter
     
     def setup_ui(self):
         """Setup the main UI"""
@@ -139,19 +201,30 @@ class TimeTrackerGUI:
         date_combo.grid(row=0, column=3, sticky=tk.W, padx=(0, 5))
         date_combo.bind("<<ComboboxSelected>>", self.on_filter_change)
         
-        ttk.Button(filter_frame, text="Refresh", command=self.refresh_entries).grid(row=0, column=4, padx=(5, 0))
+        ttk.Label(filter_frame, text="Group By:").grid(row=0, column=4, sticky=tk.W, padx=(20, 5))
+        self.group_by_var = tk.StringVar(value="None")
+        group_combo = ttk.Combobox(filter_frame, textvariable=self.group_by_var, state="readonly", width=8)
+        group_combo['values'] = tuple(self.ENTRY_GROUPINGS)
+        group_combo.grid(row=0, column=5, sticky=tk.W, padx=(0, 5))
+        group_combo.bind("<<ComboboxSelected>>", self.on_filter_change)
+        
+        ttk.Button(filter_frame, text="Refresh", command=self.schedule_entries_refresh).grid(row=0, column=6, padx=(5, 0))
         
         # Treeview for entries
         columns = ("Date", "Project", "Description", "Start", "End", "Duration")
         self.entries_tree = ttk.Treeview(entries_frame, columns=columns, show="headings", height=10)
         
         for col in columns:
-            self.entries_tree.heading(col, text=col)
+            self.entries_tree.heading(col, text=col, command=lambda col=col: self.sort_entries(col))
             self.entries_tree.column(col, width=100)
+        # Group labels, shown only while grouping
+        self.entries_tree.heading("#0", text="Group")
+        self.entries_tree.column("#0", width=120)
         
-        # Scrollbar for treeview
-        scrollbar = ttk.Scrollbar(entries_frame, orient=tk.VERTICAL, command=self.entries_tree.yview)
-        self.entries_tree.configure(yscrollcommand=scrollbar.set)
+        # The view keeps only the visible rows in the treeview and drives the scrollbar itself
+        scrollbar = ttk.Scrollbar(entries_frame, orient=tk.VERTICAL)
+        self.entries_view = VirtualEntriesView(self.entries_tree, scrollbar, self.load_entry_rows)
+        self.grouped_view = GroupedEntriesView(self.entries_tree, self.load_group_entries)
         
         self.entries_tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
@@ -165,18 +238,31 @@ class TimeTrackerGUI:
         ttk.Button(export_frame, text="Email Settings", command=self.email_settings).pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(export_frame, text="Edit Entry", command=self.edit_entry).pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(export_frame, text="Delete Entry", command=self.delete_entry).pack(side=tk.LEFT, padx=(0, 5))
-        ttk.Button(export_frame, text="Check for Updates", command=self.check_for_updates).pack(side=tk.LEFT, padx=(0, 5))
+        self.update_button = ttk.Button(export_frame, text="Check for Updates", command=self.check_for_updates)
+        self.update_button.pack(side=tk.LEFT, padx=(0, 5))
+        self.update_status_var = tk.StringVar()
+        ttk.Label(export_frame, textvariable=self.update_status_var).pack(side=tk.LEFT, padx=(5, 0))
+        self.busy_var = tk.StringVar()
+        ttk.Label(export_frame, textvariable=self.busy_var, foreground="gray").pack(side=tk.RIGHT)
     
     def refresh_projects(self):
         """Refresh the projects combobox"""
-        projects = self.db.get_projects()
+        self.background.submit(
+            "projects",
+            lambda cancel: (self.query_db.get_projects(), self.query_db.get_latest_entry_project()),
+            on_done=lambda result: self.show_projects(*result),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to load projects: {e}"),
+            label="Loading projects..."
+        )
+    
+    def show_projects(self, projects, latest_project_id):
+        """Fill the project comboboxes, selecting the project of the latest entry"""
         project_names = [f"{name} (ID: {id})" for id, name, desc, email, rate, currency in projects]
         self.project_combo['values'] = project_names
         self.filter_combo['values'] = ["All Projects"] + project_names
         
         if project_names:
             # Set default project to the project of the latest entry
-            latest_project_id = self.db.get_latest_entry_project()
             if latest_project_id:
                 # Find the index of the latest project
                 for i, (id, name, desc, email, rate, currency) in enumerate(projects):
@@ -193,21 +279,134 @@ class TimeTrackerGUI:
                 self.project_combo.current(0)
                 self.filter_combo.current(0)
     
-    def refresh_entries(self):
-        """Refresh the time entries display"""
-        # Clear existing entries
-        for item in self.entries_tree.get_children():
-            self.entries_tree.delete(item)
+    def reload_project_choices(self):
+        """Reload project names into the comboboxes, keeping the current selections"""
+        self.background.submit(
+            "project_choices", lambda cancel: self.query_db.get_projects(),
+            on_done=self.show_project_choices,
+            label="Loading projects..."
+        )
+    
+    def show_project_choices(self, projects):
+        """Fill the project comboboxes, keeping the current selections"""
+        project_names = [f"{name} (ID: {id})" for id, name, desc, email, rate, currency in projects]
+        project_ids = [id for id, name, desc, email, rate, currency in projects]
+        
+        def selected_index(selection):
+            # Match by ID so a renamed project stays selected
+            try:
+                return project_ids.index(int(selection.split("(ID: ")[1].split(")")[0]))
+            except (IndexError, ValueError):
+                return None
+        
+        project_index = selected_index(self.project_combo.get())
+        filter_index = selected_index(self.filter_combo.get())
+        
+        self.project_combo['values'] = project_names
+        self.filter_combo['values'] = ["All Projects"] + project_names
+        
+        if project_index is not None:
+            self.project_combo.current(project_index)
+        elif project_names:
+            self.project_combo.current(0)
+        else:
+            self.project_combo.set("")
+        
+        if filter_index is not None:
+            self.filter_combo.current(filter_index + 1)  # +1 because filter_combo has "All Projects" at index 0
+        else:
+            self.filter_combo.current(0)
+    
+    def show_busy(self, labels):
+        """Show what is loading and a busy cursor while background work runs"""
+        self.busy_var.set(labels[-1] if labels else "")
+        self.root.config(cursor="watch" if labels else "")
+    
+    def poll_database_changes(self):
+        """Check for commits made by other windows or scripts"""
+        try:
+            self.db.changes.poll()
+        except Exception as e:
+            print(f"Change detection failed: {e}")
+        finally:
+            self.root.after(self.CHANGE_POLL_MS, self.poll_database_changes)
+    
+    def on_database_changed(self):
+        """Reload projects, entries and the timer state after the database changed"""
+        self.schedule_projects_refresh()
+        self.schedule_entries_update()
+        self.refreshes.request("running_timer", self.refresh_running_timer)
+    
+    def refresh_after_write(self, select_latest_project=False):
+        """Reload projects and entries after this window wrote to the database"""
+        # Our own commits bump data_version too; this reload covers them, so the watcher need not
+        self.db.changes.mark_seen()
+        self.schedule_projects_refresh(select_latest_project)
+        self.schedule_entries_update()
+    
+    def schedule_projects_refresh(self, select_latest_project=False):
+        """Reload the project choices once per burst of requests"""
+        if select_latest_project:
+            self.refreshes.request("projects", self.refresh_projects, supersedes="project_choices")
+        else:
+            self.refreshes.request("project_choices", self.reload_project_choices, covered_by="projects")
+    
+    def schedule_entries_refresh(self, delay_ms=0):
+        """Reload the entries list once per burst of requests"""
+        self.refreshes.request("entries", self.refresh_entries, delay_ms=delay_ms, supersedes="entry_updates")
+    
+    def schedule_entries_update(self):
+        """Patch the entries list once per burst of changes, unless it is about to reload anyway"""
+        self.refreshes.request("entry_updates", self.update_entries, covered_by="entries")
+    
+    def refresh_running_timer(self):
+        """Pick up a timer started or stopped by another window or the CLI"""
+        self.background.submit(
+            "running_timer", lambda cancel: self.query_db.get_running_timers(),
+            on_done=self.show_running_timer
+        )
+    
+    def show_running_timer(self, timers):
+        """Match the timer controls to the timer running in the database"""
+        running = None
+        for timer in timers:
+            if timer[0] == self.current_timer or running is None:
+                running = timer
+        
+        if running is None:
+            if self.timer_running:
+                self.timer_running = False
+                self.current_timer = None
+                self.stop_clock()
+                self.start_button.config(state="normal")
+                self.stop_button.config(state="disabled")
+                self.project_combo.config(state="readonly")
+                self.timer_label.config(text="00:00:00")
+            return
         
-        # Get filter values
+        entry_id, project_id, project_name, description, start_time = running
+        if self.timer_running and self.current_timer == entry_id:
+            return
+        self.current_timer = entry_id
+        self.timer_running = True
+        self.project_combo.set(f"{project_name} (ID: {project_id})")
+        self.start_button.config(state="disabled")
+        self.stop_button.config(state="normal")
+        self.project_combo.config(state="disabled")
+        self.start_clock(datetime.fromisoformat(start_time))
+    
+    def get_entry_filters(self):
+        """Get (project_id, project_name, start_date, end_date) from the filter widgets"""
         filter_value = self.filter_combo.get()
         date_range = self.date_range_var.get()
         
         # Determine project filter
         project_id = None
+        project_name = None
         if filter_value and filter_value != "All Projects":
             try:
                 project_id = int(filter_value.split("(ID: ")[1].split(")")[0])
+                project_name = filter_value.split(" (ID:")[0]
             except (IndexError, ValueError):
                 pass
         
@@ -227,55 +426,160 @@ class TimeTrackerGUI:
         elif date_range == "Last 30 Days":
             start_date = today - timedelta(days=30)
         
-        # Get entries
-        entries = self.db.get_time_entries(project_id, start_date, end_date)
+        return project_id, project_name, start_date, end_date
+    
+    def query_entry_page(self, filters, sort, offset, limit, cancel):
+        """Count the filtered entries and fetch one page of them on a worker thread"""
+        with self.query_db.cancellable(cancel):
+            # Read first: changes logged while the page loads are replayed by update_entries
+            seq = self.query_db.get_changelog_seq()
+            total = self.query_db.count_time_entries(*filters)
+            rows = self.query_db.get_time_entry_page(offset, limit, *filters, *sort)
+        cancel.check()
+        return seq, total, rows
+    
+    def sort_entries(self, column):
+        """Sort the entries by a column in the database; clicking the sorted column again reverses it"""
+        sort = self.COLUMN_SORTS[column]
+        if self.entry_sort[0] == sort:
+            self.entry_sort = (sort, not self.entry_sort[1])
+        else:
+            # Dates newest first, everything else from the smallest value
+            self.entry_sort = (sort, sort == "date")
+        for col in self.COLUMN_SORTS:
+            arrow = ""
+            if col == column:
+                arrow = " \u25bc" if self.entry_sort[1] else " \u25b2"
+            self.entries_tree.heading(col, text=col + arrow)
+        # Only the page on screen is fetched again
+        self.schedule_entries_refresh()
+    
+    def refresh_entries(self, keep_position=False):
+        """Refresh the time entries display"""
+        project_id, _, start_date, end_date = self.get_entry_filters()
+        self.entry_filters = (project_id, start_date, end_date)
+        group_by = self.ENTRY_GROUPINGS.get(self.group_by_var.get())
+        if group_by:
+            self.refresh_entry_groups(group_by, keep_position)
+            return
+        if self.grouped_view.active:
+            self.grouped_view.release()
+            self.entries_view.attach()
+            keep_position = False
+        top = self.entries_view.top if keep_position else 0
+        filters, sort = self.entry_filters, self.entry_sort
+        offset, limit = self.entries_view.pages_around(top)
+        # Pages still loading and pending patches belong to the old result
+        self.background.cancel("entry_rows")
+        self.background.cancel("entry_changes")
+        # Replaces (and cancels) any refresh still in flight for older filters
+        self.background.submit(
+            "entries", self.query_entry_page, filters, sort, offset, limit,
+            on_done=lambda result: self.show_entries(result, filters, sort, offset, top, keep_position),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to load entries: {e}"),
+            label="Loading entries..."
+        )
+    
+    def refresh_entry_groups(self, group_by, keep_open=False):
+        """Show one row per group with SQL subtotals; entries load when a group is opened"""
+        if not self.grouped_view.active or self.entry_grouping != group_by:
+            keep_open = False
+        if not self.grouped_view.active:
+            self.entries_view.release()
+            self.grouped_view.attach()
+        self.entry_grouping = group_by
+        self.background.cancel("entry_rows")
+        self.background.cancel("entry_changes")
+        filters = self.entry_filters
+        self.background.submit(
+            "entries", lambda cancel: self.query_with_cancel(
+                cancel, self.query_db.get_entry_groups, group_by, *filters),
+            on_done=lambda groups: self.grouped_view.show_groups(groups, keep_open),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to load entries: {e}"),
+            label="Loading entries..."
+        )
+    
+    def load_group_entries(self, generation, item, group_key, limit):
+        """Fetch the first entries of a group that was opened, in the current sort order"""
+        filters = group_entry_filters(self.entry_grouping, group_key, *self.entry_filters)
+        sort = self.entry_sort
+        if filters is None:
+            self.grouped_view.children_loaded(generation, item, [])
+            return
+        # One key per group, so opening several groups quickly loads them all
+        self.background.submit(
+            f"group_entries:{group_key}", lambda cancel: self.query_with_cancel(
+                cancel, self.query_db.get_time_entry_page, 0, limit, *filters, *sort),
+            on_done=lambda rows: self.grouped_view.children_loaded(generation, item, rows),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to load entries: {e}")
+        )
+    
+    def query_with_cancel(self, cancel, query, *args):
+        """Run a query_db method on a worker thread so that cancel interrupts it"""
+        with self.query_db.cancellable(cancel):
+            result = query(*args)
+        cancel.check()
+        return result
+    
+    def show_entries(self, result, filters, sort, offset, top, keep_position):
+        """Show a freshly loaded page of entries"""
+        self.entries_seq, total, rows = result
+        # More pages must come from the same query, even if the filters changed since
+        self.shown_entries_query = (filters, sort)
+        # Changes are placed by the sort order the rows were loaded in
+        self.entries_view.sort, self.entries_view.descending = sort
+        self.entries_view.reset(total, offset, rows, top, keep_selection=keep_position)
+    
+    def query_entry_changes(self, filters, seq, cancel):
+        """Fetch the entries changed since changelog ``seq`` on a worker thread.
         
-        # Populate treeview
-        for entry in entries:
-            entry_id, proj_id, proj_name, description, start_time, end_time, duration, rate, currency = entry
-            
-            # Format date
-            start_dt = datetime.fromisoformat(start_time)
-            date_str = start_dt.strftime('%Y-%m-%d')
-            
-            # Format times
-            start_time_str = start_dt.strftime('%H:%M')
-            if end_time:
-                end_dt = datetime.fromisoformat(end_time)
-                end_time_str = end_dt.strftime('%H:%M')
-            else:
-                end_time_str = "Running"
-            
-            # Format duration
-            if duration is not None:
-                # Calculate precise duration from timestamps
-                if end_time:
-                    end_dt = datetime.fromisoformat(end_time)
-                    total_seconds = int((end_dt - start_dt).total_seconds())
-                    hours = total_seconds // 3600
-                    minutes = (total_seconds % 3600) // 60
-                    seconds = total_seconds % 60
-                    
-                    if hours > 0:
-                        duration_str = f"{hours}h {minutes}m {seconds}s"
-                    elif minutes > 0:
-                        duration_str = f"{minutes}m {seconds}s"
-                    else:
-                        duration_str = f"{seconds}s"
-                else:
-                    # Fallback to stored duration
-                    hours = duration // 60
-                    minutes = duration % 60
-                    if hours > 0:
-                        duration_str = f"{hours}h {minutes}m"
-                    else:
-                        duration_str = f"{minutes}m"
-            else:
-                duration_str = "Running"
-            
-            self.entries_tree.insert("", "end", values=(
-                date_str, proj_name, description or "", start_time_str, end_time_str, duration_str
-            ), tags=(str(entry_id),))
+        Returns (latest seq, changed entry IDs, their rows matching the
+        filters, filtered entry count); the IDs are None when the list needs a
+        reload instead, because project names changed or too much changed.
+        """
+        with self.query_db.cancellable(cancel):
+            changes = self.query_db.get_changes_since(seq)
+            latest = changes[-1][0] if changes else seq
+            entry_ids = [row_id for _, table, row_id, _ in changes if table == "time_entries"]
+            if (len(entry_ids) > VirtualEntriesView.PAGE_SIZE
+                    or any(table == "projects" and op != "I" for _, table, _, op in changes)):
+                return latest, None, None, None
+            rows = self.query_db.get_time_entries_by_ids(entry_ids, *filters)
+            total = self.query_db.count_time_entries(*filters)
+        cancel.check()
+        return latest, entry_ids, rows, total
+    
+    def update_entries(self):
+        """Patch the entries list with what changed since it was loaded"""
+        if self.grouped_view.active or self.background.running("entries"):
+            # Group subtotals are recomputed in SQL,
+            # and a load in flight may have read the entries before the change
+            self.refresh_entries(keep_position=True)
+            return
+        # Replaces an older update; the new one covers its changes too
+        self.background.submit(
+            "entry_changes", self.query_entry_changes, self.shown_entries_query[0], self.entries_seq,
+            on_done=self.show_entry_changes,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to load entries: {e}")
+        )
+    
+    def show_entry_changes(self, result):
+        """Apply changed entries to the list, falling back to a reload"""
+        seq, entry_ids, rows, total = result
+        if entry_ids is None or not self.entries_view.apply_changes(entry_ids, rows, total):
+            self.refresh_entries(keep_position=True)
+            return
+        self.entries_seq = seq
+    
+    def load_entry_rows(self, generation, offset, limit):
+        """Fetch rows the entries view scrolled to"""
+        filters, sort = self.shown_entries_query
+        self.background.submit(
+            "entry_rows", lambda cancel: self.query_with_cancel(
+                cancel, self.query_db.get_time_entry_page, offset, limit, *filters, *sort),
+            on_done=lambda rows: self.entries_view.rows_loaded(generation, offset, rows),
+            on_error=lambda e: print(f"Failed to load entries: {e}")
+        )
     
     def add_project(self):
         """Add a new project"""
@@ -309,7 +613,7 @@ class TimeTrackerGUI:
             self.project_email_var.set("")
             self.project_rate_var.set("")
             self.project_currency_var.set("EUR")
-            self.refresh_projects()
+            self.refresh_after_write(select_latest_project=True)
         except ValueError as e:
             messagebox.showerror("Error", str(e))
     
@@ -333,7 +637,8 @@ class TimeTrackerGUI:
                     break
             
             if project_details:
-                edit_dialog = ProjectEditDialog(self.root, self.db, project_details, self.refresh_projects)
+                edit_dialog = ProjectEditDialog(self.root, self.db, project_details,
+                                                lambda: self.refresh_after_write(select_latest_project=True))
                 self.root.wait_window(edit_dialog.dialog)
         except (IndexError, ValueError):
             messagebox.showerror("Error", "Invalid project selection")
@@ -360,7 +665,7 @@ class TimeTrackerGUI:
                 conn.close()
                 
                 messagebox.showinfo("Success", f"Project '{project_name}' deleted successfully")
-                self.refresh_projects()
+                self.refresh_after_write(select_latest_project=True)
         except (IndexError, ValueError):
             messagebox.showerror("Error", "Invalid project selection")
         except Exception as e:
@@ -393,9 +698,10 @@ class TimeTrackerGUI:
             self.stop_button.config(state="normal")
             self.project_combo.config(state="disabled")
             
-            # Start timer thread
-            self.timer_thread = threading.Thread(target=self.timer_loop, daemon=True)
-            self.timer_thread.start()
+            # Drive the clock from the stored start time so it matches the database
+            entry = self.db.get_entry(entry_id)
+            self.start_clock(datetime.fromisoformat(entry[4]) if entry else datetime.now())
+            self.refresh_after_write()
             
             messagebox.showinfo("Success", "Timer started")
             
@@ -418,32 +724,9 @@ class TimeTrackerGUI:
                 # Get the actual entry to calculate precise duration
                 entries = self.db.get_time_entries(project_id)
                 if entries:
-                    entry = entries[0]  # Most recent entry
-                    entry_id, proj_id, proj_name, description, start_time, end_time, duration_minutes, rate, currency = entry
-                    if end_time:
-                        start_dt = datetime.fromisoformat(start_time)
-                        end_dt = datetime.fromisoformat(end_time)
-                        total_seconds = int((end_dt - start_dt).total_seconds())
-                        hours = total_seconds // 3600
-                        minutes = (total_seconds % 3600) // 60
-                        seconds = total_seconds % 60
-                        
-                        if hours > 0:
-                            duration_str = f"{hours}h {minutes}m {seconds}s"
-                        elif minutes > 0:
-                            duration_str = f"{minutes}m {seconds}s"
-                        else:
-                            duration_str = f"{seconds}s"
-                    else:
-                        # Fallback to stored duration
-                        hours = duration // 60
-                        minutes = duration % 60
-                        duration_str = f"{hours}h {minutes}m" if hours > 0 else f"{minutes}m"
+                    duration_str = ReportRow(entries[0]).duration  # Most recent entry
                 else:
-                    # Fallback to stored duration
-                    hours = duration // 60
-                    minutes = duration % 60
-                    duration_str = f"{hours}h {minutes}m" if hours > 0 else f"{minutes}m"
+                    duration_str = format_minutes(duration)
                 
                 messagebox.showinfo("Success", f"Timer stopped. Duration: {duration_str}")
             else:
@@ -452,71 +735,76 @@ class TimeTrackerGUI:
             # Reset UI
             self.timer_running = False
             self.current_timer = None
+            self.stop_clock()
             self.start_button.config(state="normal")
             self.stop_button.config(state="disabled")
             self.project_combo.config(state="readonly")
             self.timer_label.config(text="00:00:00")
             
             # Refresh entries
-            self.refresh_entries()
+            self.refresh_after_write()
             
         except (IndexError, ValueError):
             messagebox.showerror("Error", "Invalid project selection")
         except Exception as e:
             messagebox.showerror("Error", str(e))
     
-    def timer_loop(self):
-        """Timer display loop"""
-        start_time = datetime.now()
-        while self.timer_running:
-            elapsed = datetime.now() - start_time
-            hours, remainder = divmod(elapsed.total_seconds(), 3600)
-            minutes, seconds = divmod(remainder, 60)
-            time_str = f"{int(hours):02d}:{int(minutes):02d}:{int(seconds):02d}"
-            
-            self.root.after(0, lambda: self.timer_label.config(text=time_str))
-            time.sleep(1)
+    def start_clock(self, start_time: datetime):
+        """Show the time elapsed since start_time, updated from the Tk event loop"""
+        self.stop_clock()
+        self.timer_start = start_time
+        self.update_clock()
+    
+    def stop_clock(self):
+        """Cancel the pending clock redraw"""
+        if self._clock_job is not None:
+            self.root.after_cancel(self._clock_job)
+            self._clock_job = None
+        self.timer_start = None
+    
+    def update_clock(self):
+        """Redraw the clock and schedule the next redraw just after the next whole second"""
+        self._clock_job = None
+        if not self.timer_running or self.timer_start is None:
+            return
+        
+        elapsed = max(0.0, (datetime.now() - self.timer_start).total_seconds())
+        hours, remainder = divmod(int(elapsed), 3600)
+        minutes, seconds = divmod(remainder, 60)
+        self.timer_label.config(text=f"{hours:02d}:{minutes:02d}:{seconds:02d}")
+        
+        # Nobody sees an iconified window; redraw rarely and catch up on <Map>
+        interval = self.CLOCK_ICONIFIED_TICK_MS if self.root.state() == "iconic" else self.CLOCK_TICK_MS
+        # Aligning to the elapsed-second boundary keeps the display from skipping or repeating seconds
+        delay = interval - int((elapsed % 1) * 1000) + 5
+        self._clock_job = self.root.after(delay, self.update_clock)
+    
+    def on_window_mapped(self, event=None):
+        """Redraw the clock immediately when the window is restored"""
+        if event is not None and event.widget is not self.root:
+            return
+        if self._clock_job is not None:
+            self.root.after_cancel(self._clock_job)
+            self.update_clock()
     
     def on_filter_change(self, event=None):
-        """Handle filter changes"""
-        self.refresh_entries()
+        """Handle filter changes; stepping through a filter with the keyboard loads the entries once"""
+        self.schedule_entries_refresh(self.FILTER_DEBOUNCE_MS)
     
     def export_pdf(self):
         """Export time entries to PDF"""
-        # Get current filter settings
-        filter_value = self.filter_combo.get()
-        date_range = self.date_range_var.get()
-        
-        # Determine project filter
-        project_id = None
-        project_name = None
-        if filter_value and filter_value != "All Projects":
-            try:
-                project_id = int(filter_value.split("(ID: ")[1].split(")")[0])
-                project_name = filter_value.split(" (ID:")[0]
-            except (IndexError, ValueError):
-                pass
-        
-        # Determine date range
-        start_date = None
-        end_date = None
-        today = date.today()
-        
-        if date_range == "Today":
-            start_date = end_date = today
-        elif date_range == "This Week":
-            start_date = today - timedelta(days=today.weekday())
-        elif date_range == "This Month":
-            start_date = today.replace(day=1)
-        elif date_range == "Last 7 Days":
-            start_date = today - timedelta(days=7)
-        elif date_range == "Last 30 Days":
-            start_date = today - timedelta(days=30)
-        
-        # Get entries
-        entries = self.db.get_time_entries(project_id, start_date, end_date)
-        
-        if not entries:
+        filters = self.get_entry_filters()
+        project_id, project_name, start_date, end_date = filters
+        self.background.submit(
+            "export", self.query_with_cancel, self.query_db.count_time_entries, project_id, start_date, end_date,
+            on_done=lambda count: self.save_pdf(count, *filters),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to export PDF: {e}"),
+            label="Loading entries..."
+        )
+    
+    def save_pdf(self, count, project_id, project_name, start_date, end_date):
+        """Ask where to save the report, then build the PDF on a worker thread with a progress dialog"""
+        if not count:
             messagebox.showwarning("Warning", "No time entries found to export")
             return
         
@@ -533,13 +821,37 @@ class TimeTrackerGUI:
         )
         
         if filename:
-            try:
-                self.pdf_exporter.export_time_report(
-                    entries, filename, project_name, start_date, end_date
-                )
-                messagebox.showinfo("Success", f"PDF exported to {filename}")
-            except Exception as e:
+            pdf_exporter = self.pdf_exporter
+            db = self.db
+            # Cancelling stops the export at its next chunk of rows; the file is only renamed into place when complete
+            dialog = ProgressDialog(self.root, "Exporting PDF", count, lambda: self.background.cancel("export"))
+            
+            def report_progress(done, total):
+                self.background.post(dialog.show_progress, done)
+            
+            def write_pdf(cancel):
+                # The same report over unchanged data is copied from the render cache
+                cache = RenderCache.for_db(db)
+                key = cache.key("pdf", db.get_changelog_seq(), project_id, start_date, end_date,
+                                project_name=project_name, fast=pdf_exporter.fast,
+                                compact=pdf_exporter.compact, streamed=True)
+                if not cache.copy_to(key, filename):
+                    # Entries are read in batches while the PDF is written, so a year of them fits in memory
+                    report = ReportModel.stream_query(db, project_id, start_date, end_date)
+                    pdf_exporter.export_time_report(report, filename, project_name, start_date, end_date,
+                                                    progress=report_progress, cancel=cancel)
+                    cache.put_file(key, filename)
+                return os.path.getsize(filename)
+            
+            def on_done(size):
+                dialog.close()
+                messagebox.showinfo("Success", f"PDF exported to {filename} ({size / 1024:.0f} KB)")
+            
+            def on_error(e):
+                dialog.close()
                 messagebox.showerror("Error", f"Failed to export PDF: {e}")
+            
+            self.background.submit("export", write_pdf, on_done=on_done, on_error=on_error, label="Exporting PDF...")
     
     def email_settings(self):
         """Configure email settings"""
@@ -559,19 +871,22 @@ class TimeTrackerGUI:
                 pass
         
         # Create weekly report dialog with reflection
-        weekly_dialog = WeeklyReportDialog(self.root, self.db, self.pdf_exporter, self.email_exporter, project_emails)
+        weekly_dialog = WeeklyReportDialog(self.root, self.db, self.pdf_exporter, self.email_exporter, project_emails,
+                                           background=self.background)
         self.root.wait_window(weekly_dialog.dialog)
     
+    def selected_entry_id(self):
+        """ID of the entry selected in the flat or grouped list"""
+        view = self.grouped_view if self.grouped_view.active else self.entries_view
+        return view.selected_entry_id()
+    
     def edit_entry(self):
         """Edit selected time entry"""
-        selection = self.entries_tree.selection()
-        if not selection:
+        entry_id = self.selected_entry_id()
+        if entry_id is None:
             messagebox.showerror("Error", "Please select an entry to edit")
             return
         
-        item = self.entries_tree.item(selection[0])
-        entry_id = int(item['tags'][0])
-        
         # Get the entry details
         entry = self.db.get_entry(entry_id)
         if not entry:
@@ -579,151 +894,88 @@ class TimeTrackerGUI:
             return
         
         # Create edit dialog
-        edit_dialog = EditEntryDialog(self.root, self.db, entry, self.refresh_entries)
+        edit_dialog = EditEntryDialog(self.root, self.db, entry, self.refresh_after_write)
         self.root.wait_window(edit_dialog.dialog)
     
     def delete_entry(self):
         """Delete selected time entry"""
-        selection = self.entries_tree.selection()
-        if not selection:
+        entry_id = self.selected_entry_id()
+        if entry_id is None:
             messagebox.showerror("Error", "Please select an entry to delete")
             return
         
-        item = self.entries_tree.item(selection[0])
-        entry_id = int(item['tags'][0])
-        
         if messagebox.askyesno("Confirm", "Are you sure you want to delete this entry?"):
             if self.db.delete_entry(entry_id):
                 messagebox.showinfo("Success", "Entry deleted successfully")
-                self.refresh_entries()
+                self.refresh_after_write()
             else:
                 messagebox.showerror("Error", "Failed to delete entry")
     
-    def check_for_updates(self):
-        """Check for updates from PyPI"""
-        try:
-            # Get current version
-            current_version = self._get_current_version()
-            if not current_version:
-                messagebox.showerror("Error", "Could not determine current version")
-                return
-            
-            # Get latest version from PyPI
-            latest_version = self._get_latest_version()
-            if not latest_version:
-                messagebox.showerror("Error", "Could not check for updates. Please check your internet connection.")
-                return
-            
-            # Compare versions
-            if self._version_tuple(current_version) < self._version_tuple(latest_version):
-                self._run_upgrade_and_prompt_restart(latest_version)
-            else:
-                messagebox.showinfo("Updates", f"You are running the latest version ({current_version})")
-        
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to check for updates: {str(e)}")
-    
-    def _get_current_version(self):
-        """Get current version from package metadata"""
-        try:
-            import pkg_resources
-            return pkg_resources.get_distribution("timetracking").version
-        except:
-            # Fallback to reading from setup.py or pyproject.toml
-            try:
-                with open("pyproject.toml", "r") as f:
-                    content = f.read()
-                    for line in content.split("\n"):
-                        if line.strip().startswith("version ="):
-                            return line.split("=")[1].strip().strip('"')
-            except:
-                return "1.0.39"  # Fallback version
+    @property
+    def update_checker(self):
+        """Update checker, created on first use"""
+        if self._update_checker is None:
+            from .updates import UpdateChecker
+            self._update_checker = UpdateChecker()
+        return self._update_checker
     
-    def _get_latest_version(self):
-        """Get latest version from PyPI"""
-        try:
-            response = requests.get("https://pypi.org/pypi/timetracking/json", timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                return data["info"]["version"]
-            return None
-        except:
-            return None
-    
-    def _version_tuple(self, version_str):
-        """Convert version string to tuple for comparison"""
-        try:
-            return tuple(map(int, version_str.split(".")))
-        except:
-            return (0, 0, 0)
-    
-    def _run_upgrade_and_prompt_restart(self, target_version):
-        """Run upgrade and prompt for restart"""
-        result = messagebox.askyesno(
-            "Update Available", 
-            f"Version {target_version} is available. Would you like to update now?"
+    def check_for_updates(self):
+        """Check for updates from PyPI without blocking the window"""
+        self.update_button.state(["disabled"])
+        self.update_status_var.set("Checking for updates...")
+        self.background.run(
+            self.update_checker.check,
+            on_done=self._on_update_checked,
+            on_error=self._on_update_failed
         )
-        
-        if result:
-            if self._attempt_upgrade(target_version):
-                self._post_upgrade_dialog(target_version)
-            else:
-                messagebox.showerror("Update Failed", "Failed to update. Please try again later.")
     
-    def _attempt_upgrade(self, target_version):
-        """Attempt to upgrade the package"""
-        try:
-            # Check if running under pipx
-            if shutil.which('timetracking'):
-                # Running under pipx
-                cmd = ['pipx', 'upgrade', 'timetracking']
-            else:
-                # Running under regular pip
-                cmd = [sys.executable, '-m', 'pip', 'install', '--upgrade', '--no-cache-dir', f'timetracking=={target_version}']
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
-            return result.returncode == 0
-        except Exception as e:
-            print(f"Upgrade failed: {e}")
-            return False
+    def _on_update_checked(self, result):
+        """Show the result of an update check"""
+        self.update_button.state(["!disabled"])
+        self.update_status_var.set("")
+        
+        if not result["current"]:
+            messagebox.showerror("Error", "Could not determine current version")
+        elif result["update_available"]:
+            if messagebox.askyesno(
+                "Update Available",
+                f"Version {result['latest']} is available. Would you like to update now?"
+            ):
+                self.update_button.state(["disabled"])
+                self.background.run(
+                    self.update_checker.upgrade, result["latest"],
+                    on_done=self._on_upgrade_done,
+                    on_error=self._on_update_failed,
+                    on_progress=self.update_status_var.set
+                )
+        else:
+            messagebox.showinfo("Updates", f"You are running the latest version ({result['current']})")
     
-    def _post_upgrade_dialog(self, target_version):
-        """Show dialog after upgrade with retry logic"""
-        import time
-        max_wait_time = 60  # 1 minute
-        start_time = time.time()
-        attempt = 0
-        
-        while time.time() - start_time < max_wait_time:
-            attempt += 1
-            
-            # Try to upgrade
-            if self._attempt_upgrade(target_version):
-                # Check if version was actually updated
-                time.sleep(2)  # Brief pause for installation to complete
-                current_version = self._get_current_version()
-                if current_version and self._version_tuple(current_version) >= self._version_tuple(target_version):
-                    # Version successfully updated
-                    result = messagebox.askyesno(
-                        "Restart Required", 
-                        f"Successfully updated to version {current_version} (attempt {attempt}). Restart the application now?"
-                    )
-                    if result:
-                        self._restart_app()
-                    return
-            
-            # Wait a bit before next attempt
-            time.sleep(5)
-        
-        # Timeout - version not updated after all attempts
-        messagebox.showerror(
-            "Update Failed", 
-            f"Package was not updated to version {target_version} after {attempt} attempts. "
-            f"PyPI may not have propagated yet. Please try again in a few minutes."
-        )
+    def _on_upgrade_done(self, version):
+        """Offer a restart once the new version is installed"""
+        self.update_button.state(["!disabled"])
+        self.update_status_var.set("")
+        if messagebox.askyesno(
+            "Restart Required",
+            f"Successfully updated to version {version}. Restart the application now?"
+        ):
+            self._restart_app()
+    
+    def _on_update_failed(self, error):
+        """Report a failed update check or upgrade"""
+        self.update_button.state(["!disabled"])
+        self.update_status_var.set("")
+        if isinstance(error, RuntimeError):
+            messagebox.showerror("Update Failed", str(error))
+        elif isinstance(error, OSError):
+            messagebox.showerror("Error", "Could not check for updates. Please check your internet connection.")
+        else:
+            messagebox.showerror("Error", f"Failed to check for updates: {str(error)}")
     
     def _restart_app(self):
         """Restart the application"""
+        import shutil
+        import subprocess
         try:
             # Check if running under pipx
             if shutil.which('timetracking'):
@@ -742,13 +994,18 @@ class TimeTrackerGUI:
     def run(self):
         """Start the GUI application"""
         self.root.mainloop()
+        # Abort queries still in flight so the worker pool does not hold up exit
+        self.background.shutdown()
+        self.query_db.close()
 
 class EmailDialog:
-    def __init__(self, parent, db, pdf_exporter, email_exporter, project_emails=None):
+    def __init__(self, parent, db, pdf_exporter, email_exporter, project_emails=None, *, background):
         self.db = db
         self.pdf_exporter = pdf_exporter
         self.email_exporter = email_exporter
         self.project_emails = project_emails or []
+        # PDF builds and SMTP sessions run on the main window's shared TaskExecutor
+        self.background = background
         
         self.dialog = tk.Toplevel(parent)
         self.dialog.title("Send Email Report")
@@ -829,7 +1086,8 @@ class EmailDialog:
         button_frame = ttk.Frame(main_frame)
         button_frame.grid(row=7, column=0, columnspan=2, pady=(20, 0))
         
-        ttk.Button(button_frame, text="Send", command=self.send_email_report).pack(side=tk.LEFT, padx=(0, 5))
+        self.send_button = ttk.Button(button_frame, text="Send", command=self.send_email_report)
+        self.send_button.pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(button_frame, text="Email Settings", command=self.open_settings).pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(button_frame, text="Cancel", command=self.dialog.destroy).pack(side=tk.LEFT)
     
@@ -876,48 +1134,67 @@ class EmailDialog:
             messagebox.showerror("Error", "Please select at least one email or enter a custom email")
             return
         
-        try:
-            # Get time entries from database
-            time_entries = self.db.get_time_entries()
-            
-            # Generate PDF if requested
-            pdf_path = None
-            if self.include_pdf.get():
-                import tempfile
-                with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp_file:
-                    pdf_path = tmp_file.name
-                    self.pdf_exporter.export_time_report(time_entries, pdf_path)
-            
-            # Send email to all selected recipients
-            success_count = 0
-            for recipient in selected_emails:
-                try:
-                    success = self.email_exporter.send_time_report(
-                        time_entries,
-                        self.email_exporter.sender_email,
-                        self.email_exporter.sender_password,
-                        recipient,
-                        pdf_path=pdf_path
-                    )
-                    if success:
-                        success_count += 1
-                except Exception as e:
-                    print(f"Failed to send to {recipient}: {str(e)}")
-            
-            if success_count > 0:
-                messagebox.showinfo("Success", f"Email sent successfully to {success_count} recipient(s)!")
-                self.dialog.destroy()
-            else:
-                messagebox.showerror("Error", "Failed to send email to any recipients")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to send email: {str(e)}")
-        finally:
-            # Clean up temporary PDF file
-            if pdf_path and os.path.exists(pdf_path):
-                try:
-                    os.unlink(pdf_path)
-                except:
-                    pass  # Ignore cleanup errors
+        include_pdf = self.include_pdf.get()
+        self.send_button.state(["disabled"])
+        self.background.submit(
+            "email", self.deliver_email_report, selected_emails, include_pdf,
+            on_done=self.on_email_sent,
+            on_error=self.on_email_failed,
+            label="Sending email..."
+        )
+    
+    def deliver_email_report(self, recipients, include_pdf, cancel):
+        """Build the report and send it to each recipient; runs on a worker thread"""
+        # Built once for the PDF and every recipient's email body
+        seq = self.db.get_changelog_seq()
+        time_entries = ReportModel.from_query(self.db)
+        
+        # Rendered in memory once, or taken from the render cache, and attached as is to every email
+        pdf_data = None
+        if include_pdf:
+            pdf_data = RenderCache.for_db(self.db).fetch(
+                RenderCache.key("pdf", seq, None, None, None, project_name=None,
+                                fast=self.pdf_exporter.fast, compact=self.pdf_exporter.compact),
+                lambda: self.pdf_exporter.render_time_report(time_entries, cancel=cancel)
+            )
+        
+        # Send email to all selected recipients
+        success_count = 0
+        for recipient in recipients:
+            cancel.check()
+            try:
+                success = self.email_exporter.send_time_report(
+                    time_entries,
+                    self.email_exporter.sender_email,
+                    self.email_exporter.sender_password,
+                    recipient,
+                    pdf_data=pdf_data,
+                    cancel=cancel
+                )
+                if success:
+                    success_count += 1
+            except TaskCancelled:
+                raise
+            except Exception as e:
+                print(f"Failed to send to {recipient}: {str(e)}")
+        return success_count
+    
+    def on_email_sent(self, success_count):
+        """Report the result of send_email_report"""
+        if not self.dialog.winfo_exists():
+            return
+        self.send_button.state(["!disabled"])
+        if success_count > 0:
+            messagebox.showinfo("Success", f"Email sent successfully to {success_count} recipient(s)!")
+            self.dialog.destroy()
+        else:
+            messagebox.showerror("Error", "Failed to send email to any recipients")
+    
+    def on_email_failed(self, error):
+        """Report an error raised while sending"""
+        if self.dialog.winfo_exists():
+            self.send_button.state(["!disabled"])
+        messagebox.showerror("Error", f"Failed to send email: {str(error)}")
 
 class ProjectEditDialog:
     def __init__(self, parent, db, project_details, refresh_callback):
@@ -1388,11 +1665,13 @@ class EditEntryDialog:
             messagebox.showerror("Error", f"Failed to update entry: {e}")
 
 class WeeklyReportDialog:
-    def __init__(self, parent, db, pdf_exporter, email_exporter, project_emails=None):
+    def __init__(self, parent, db, pdf_exporter, email_exporter, project_emails=None, *, background):
         self.db = db
         self.pdf_exporter = pdf_exporter
         self.email_exporter = email_exporter
         self.project_emails = project_emails or []
+        # Queries, PDF builds and SMTP sessions run on the main window's shared TaskExecutor
+        self.background = background
         
         self.dialog = tk.Toplevel(parent)
         self.dialog.title("Weekly Report with Reflection")
@@ -1499,7 +1778,8 @@ class WeeklyReportDialog:
         button_frame = ttk.Frame(main_frame)
         button_frame.grid(row=10, column=0, columnspan=2, pady=(20, 0))
         
-        ttk.Button(button_frame, text="Send Weekly Report", command=self.send_weekly_report).pack(side=tk.LEFT, padx=(0, 5))
+        self.send_button = ttk.Button(button_frame, text="Send Weekly Report", command=self.send_weekly_report)
+        self.send_button.pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(button_frame, text="Email Settings", command=self.open_settings).pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(button_frame, text="Cancel", command=self.dialog.destroy).pack(side=tk.LEFT)
     
@@ -1549,190 +1829,118 @@ class WeeklyReportDialog:
                 messagebox.showerror("Error", "Please provide your weekly reflection")
                 return
         
-        try:
-            # Get time entries for the current week
-            today = datetime.now().date()
-            start_of_week = today - timedelta(days=today.weekday())
-            end_of_week = start_of_week + timedelta(days=6)
-            
-            # Get entries for the week
-            entries = self.db.get_time_entries()
-            weekly_entries = []
-            for entry in entries:
-                entry_date = datetime.fromisoformat(entry[4]).date()  # start_time
-                if start_of_week <= entry_date <= end_of_week:
-                    weekly_entries.append(entry)
-            
-            if not weekly_entries:
-                messagebox.showwarning("Warning", "No time entries found for this week")
-                return
-            
-            # Create email content with reflection
-            subject = f"Weekly Report - Week of {start_of_week.strftime('%B %d, %Y')}"
-            
-            # Generate timesheet content
-            timesheet_content = self.generate_timesheet_content(weekly_entries)
-            
-            # Generate HTML formatted email
-            html_timesheet = self.generate_html_timesheet(weekly_entries)
-            
-            # Combine timesheet and reflection in HTML format
-            email_body = f"""
-            <div style='font-family: Arial, sans-serif; line-height: 1.6; color: #333;'>
-                <p>Please find attached my weekly timesheet for the week of {start_of_week.strftime('%B %d, %Y')}.</p>
-                
-                {html_timesheet}
-                """
-            
-            # Add reflection section only if enabled
-            if self.include_reflection.get() and reflection_content:
-                email_body += f"""
-                <div style='margin-top: 30px; padding: 20px; background-color: #f8f9fa; border-left: 4px solid #3498db;'>
-                    <h3 style='color: #2c3e50; margin-top: 0; margin-bottom: 15px;'>WEEKLY REFLECTION:</h3>
-                    <div style='white-space: pre-line; font-size: 14px;'>{reflection_content}</div>
-                </div>
-                """
-            
-            email_body += f"""
-                
-                <p style='margin-top: 30px;'>Best regards,<br>{getattr(self.email_exporter, 'student_name', 'User')}</p>
-            </div>
-            """
-            
-            # Send email using the existing send_time_report method
-            # We need to create a custom email with the reflection content
-            success = self.send_custom_email(
-                selected_emails,
-                subject,
-                email_body,
-                weekly_entries if self.include_pdf.get() else None
+        include_pdf = self.include_pdf.get()
+        include_reflection = self.include_reflection.get()
+        self.send_button.state(["disabled"])
+        self.background.submit(
+            "email", self.deliver_weekly_report, selected_emails, reflection_content,
+            include_reflection, include_pdf,
+            on_done=self.on_report_sent,
+            on_error=self.on_report_failed,
+            label="Sending weekly report..."
+        )
+    
+    def deliver_weekly_report(self, recipients, reflection_content, include_reflection, include_pdf, cancel):
+        """Collect this week's entries, build the email and send it; runs on a worker thread.
+        
+        Returns None when there is nothing to send, otherwise whether sending succeeded.
+        """
+        # Get time entries for the current week
+        today = datetime.now().date()
+        start_of_week = today - timedelta(days=today.weekday())
+        end_of_week = start_of_week + timedelta(days=6)
+        
+        # One report feeds both the HTML timesheet and the PDF
+        seq = self.db.get_changelog_seq()
+        report = ReportModel.from_query(self.db, None, start_of_week, end_of_week)
+        if not report.rows:
+            return None
+        cancel.check()
+        
+        # Create email content with reflection
+        subject = f"Weekly Report - Week of {start_of_week.strftime('%B %d, %Y')}"
+        
+        # HTML and plain-text timesheet in one pass; both renderings come from the cache while the week is unchanged
+        cache = RenderCache.for_db(self.db)
+        html_timesheet, text_timesheet = json.loads(cache.fetch(
+            RenderCache.key("weekly-body", seq, start_of_week, end_of_week),
+            lambda: json.dumps(timesheet_body(report, text=True, cancel=cancel)).encode("utf-8")
+        ))
+        
+        # Combine timesheet and reflection
+        week = start_of_week.strftime('%B %d, %Y')
+        sender_name = getattr(self.email_exporter, 'student_name', 'User')
+        html_parts = [
+            "<div style='font-family: Arial, sans-serif; line-height: 1.6; color: #333;'>\n",
+            f"<p>Please find attached my weekly timesheet for the week of {week}.</p>\n",
+            html_timesheet
+        ]
+        text_parts = [f"Please find attached my weekly timesheet for the week of {week}.\n\n", text_timesheet]
+        
+        # Add reflection section only if enabled
+        if include_reflection and reflection_content:
+            html_parts.append(
+                "<div style='margin-top: 30px; padding: 20px; background-color: #f8f9fa; border-left: 4px solid #3498db;'>\n"
+                "<h3 style='color: #2c3e50; margin-top: 0; margin-bottom: 15px;'>WEEKLY REFLECTION:</h3>\n"
+                f"<div style='white-space: pre-line; font-size: 14px;'>{escape(reflection_content)}</div>\n"
+                "</div>\n"
             )
-            
-            if success:
-                messagebox.showinfo("Success", "Weekly report sent successfully!")
-                self.dialog.destroy()
-            else:
-                messagebox.showerror("Error", "Failed to send weekly report")
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to send weekly report: {str(e)}")
+            text_parts.append(f"\nWEEKLY REFLECTION:\n{reflection_content}\n")
+        
+        html_parts.append(f"<p style='margin-top: 30px;'>Best regards,<br>{escape(str(sender_name))}</p>\n</div>\n")
+        text_parts.append(f"\nBest regards,\n{sender_name}\n")
+        
+        return self.send_custom_email(
+            recipients,
+            subject,
+            "".join(html_parts),
+            report if include_pdf else None,
+            pdf_key=RenderCache.key("pdf", seq, None, start_of_week, end_of_week,
+                                    project_name=None, fast=self.pdf_exporter.fast,
+                                    compact=self.pdf_exporter.compact),
+            cancel=cancel,
+            text_body="".join(text_parts)
+        )
+    
+    def on_report_sent(self, success):
+        """Report the result of send_weekly_report"""
+        if not self.dialog.winfo_exists():
+            return
+        self.send_button.state(["!disabled"])
+        if success is None:
+            messagebox.showwarning("Warning", "No time entries found for this week")
+        elif success:
+            messagebox.showinfo("Success", "Weekly report sent successfully!")
+            self.dialog.destroy()
+        else:
+            messagebox.showerror("Error", "Failed to send weekly report")
+    
+    def on_report_failed(self, error):
+        """Report an error raised while building or sending the report"""
+        if self.dialog.winfo_exists():
+            self.send_button.state(["!disabled"])
+        messagebox.showerror("Error", f"Failed to send weekly report: {str(error)}")
     
     def generate_timesheet_content(self, entries):
         """Generate timesheet content for email"""
-        content = "TIMESHEET SUMMARY:\n\n"
-        
-        total_hours = 0
-        for entry in entries:
-            entry_id, project_id, project_name, description, start_time, end_time, duration, rate, currency = entry
-            
-            # Format dates and times
-            start_dt = datetime.fromisoformat(start_time)
-            date_str = start_dt.strftime('%Y-%m-%d')
-            start_time_str = start_dt.strftime('%H:%M')
-            
-            if end_time:
-                end_dt = datetime.fromisoformat(end_time)
-                end_time_str = end_dt.strftime('%H:%M')
-            else:
-                end_time_str = "Running"
-            
-            # Format duration
-            if duration is not None:
-                hours = duration // 60
-                minutes = duration % 60
-                if hours > 0:
-                    duration_str = f"{hours}h {minutes}m"
-                else:
-                    duration_str = f"{minutes}m"
-                total_hours += duration / 60.0
-            else:
-                duration_str = "Running"
-            
-            content += f"Date: {date_str}\n"
-            content += f"Project: {project_name}\n"
-            content += f"Description: {description or 'N/A'}\n"
-            content += f"Time: {start_time_str} - {end_time_str}\n"
-            content += f"Duration: {duration_str}\n\n"
-        
-        content += f"Total Hours: {total_hours:.1f}\n"
-        return content
-    
-    def generate_html_timesheet(self, entries):
-        """Generate HTML formatted timesheet for email"""
-        html = """
-        <h3 style='color: #2c3e50; margin-bottom: 15px;'>TIMESHEET SUMMARY:</h3>
-        <table border='1' cellpadding='8' cellspacing='0' style='border-collapse: collapse; width: 100%; font-family: Arial, sans-serif; font-size: 14px;'>
-        <thead>
-            <tr style='background-color: #34495e; color: white; font-weight: bold;'>
-                <th style='padding: 10px; text-align: left;'>Date</th>
-                <th style='padding: 10px; text-align: left;'>Project</th>
-                <th style='padding: 10px; text-align: left;'>Description</th>
-                <th style='padding: 10px; text-align: left;'>Time</th>
-                <th style='padding: 10px; text-align: left;'>Duration</th>
-            </tr>
-        </thead>
-        <tbody>
-        """
+        return timesheet_body(entries, text=True)[1]
+    
+    def generate_html_timesheet(self, entries, progress=None, cancel=None):
+        """Generate HTML formatted timesheet for email; progress and cancel as in EmailExporter._create_email_body"""
+        return timesheet_body(entries, progress=progress, cancel=cancel)[0]
+    
+    def send_custom_email(self, recipients, subject, body, time_entries=None, pdf_key=None, cancel=None,
+                          text_body=None):
+        """Send custom email with optional PDF attachment; pdf_key looks the PDF up in the render cache.
         
-        total_hours = 0
-        for entry in entries:
-            entry_id, project_id, project_name, description, start_time, end_time, duration, rate, currency = entry
-            
-            # Format dates and times
-            start_dt = datetime.fromisoformat(start_time)
-            date_str = start_dt.strftime('%Y-%m-%d')
-            start_time_str = start_dt.strftime('%H:%M')
-            
-            if end_time:
-                end_dt = datetime.fromisoformat(end_time)
-                end_time_str = end_dt.strftime('%H:%M')
-            else:
-                end_time_str = "Running"
-            
-            # Format duration
-            if duration is not None:
-                hours = duration // 60
-                minutes = duration % 60
-                if hours > 0:
-                    duration_str = f"{hours}h {minutes}m"
-                else:
-                    duration_str = f"{minutes}m"
-                total_hours += duration / 60.0
-            else:
-                duration_str = "Running"
-            
-            html += f"""
-            <tr style='background-color: #f8f9fa; border-bottom: 1px solid #dee2e6;'>
-                <td style='padding: 10px; border-right: 1px solid #dee2e6;'>{date_str}</td>
-                <td style='padding: 10px; border-right: 1px solid #dee2e6; font-weight: bold; color: #2c3e50;'>{project_name}</td>
-                <td style='padding: 10px; border-right: 1px solid #dee2e6;'>{description or 'N/A'}</td>
-                <td style='padding: 10px; border-right: 1px solid #dee2e6;'>{start_time_str} - {end_time_str}</td>
-                <td style='padding: 10px; font-weight: bold; color: #27ae60;'>{duration_str}</td>
-            </tr>
-            """
-        
-        html += f"""
-        </tbody>
-        <tfoot>
-            <tr style='background-color: #3498db; color: white; font-weight: bold; font-size: 16px;'>
-                <td colspan='4' style='padding: 15px; text-align: right;'>Total Hours:</td>
-                <td style='padding: 15px; text-align: center; font-size: 18px;'>{total_hours:.1f}</td>
-            </tr>
-        </tfoot>
-        </table>
+        text_body, when given, is sent as the plain-text alternative of the HTML body.
+        A cancel token that fires while the PDF is rendered stops the send with TaskCancelled.
         """
-        return html
-    
-    def send_custom_email(self, recipients, subject, body, time_entries=None):
-        """Send custom email with optional PDF attachment"""
         try:
             import smtplib
             from email.mime.text import MIMEText
             from email.mime.multipart import MIMEMultipart
-            from email.mime.base import MIMEBase
-            from email import encoders
-            import tempfile
-            import os
+            from .email_export import pdf_attachment
             
             # Create message
             msg = MIMEMultipart()
@@ -1740,35 +1948,28 @@ class WeeklyReportDialog:
             msg['To'] = ', '.join(recipients)
             msg['Subject'] = subject
             
-            # Add body as HTML with proper content type
+            # Add body as HTML with proper content type, after its plain-text alternative if there is one
             html_body = MIMEText(body, 'html', 'utf-8')
-            msg.attach(html_body)
+            if text_body is None:
+                msg.attach(html_body)
+            else:
+                alternative = MIMEMultipart('alternative')
+                alternative.attach(MIMEText(text_body, 'plain', 'utf-8'))
+                alternative.attach(html_body)
+                msg.attach(alternative)
             
-            # Add PDF attachment if requested and entries provided
-            if time_entries and self.include_pdf.get():
+            # Add PDF attachment if entries were provided
+            if time_entries:
                 try:
-                    # Create temporary PDF
-                    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
-                        pdf_path = temp_file.name
-                    
-                    # Generate PDF
-                    self.pdf_exporter.export_time_report(time_entries, pdf_path)
-                    
-                    # Attach PDF
-                    with open(pdf_path, "rb") as attachment:
-                        part = MIMEBase('application', 'octet-stream')
-                        part.set_payload(attachment.read())
-                    
-                    encoders.encode_base64(part)
-                    part.add_header(
-                        'Content-Disposition',
-                        f'attachment; filename= weekly_report.pdf'
-                    )
-                    msg.attach(part)
-                    
-                    # Clean up temp file
-                    os.unlink(pdf_path)
-                    
+                    def render():
+                        return self.pdf_exporter.render_time_report(time_entries, cancel=cancel)
+                    if pdf_key is None:
+                        pdf_data = render()
+                    else:
+                        pdf_data = RenderCache.for_db(self.db).fetch(pdf_key, render)
+                    msg.attach(pdf_attachment(pdf_data, 'weekly_report.pdf'))
+                except TaskCancelled:
+                    raise
                 except Exception as e:
                     print(f"Warning: Could not attach PDF: {e}")
             
@@ -1783,10 +1984,53 @@ class WeeklyReportDialog:
             
             return True
             
+        except TaskCancelled:
+            raise
         except Exception as e:
             print(f"Email sending failed: {e}")
             return False
 
+class ProgressDialog:
+    """Modal progress bar for a background task, with a Cancel button"""
+    
+    def __init__(self, parent, title, total, on_cancel):
+        self.total = total
+        self.on_cancel = on_cancel
+        
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title(title)
+        self.dialog.resizable(False, False)
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+        self.dialog.geometry("+%d+%d" % (parent.winfo_rootx() + 50, parent.winfo_rooty() + 50))
+        # Closing the window cancels the task as well
+        self.dialog.protocol("WM_DELETE_WINDOW", self.cancel)
+        
+        main_frame = ttk.Frame(self.dialog, padding="20")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        self.status_var = tk.StringVar(value=f"Preparing {total} entries...")
+        ttk.Label(main_frame, textvariable=self.status_var).pack(anchor=tk.W, pady=(0, 10))
+        self.progress_bar = ttk.Progressbar(main_frame, length=300, mode="determinate", maximum=max(total, 1))
+        self.progress_bar.pack(fill=tk.X, pady=(0, 10))
+        ttk.Button(main_frame, text="Cancel", command=self.cancel).pack()
+    
+    def show_progress(self, done):
+        """Show how many of the entries are done; progress posted after closing is ignored"""
+        if not self.dialog.winfo_exists():
+            return
+        self.progress_bar["value"] = done
+        self.status_var.set(f"{done} of {self.total} entries")
+    
+    def cancel(self):
+        """Cancel the task and close"""
+        self.on_cancel()
+        self.close()
+    
+    def close(self):
+        if self.dialog.winfo_exists():
+            self.dialog.grab_release()
+            self.dialog.destroy()
+
 class EmailSettingsDialog:
     def __init__(self, parent, email_exporter):
         self.email_exporter = email_exporter
@@ -6,11 +6,18 @@ A Python-based time tracking application with GUI, SQLite database, and PDF/Emai
 
 import sys
 import os
-from .gui import TimeTrackerGUI
 
 def main():
     """Main entry point for the Time Tracker application"""
+    if len(sys.argv) > 1:
+        # Subcommands run headless; only a bare `timetracking` opens the GUI
+        from .cli import COMMANDS, main as cli_main
+        if sys.argv[1] in COMMANDS or sys.argv[1] in ("--db", "-h", "--help"):
+            sys.exit(cli_main(sys.argv[1:]))
+
     try:
+        # Imported here so the headless service does not load Tk
+        from .gui import TimeTrackerGUI
         app = TimeTrackerGUI()
         app.run()
     except Exception as e:
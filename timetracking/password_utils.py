@@ -82,5 +82,20 @@ class PasswordEncryption:
             return False
 
 
-# Global instance for use throughout the application
-password_encryption = PasswordEncryption()
+# Shared instance, created on first use so importing this module never touches the key file
+_password_encryption = None
+
+
+def get_password_encryption() -> PasswordEncryption:
+    """Get the shared PasswordEncryption instance"""
+    global _password_encryption
+    if _password_encryption is None:
+        _password_encryption = PasswordEncryption()
+    return _password_encryption
+
+
+def __getattr__(name):
+    # Keeps `from timetracking.password_utils import password_encryption` working
+    if name == "password_encryption":
+        return get_password_encryption()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,12 +3,93 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
 from reportlab.lib.units import inch
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfbase import pdfdoc
+from reportlab.pdfgen import canvas
 from datetime import datetime, date
-from typing import List, Tuple, Optional
+from typing import BinaryIO, Iterable, Iterator, List, Tuple, Optional, Union
+from io import BytesIO
+from itertools import chain, groupby
+from operator import attrgetter
+from xml.sax.saxutils import escape
 import os
 
+from .report import (ProgressCallback, ReportModel, ReportRow, SummaryReport, Totals, as_report,
+                     format_seconds, tracked_rows)
+
+ENTRY_COLUMNS = ['Date', 'Project', 'Description', 'Start Time', 'End Time', 'Duration']
+# The per-day tables of large reports show the date in a heading instead
+DAY_COLUMNS = ENTRY_COLUMNS[1:]
+RATE_COLUMNS = ['Rate', 'Amount']
+# Column widths optimized for text wrapping, including the Rate and Amount columns
+ENTRY_WIDTHS = [1*inch, 1.5*inch, 2.5*inch, 0.8*inch, 0.8*inch, 0.8*inch, 0.8*inch, 0.8*inch]
+DAY_WIDTHS = [1.5*inch, 3.5*inch, 0.8*inch, 0.8*inch, 0.8*inch, 0.8*inch, 0.8*inch]
+# Summary reports: the group (project, day, week or month), then Entries, Hours and Amount
+SUMMARY_COLUMNS = ['Entries', 'Hours', 'Amount']
+SUMMARY_WIDTHS = [3*inch, 1*inch, 1*inch, 1.5*inch]
+
+BODY_FONT = 'Helvetica'
+BOLD_FONT = 'Helvetica-Bold'
+BODY_SIZE = 9
+BODY_LEADING = 11
+HEADER_SIZE = 10
+HEADER_LEADING = 12
+# Table padding plus the TableCell indent, so text starts where a TableCell Paragraph would
+CELL_PADDING = 8
+
+TABLE_STYLE = [
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('TOPPADDING', (0, 0), (-1, 0), 12),
+    ('LEFTPADDING', (0, 0), (-1, -1), 6),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('TOPPADDING', (0, 1), (-1, -1), 6),
+    ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
+]
+
+# Compact mode draws a box and a rule under each row instead of the full grid
+COMPACT_LINES = [
+    ('BOX', (0, 0), (-1, -1), 1, colors.black),
+    ('LINEBELOW', (0, 0), (-1, -1), 0.5, colors.black),
+]
+
+# Fast mode cells are plain strings where they fit: give them the fonts, leading and padding of the Paragraph styles
+FAST_TABLE_STYLE = [
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('LEADING', (0, 0), (-1, 0), HEADER_LEADING),
+    ('FONTNAME', (0, 1), (-1, -1), BODY_FONT),
+    ('LEADING', (0, 1), (-1, -1), BODY_LEADING),
+    ('LEFTPADDING', (0, 1), (-1, -1), CELL_PADDING),
+    ('RIGHTPADDING', (0, 1), (-1, -1), CELL_PADDING),
+]
+
 class PDFExporter:
-    def __init__(self):
+    # Longer reports are laid out as one table per day and built while the PDF is written
+    LARGE_REPORT_ROWS = 1000
+    # Most entries in one table; a longer day is split into several tables
+    MAX_TABLE_ROWS = 200
+    
+    def __init__(self, fast: bool = True, compact: bool = False):
+        # Fast mode writes cells that fit on one line as plain strings; Paragraphs only where text wraps
+        self.fast = fast
+        # Compact mode writes smaller files for attachments and archives, see _CompactCanvas
+        self.compact = compact
+        self.canvasmaker = _CompactCanvas if compact else canvas.Canvas
+        self.table_style = TABLE_STYLE + (FAST_TABLE_STYLE if fast else [])
+        if compact:
+            self.table_style = _without_overridden([command for command in self.table_style
+                                                    if command[0] != 'GRID'] + COMPACT_LINES)
+        # Size in bytes of the last PDF written, to keep track of attachment weight
+        self.last_size = None
         self.styles = getSampleStyleSheet()
         self.setup_custom_styles()
     
@@ -41,6 +122,14 @@ class PDFExporter:
             rightIndent=2
         ))
         
+        # Fast mode tables pad cells by the indent instead, so strings and Paragraphs line up
+        self.styles.add(ParagraphStyle(
+            name='TableCellFlush',
+            parent=self.styles['TableCell'],
+            leftIndent=0,
+            rightIndent=0
+        ))
+        
         self.styles.add(ParagraphStyle(
             name='TableHeader',
             parent=self.styles['Normal'],
@@ -49,21 +138,80 @@ class PDFExporter:
             alignment=1,  # Center alignment
             fontName='Helvetica-Bold'
         ))
+        
+        self.styles.add(ParagraphStyle(
+            name='DayHeading',
+            parent=self.styles['Heading3'],
+            fontSize=11,
+            spaceBefore=12,
+            spaceAfter=6
+        ))
+    
+    def render_time_report(self, time_entries: Union[List[Tuple], ReportModel, SummaryReport],
+                           project_name: Optional[str] = None,
+                           start_date: Optional[date] = None,
+                           end_date: Optional[date] = None,
+                           direct: bool = False,
+                           progress: Optional[ProgressCallback] = None,
+                           cancel=None) -> bytes:
+        """Render the report in memory and return the PDF, e.g. for an email attachment"""
+        buffer = BytesIO()
+        self.export_time_report(time_entries, buffer, project_name, start_date, end_date, direct=direct,
+                                progress=progress, cancel=cancel)
+        return buffer.getvalue()
     
-    def export_time_report(self, time_entries: List[Tuple], 
-                          output_path: str,
+    def export_time_report(self, time_entries: Union[List[Tuple], ReportModel, SummaryReport], 
+                          output_path: Union[str, BinaryIO],
                           project_name: Optional[str] = None,
                           start_date: Optional[date] = None,
-                          end_date: Optional[date] = None):
-        """Export time entries to PDF"""
-        doc = SimpleDocTemplate(output_path, pagesize=A4)
-        story = []
+                          end_date: Optional[date] = None,
+                          direct: bool = False,
+                          progress: Optional[ProgressCallback] = None,
+                          cancel=None):
+        """Export time entries, or a ReportModel built from them, to PDF.
+        
+        A SummaryReport is rendered as one table of its groups and totals.
+        
+        Reports longer than LARGE_REPORT_ROWS, and streaming reports, get one
+        table per day. Those are built while the document is written, so memory
+        use does not grow with the number of entries.
         
+        output_path is a file name or a writable binary file object.
+        
+        With direct=True the report is drawn straight onto the canvas as one
+        table, wrapping long text line by line, without platypus layout.
+        
+        progress(rows_done, total_rows) is called as rows are laid out, and
+        cancel.check() between chunks of rows; when it raises, the export stops
+        there. A file name is written through a temporary file renamed into
+        place, so a cancelled or failed export leaves no partial PDF behind.
+        
+        The size of the written PDF is kept in last_size.
+        """
+        if not isinstance(output_path, str):
+            self._write_report(time_entries, output_path, project_name, start_date, end_date, direct,
+                               progress, cancel)
+            self.last_size = output_path.tell()
+            return output_path
+        
+        temp_path = f"{output_path}.{os.getpid()}.tmp"
+        try:
+            self._write_report(time_entries, temp_path, project_name, start_date, end_date, direct,
+                               progress, cancel)
+            os.replace(temp_path, output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self.last_size = os.path.getsize(output_path)
+        return output_path
+    
+    def _write_report(self, time_entries, output_path, project_name, start_date, end_date, direct,
+                      progress, cancel):
+        """Lay out and write the report for export_time_report"""
         # Title
-        title = "Time Tracking Report"
+        title = "Time Tracking Summary" if isinstance(time_entries, SummaryReport) else "Time Tracking Report"
         if project_name:
             title += f" - {project_name}"
-        story.append(Paragraph(title, self.styles['CustomTitle']))
         
         # Date range
         if start_date and end_date:
@@ -75,163 +223,323 @@ class PDFExporter:
         else:
             date_range = f"Generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}"
         
-        story.append(Paragraph(date_range, self.styles['CustomSubtitle']))
-        story.append(Spacer(1, 20))
+        if isinstance(time_entries, SummaryReport):
+            self._export_summary(time_entries, output_path, title, date_range, progress, cancel)
+            return
+        
+        report = as_report(time_entries)
+        # A streaming report only knows its length once it has been read
+        rows = tracked_rows(report.iter_rows(), None if report.streamed else len(report), progress, cancel)
+        if direct:
+            _CanvasReport(output_path, self.canvasmaker).draw(report, rows, title, date_range)
+            return
+        
+        doc = SimpleDocTemplate(output_path, pagesize=A4)
+        story = [
+            Paragraph(escape(title), self.styles['CustomTitle']),
+            Paragraph(date_range, self.styles['CustomSubtitle']),
+            Spacer(1, 20)
+        ]
         
-        if not time_entries:
+        large = report.streamed or len(report) > self.LARGE_REPORT_ROWS
+        first = next(rows, None)
+        if first is None:
             story.append(Paragraph("No time entries found for the selected criteria.", self.styles['Normal']))
+        elif large:
+            story = _LazyStory(chain(story, self._day_tables(report, chain([first], rows))))
         else:
-            # Create table data with Paragraph objects for text wrapping
-            table_data = [[
-                Paragraph('Date', self.styles['TableHeader']),
-                Paragraph('Project', self.styles['TableHeader']),
-                Paragraph('Description', self.styles['TableHeader']),
-                Paragraph('Start Time', self.styles['TableHeader']),
-                Paragraph('End Time', self.styles['TableHeader']),
-                Paragraph('Duration', self.styles['TableHeader'])
-            ]]
-            
-            # Check if any project has a rate set
-            has_rates = any(entry[7] is not None for entry in time_entries)
-            if has_rates:
-                table_data[0].extend([
-                    Paragraph('Rate', self.styles['TableHeader']),
-                    Paragraph('Amount', self.styles['TableHeader'])
-                ])
-            
-            total_duration = 0
-            total_amount = 0.0
-            for entry in time_entries:
-                entry_id, project_id, project_name, description, start_time, end_time, duration, rate, currency = entry
-                
-                # Format dates and times
-                start_dt = datetime.fromisoformat(start_time)
-                date_str = start_dt.strftime('%Y-%m-%d')
-                start_time_str = start_dt.strftime('%H:%M')
-                
-                if end_time:
-                    end_dt = datetime.fromisoformat(end_time)
-                    end_time_str = end_dt.strftime('%H:%M')
-                else:
-                    end_time_str = "Running"
-                
-                # Format duration
-                if duration is not None:
-                    # Calculate precise duration from timestamps
-                    start_dt = datetime.fromisoformat(start_time)
-                    if end_time:
-                        end_dt = datetime.fromisoformat(end_time)
-                        total_seconds = int((end_dt - start_dt).total_seconds())
-                        hours = total_seconds // 3600
-                        minutes = (total_seconds % 3600) // 60
-                        seconds = total_seconds % 60
-                        
-                        if hours > 0:
-                            duration_str = f"{hours}h {minutes}m {seconds}s"
-                        elif minutes > 0:
-                            duration_str = f"{minutes}m {seconds}s"
-                        else:
-                            duration_str = f"{seconds}s"
-                        
-                        # Add to total in minutes for calculation
-                        total_duration += total_seconds // 60
-                    else:
-                        # Fallback to stored duration
-                        hours = duration // 60
-                        minutes = duration % 60
-                        if hours > 0:
-                            duration_str = f"{hours}h {minutes}m"
-                        else:
-                            duration_str = f"{minutes}m"
-                        total_duration += duration
-                else:
-                    duration_str = "Running"
-                
-                # Calculate rate and amount
-                rate_str = ""
-                amount_str = ""
-                if has_rates:
-                    if rate is not None and rate > 0:
-                        currency_symbol = "€" if currency == "EUR" else "$"
-                        rate_str = f"{currency_symbol}{rate:.2f}/h"
-                        if duration is not None and duration > 0:
-                            # Calculate amount based on duration in hours
-                            hours = duration / 60.0  # Convert minutes to hours
-                            amount = hours * rate
-                            total_amount += amount
-                            amount_str = f"{currency_symbol}{amount:.2f}"
-                        else:
-                            amount_str = f"{currency_symbol}0.00"
-                    else:
-                        rate_str = "N/A"
-                        amount_str = "N/A"
-                
-                row_data = [
-                    Paragraph(date_str, self.styles['TableCell']),
-                    Paragraph(project_name, self.styles['TableCell']),
-                    Paragraph(description or "", self.styles['TableCell']),
-                    Paragraph(start_time_str, self.styles['TableCell']),
-                    Paragraph(end_time_str, self.styles['TableCell']),
-                    Paragraph(duration_str, self.styles['TableCell'])
-                ]
-                
-                if has_rates:
-                    row_data.extend([
-                        Paragraph(rate_str, self.styles['TableCell']),
-                        Paragraph(amount_str, self.styles['TableCell'])
-                    ])
-                
-                table_data.append(row_data)
-            
-            # Create table with dynamic column widths optimized for text wrapping
-            if has_rates:
-                col_widths = [1*inch, 1.5*inch, 2.5*inch, 0.8*inch, 0.8*inch, 0.8*inch, 0.8*inch, 0.8*inch]
-            else:
-                col_widths = [1*inch, 1.5*inch, 2.5*inch, 0.8*inch, 0.8*inch, 0.8*inch]
-            
-            table = Table(table_data, colWidths=col_widths, repeatRows=1)
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('TOPPADDING', (0, 0), (-1, 0), 12),
-                ('LEFTPADDING', (0, 0), (-1, -1), 6),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('FONTSIZE', (0, 1), (-1, -1), 9),
-                ('TOPPADDING', (0, 1), (-1, -1), 6),
-                ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
-            ]))
-            
-            story.append(table)
+            story.append(self._entries_table(report, chain([first], rows)))
             story.append(Spacer(1, 20))
+            story.extend(self._totals(report))
+        
+        # Build PDF
+        doc.build(story, canvasmaker=self.canvasmaker)
+    
+    def _export_summary(self, summary: SummaryReport, output_path: Union[str, BinaryIO],
+                        title: str, date_range: str, progress: Optional[ProgressCallback] = None,
+                        cancel=None):
+        """Summary report: one row per group, then the totals"""
+        doc = SimpleDocTemplate(output_path, pagesize=A4)
+        story = [
+            Paragraph(escape(title), self.styles['CustomTitle']),
+            Paragraph(date_range, self.styles['CustomSubtitle']),
+            Spacer(1, 20)
+        ]
+        if not summary.rows:
+            story.append(Paragraph("No time entries found for the selected criteria.", self.styles['Normal']))
+        else:
+            columns = [summary.label] + (SUMMARY_COLUMNS if summary.has_rates else SUMMARY_COLUMNS[:2])
+            col_widths = SUMMARY_WIDTHS[:len(columns)]
+            table_data = [self._header(columns, col_widths)]
+            for row in tracked_rows(summary.rows, len(summary.rows), progress, cancel):
+                values = (row.label, str(row.count), row.hours_text, row.amount_text)
+                table_data.append([self._cell(value, width) for value, width in zip(values, col_widths)])
+            story.append(self._table(table_data, col_widths))
+            story.append(Spacer(1, 20))
+            story.extend(self._totals(summary))
+        doc.build(story, canvasmaker=self.canvasmaker)
+    
+    def _cell(self, text: str, width: float, bold: bool = False):
+        """Body cell for text in a column width points wide"""
+        if self.fast and stringWidth(text, BOLD_FONT if bold else BODY_FONT, BODY_SIZE) <= width - 2 * CELL_PADDING:
+            return text
+        text = escape(text)
+        return Paragraph(f"<b>{text}</b>" if bold else text, self.styles['TableCellFlush' if self.fast else 'TableCell'])
+    
+    def _header(self, columns: List[str], col_widths: List[float]) -> List:
+        """Header row cells"""
+        return [column if self.fast and stringWidth(column, BOLD_FONT, HEADER_SIZE) <= width - 12
+                else Paragraph(column, self.styles['TableHeader'])
+                for column, width in zip(columns, col_widths)]
+    
+    def _cells(self, values, col_widths: List[float], has_rates: bool, row: Optional[ReportRow] = None) -> List:
+        """Cells of one table row; with Rate and Amount taken from row when has_rates"""
+        if has_rates:
+            values = (*values, row.rate_text, row.amount_text)
+        return [self._cell(value, width) for value, width in zip(values, col_widths)]
+    
+    def _table(self, table_data: List, col_widths: List[float], extra_style=()) -> Table:
+        """Table in the report style, repeating its header row on each page"""
+        table = Table(table_data, colWidths=col_widths, repeatRows=1)
+        table.setStyle(TableStyle(self.table_style + list(extra_style)))
+        return table
+    
+    def _entries_table(self, report: ReportModel, rows: Iterable[ReportRow]) -> Table:
+        """All entries in one table"""
+        columns = ENTRY_COLUMNS + RATE_COLUMNS if report.has_rates else ENTRY_COLUMNS
+        col_widths = ENTRY_WIDTHS[:len(columns)]
+        table_data = [self._header(columns, col_widths)]
+        for row in rows:
+            table_data.append(self._cells((row.date, row.project, row.description, row.start, row.end, row.duration),
+                                          col_widths, report.has_rates, row))
+        return self._table(table_data, col_widths)
+    
+    def _day_tables(self, report: ReportModel, rows: Iterable[ReportRow]) -> Iterator:
+        """A heading, a table and a subtotal for each day, then the report totals; built lazily"""
+        columns = DAY_COLUMNS + RATE_COLUMNS if report.has_rates else DAY_COLUMNS
+        col_widths = DAY_WIDTHS[:len(columns)]
+        
+        for day, day_rows in groupby(rows, key=attrgetter("date")):
+            heading = Paragraph(datetime.strptime(day, '%Y-%m-%d').strftime('%A, %B %d, %Y'), self.styles['DayHeading'])
+            heading.keepWithNext = 1
+            yield heading
             
-            # Total duration
-            total_hours = total_duration // 60
-            total_minutes = total_duration % 60
-            if total_hours > 0:
-                total_str = f"{total_hours} hours and {total_minutes} minutes"
-            else:
-                total_str = f"{total_minutes} minutes"
+            day_total = ReportModel()
+            table_data = [self._header(columns, col_widths)]
+            for row in day_rows:
+                # Cap the table size so even a very long day splits cheaply
+                if len(table_data) > self.MAX_TABLE_ROWS:
+                    yield self._table(table_data, col_widths)
+                    table_data = [self._header(columns, col_widths)]
+                day_total.include(row)
+                table_data.append(self._cells((row.project, row.description, row.start, row.end, row.duration),
+                                              col_widths, report.has_rates, row))
             
-            story.append(Paragraph(f"<b>Total Time: {total_str}</b>", self.styles['Normal']))
+            subtotal = [self._cell("Day total", sum(col_widths[:4]), bold=True), "", "", "",
+                        self._cell(format_seconds(day_total.total_seconds), col_widths[4], bold=True)]
+            if report.has_rates:
+                subtotal.extend(["", self._cell(", ".join(day_total.amount_totals), col_widths[6])])
+            table_data.append(subtotal)
+            yield self._table(table_data, col_widths, [('SPAN', (0, -1), (3, -1)),
+                                                       ('FONTNAME', (0, -1), (-1, -1), BOLD_FONT),
+                                                       ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey)])
+        
+        yield Spacer(1, 20)
+        # The totals are complete only now that every row has been read
+        yield from self._totals(report)
+    
+    def _totals(self, report: Totals) -> List:
+        """Total time and the total amount per currency"""
+        totals = [Paragraph(f"<b>Total Time: {report.total_time}</b>", self.styles['Normal'])]
+        
+        # One total per currency; amounts in different currencies are not added up
+        for amount in report.amount_totals:
+            totals.append(Paragraph(f"<b>Total Amount: {amount}</b>", self.styles['Normal']))
+        return totals
+
+
+def _without_overridden(style: List) -> List:
+    """Table style without the commands a later command with the same name and cells replaces"""
+    last = {command[:3]: index for index, command in enumerate(style)}
+    return [command for index, command in enumerate(style) if last[command[:3]] == index]
+
+
+class _CompactCanvas(canvas.Canvas):
+    """Canvas writing smaller files, for compact mode.
+    
+    Page streams are deflated and stored as binary, without the ASCII85
+    encoding reportlab adds by default (a quarter more bytes). Page
+    dictionaries leave out the image procsets, the empty transition and the
+    zero rotation. Reports only use the standard Helvetica fonts, so no font
+    is ever embedded.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        kwargs['pageCompression'] = 1
+        super().__init__(*args, **kwargs)
+        add_page = self._doc.addPage
+        
+        def add_compact_page(page):
+            # A page formats its own Contents only when none is set
+            page.Contents = pdfdoc.PDFStream(content=page.stream, filters=[pdfdoc.PDFZCompress])
+            page.Trans = None
+            page.Rotate = None
+            add_page(page)
+        
+        self._doc.addPage = add_compact_page
+    
+    def showPage(self):
+        # Reports draw no images: only the PDF and Text procsets
+        self._currentPageHasImages = 0
+        super().showPage()
+
+
+class _LazyStory(list):
+    """Story that pulls flowables from an iterator as SimpleDocTemplate.build consumes them.
+    
+    build() takes flowables off the front of the list one at a time, so only a
+    few of them exist at once. It looks at most a couple of entries ahead,
+    except when flowables are kept together with the next one.
+    """
+    
+    LOOKAHEAD = 2
+    
+    def __init__(self, flowables: Iterable):
+        super().__init__()
+        self._pending = iter(flowables)
+    
+    def _fill(self, size: int):
+        while self._pending is not None and list.__len__(self) < size:
+            try:
+                self.append(next(self._pending))
+            except StopIteration:
+                self._pending = None
+    
+    def __len__(self):
+        self._fill(self.LOOKAHEAD)
+        return list.__len__(self)
+    
+    def __getitem__(self, index):
+        self._fill(index + 1 if isinstance(index, int) and index >= 0 else self.LOOKAHEAD)
+        return list.__getitem__(self, index)
+
+
+class _CanvasReport:
+    """Draws a report straight onto a canvas in the layout of the platypus one-table report.
+    
+    There are no flowables to build, wrap or split: each row is measured with
+    simpleSplit, drawn, and forgotten. The header row is repeated on every
+    page, as a Table with repeatRows=1 would do.
+    """
+    
+    # SimpleDocTemplate's default one-inch margins plus its frame's padding
+    LEFT = inch + 6
+    WIDTH = A4[0] - 2 * inch - 12
+    TOP = A4[1] - inch - 6
+    BOTTOM = inch + 6
+    
+    def __init__(self, output_path: Union[str, BinaryIO], canvasmaker=canvas.Canvas):
+        self.canv = canvasmaker(output_path, pagesize=A4)
+        self.y = self.TOP
+    
+    def draw(self, report: ReportModel, rows: Iterator[ReportRow], title: str, date_range: str):
+        """Write the whole report, from rows of report.iter_rows(), and save the file"""
+        # CustomTitle: 18pt bold on a 22pt leading, 30pt after; CustomSubtitle: 12pt, 12pt after
+        self._text_lines(title, BOLD_FONT, 18, 22, centered=True)
+        self.y -= 30
+        self._text_lines(date_range, BODY_FONT, 12, 12, centered=True)
+        self.y -= 12 + 20
+        
+        first = next(rows, None)
+        if first is None:
+            self._text_lines("No time entries found for the selected criteria.", BODY_FONT, 10, 12)
+        else:
+            columns = ENTRY_COLUMNS + RATE_COLUMNS if report.has_rates else ENTRY_COLUMNS
+            self.col_widths = ENTRY_WIDTHS[:len(columns)]
+            # Centred in the frame like a Table, even when it is wider than the frame
+            self.table_width = sum(self.col_widths)
+            self.left = self.LEFT + (self.WIDTH - self.table_width) / 2
+            self.header = [simpleSplit(column, BOLD_FONT, HEADER_SIZE, width - 12)
+                           for column, width in zip(columns, self.col_widths)]
+            self._header_row()
+            for row in chain([first], rows):
+                values = [row.date, row.project, row.description, row.start, row.end, row.duration]
+                if report.has_rates:
+                    values += [row.rate_text, row.amount_text]
+                self._body_row(values)
+            self._close_grid()
             
-            # Total amount if rates are present
-            if has_rates and total_amount > 0:
-                # Use the currency from the first entry with a rate
-                first_currency = None
-                for entry in time_entries:
-                    if entry[7] is not None and entry[7] > 0:  # rate > 0
-                        first_currency = entry[8]  # currency
-                        break
-                currency_symbol = "€" if first_currency == "EUR" else "$"
-                story.append(Paragraph(f"<b>Total Amount: {currency_symbol}{total_amount:.2f}</b>", self.styles['Normal']))
+            self.y -= 20
+            self._text_lines(f"Total Time: {report.total_time}", BOLD_FONT, 10, 12)
+            for amount in report.amount_totals:
+                self._text_lines(f"Total Amount: {amount}", BOLD_FONT, 10, 12)
+        self.canv.save()
+    
+    def _new_page(self):
+        self.canv.showPage()
+        self.y = self.TOP
+    
+    def _text_lines(self, text: str, font: str, size: float, leading: float, centered: bool = False):
+        """Draw a paragraph of plain text, wrapped to the frame"""
+        self.canv.setFillColor(colors.black)
+        self.canv.setFont(font, size)
+        for line in simpleSplit(text, font, size, self.WIDTH):
+            if self.y - leading < self.BOTTOM:
+                self._new_page()
+                self.canv.setFont(font, size)
+            if centered:
+                self.canv.drawCentredString(self.LEFT + self.WIDTH / 2, self.y - size, line)
+            else:
+                self.canv.drawString(self.LEFT, self.y - size, line)
+            self.y -= leading
+    
+    def _row(self, cells: List[List[str]], font: str, size: float, leading: float, padding: float,
+             background, text_color, centered: bool):
+        """Draw one row of wrapped cells below the current position; _close_grid draws its column lines"""
+        height = 2 * padding + leading * max(len(lines) for lines in cells)
+        canv = self.canv
+        canv.setFillColor(background)
+        canv.rect(self.left, self.y - height, self.table_width, height, stroke=0, fill=1)
         
-        # Build PDF
-        doc.build(story)
-        return output_path
+        text = canv.beginText()
+        text.setFont(font, size)
+        text.setFillColor(text_color)
+        x = self.left
+        for lines, width in zip(cells, self.col_widths):
+            baseline = self.y - padding - size
+            for line in lines:
+                if centered:
+                    text.setTextOrigin(x + (width - stringWidth(line, font, size)) / 2, baseline)
+                else:
+                    text.setTextOrigin(x + CELL_PADDING, baseline)
+                text.textOut(line)
+                baseline -= leading
+            x += width
+        canv.drawText(text)
+        
+        self.y -= height
+        canv.line(self.left, self.y, self.left + self.table_width, self.y)
+    
+    def _header_row(self):
+        self.grid_top = self.y
+        self.canv.setLineWidth(1)
+        self.canv.setStrokeColor(colors.black)
+        self.canv.line(self.left, self.y, self.left + self.table_width, self.y)
+        self._row(self.header, BOLD_FONT, HEADER_SIZE, HEADER_LEADING, 12, colors.grey, colors.whitesmoke, True)
+    
+    def _body_row(self, values: List[str]):
+        cells = [[value] if stringWidth(value, BODY_FONT, BODY_SIZE) <= width - 2 * CELL_PADDING
+                 else simpleSplit(value, BODY_FONT, BODY_SIZE, width - 2 * CELL_PADDING)
+                 for value, width in zip(values, self.col_widths)]
+        if self.y - (12 + BODY_LEADING * max(len(lines) for lines in cells)) < self.BOTTOM:
+            self._close_grid()
+            self._new_page()
+            self._header_row()
+        self._row(cells, BODY_FONT, BODY_SIZE, BODY_LEADING, 6, colors.beige, colors.black, False)
+    
+    def _close_grid(self):
+        """Draw the column lines of the table drawn on this page, from its header down"""
+        x = self.left
+        for width in self.col_widths + [0]:
+            self.canv.line(x, self.grid_top, x, self.y)
+            x += width
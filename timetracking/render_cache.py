@@ -0,0 +1,139 @@
+"""
+On-disk cache of rendered reports.
+
+Sending or exporting the same weekly or monthly report again used to query
+the entries and lay out the PDF from scratch every time. Rendered reports are
+now kept in a directory next to the database, each under a hash of
+everything that goes into it: what is rendered, the filters, the changelog
+sequence of the database, the template version and the renderer options.
+
+Every write to the database moves the changelog on, so once the data changes
+a cached report is never found again; it only lingers until it is evicted.
+The directory is kept under a size limit by deleting the least recently used
+reports first. A hit touches its file, so the modification time is the last
+use. This module deliberately does not import reportlab.
+"""
+import hashlib
+import json
+import os
+import shutil
+from typing import Callable, Optional
+
+from . import __version__
+
+# Bump when a renderer changes what it produces, so older cached reports are not served
+TEMPLATE_VERSION = 1
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def cache_dir(db_path: str) -> str:
+    """Cache directory belonging to a database file"""
+    return os.path.splitext(db_path)[0] + ".reports"
+
+
+class RenderCache:
+    """Rendered reports on disk, keyed by content hash, with LRU eviction by size"""
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def for_db(cls, db, max_bytes: int = DEFAULT_MAX_BYTES) -> "RenderCache":
+        """Cache next to the database file of a TimeTrackerDB"""
+        return cls(cache_dir(db.db_path), max_bytes)
+
+    @staticmethod
+    def key(kind: str, seq: int, *filters, **options) -> str:
+        """Hash of what is rendered, the data version, the filters, the options and the template version.
+
+        ``seq`` is the database's get_changelog_seq(), read before the entries
+        are, so a write that lands in between only makes the next request
+        render again. Reports built from one query share one ``seq``.
+        """
+        material = json.dumps([__version__, TEMPLATE_VERSION, kind, seq, filters, options],
+                              sort_keys=True, default=str)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> str:
+        """File holding the report for key"""
+        return os.path.join(self.directory, key)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Cached report, or None; a hit counts as a use for eviction"""
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def put(self, key: str, data: bytes):
+        """Store a report, then evict until the directory fits in max_bytes"""
+        if len(data) > self.max_bytes:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            temp_path = f"{self.path(key)}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, self.path(key))
+            self.evict()
+        except OSError as e:
+            print(f"Warning: could not cache report: {e}")
+
+    def put_file(self, key: str, source_path: str):
+        """Store a report that was written to a file"""
+        try:
+            if os.path.getsize(source_path) > self.max_bytes:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            temp_path = f"{self.path(key)}.{os.getpid()}.tmp"
+            shutil.copyfile(source_path, temp_path)
+            os.replace(temp_path, self.path(key))
+            self.evict()
+        except OSError as e:
+            print(f"Warning: could not cache report: {e}")
+
+    def copy_to(self, key: str, output_path: str) -> bool:
+        """Write a cached report to output_path; False if it is not cached"""
+        data = self.get(key)
+        if data is None:
+            return False
+        temp_path = f"{output_path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, output_path)
+        return True
+
+    def fetch(self, key: str, render: Callable[[], bytes]) -> bytes:
+        """Cached report for key, rendered and stored on a miss"""
+        data = self.get(key)
+        if data is None:
+            data = render()
+            self.put(key, data)
+        return data
+
+    def evict(self):
+        """Delete the least recently used reports until the rest fit in max_bytes"""
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        """Delete every cached report"""
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,306 @@
+"""
+Report model shared by the entries list, the PDF export and the emails.
+
+Each of them used to walk the raw entry rows on its own. Each one parsed the
+timestamps, formatted durations and priced the entries, and the results did
+not agree: the email billed by the second and the PDF by the stored minute.
+
+A ReportModel does that work once for a list of entries. It holds the
+formatted rows, the total time and the amount per currency, so the
+renderers only lay them out. Amounts are billed by the second, the same way
+get_entry_groups prices the grouped list.
+
+A SummaryReport has the same totals but one row per project, day, week or
+month, read from get_entry_groups; it never loads the entries themselves.
+
+Renderers walk the rows through tracked_rows, which reports progress and
+checks for cancellation every PROGRESS_ROWS rows.
+"""
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Rows rendered between progress reports and cancellation checks
+PROGRESS_ROWS = 250
+
+# progress(rows_done, total_rows); total_rows is None when it is not known up front
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+
+def format_seconds(total_seconds: int) -> str:
+    """Length of time as shown in reports, e.g. 1h 5m 3s"""
+    hours = total_seconds // 3600
+    minutes = (total_seconds % 3600) // 60
+    seconds = total_seconds % 60
+    if hours > 0:
+        return f"{hours}h {minutes}m {seconds}s"
+    if minutes > 0:
+        return f"{minutes}m {seconds}s"
+    return f"{seconds}s"
+
+
+def format_minutes(total_minutes: int) -> str:
+    """Stored duration_minutes as shown when there is no end time, e.g. 1h 5m"""
+    hours = total_minutes // 60
+    minutes = total_minutes % 60
+    return f"{hours}h {minutes}m" if hours > 0 else f"{minutes}m"
+
+
+def format_total(total_seconds: int) -> str:
+    """Total time in words, e.g. 2 hours and 5 minutes"""
+    hours = total_seconds // 3600
+    minutes = (total_seconds % 3600) // 60
+    if hours > 0:
+        return f"{hours} hours and {minutes} minutes"
+    return f"{minutes} minutes"
+
+
+def format_money(amount: float, currency: Optional[str]) -> str:
+    """Amount with its currency symbol, e.g. €12.50"""
+    return f"{'€' if currency == 'EUR' else '$'}{amount:.2f}"
+
+
+def entry_seconds(entry: Tuple) -> Optional[int]:
+    """Exact length of an entry in seconds as database.ENTRY_SECONDS_SQL computes it; None while running"""
+    if entry[5] is None:
+        return None
+    return int((datetime.fromisoformat(entry[5]) - datetime.fromisoformat(entry[4])).total_seconds() + 0.001)
+
+
+class ReportRow:
+    """One time entry, formatted for display and priced"""
+
+    __slots__ = ("entry_id", "project_id", "project", "description", "date", "start", "end",
+                 "duration", "seconds", "rate", "currency", "amount")
+
+    def __init__(self, entry: Tuple):
+        entry_id, project_id, project, description, start_time, end_time, duration = entry[:7]
+        rate, currency = entry[7:9] if len(entry) >= 9 else (None, None)
+        start_dt = datetime.fromisoformat(start_time)
+        self.entry_id = entry_id
+        self.project_id = project_id
+        self.project = project or ""
+        self.description = description or ""
+        self.date = start_dt.strftime('%Y-%m-%d')
+        self.start = start_dt.strftime('%H:%M')
+        self.end = datetime.fromisoformat(end_time).strftime('%H:%M') if end_time else "Running"
+        self.rate = rate
+        self.currency = currency
+
+        # Seconds billed and counted in the totals; stored minutes only when there is no end time
+        if duration is None:
+            self.seconds = None
+            self.duration = "Running"
+        elif end_time:
+            self.seconds = entry_seconds(entry)
+            self.duration = format_seconds(self.seconds)
+        else:
+            self.seconds = duration * 60
+            self.duration = format_minutes(duration)
+
+        self.amount = None
+        if rate is not None and rate > 0:
+            self.amount = (self.seconds or 0) * rate / 3600.0
+
+    @property
+    def values(self) -> Tuple[str, ...]:
+        """Treeview values (Date, Project, Description, Start, End, Duration)"""
+        return self.date, self.project, self.description, self.start, self.end, self.duration
+
+    @property
+    def rate_text(self) -> str:
+        """Hourly rate, e.g. €25.00/h; N/A for projects without a rate"""
+        if self.amount is None:
+            return "N/A"
+        return f"{format_money(self.rate, self.currency)}/h"
+
+    @property
+    def amount_text(self) -> str:
+        """Amount billed for the entry; N/A for projects without a rate"""
+        if self.amount is None:
+            return "N/A"
+        return format_money(self.amount, self.currency)
+
+
+class Totals:
+    """Total time and amount per currency of a report"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0
+        self.amounts: Dict[str, float] = {}
+        self.has_rates = False
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def total_time(self) -> str:
+        """Total time in words, e.g. 2 hours and 5 minutes"""
+        return format_total(self.total_seconds)
+
+    @property
+    def total_hours(self) -> float:
+        """Total time in hours"""
+        return self.total_seconds / 3600.0
+
+    @property
+    def amount_totals(self) -> List[str]:
+        """Formatted total per currency that has anything billed, e.g. ["€62.50", "$30.00"]"""
+        return [format_money(amount, currency) for currency, amount in self.amounts.items() if amount > 0]
+
+
+class ReportModel(Totals):
+    """Formatted rows and totals for a list of entries, computed in one pass.
+
+    ``has_rates`` says whether any project in the report has a rate set, in
+    which case renderers show the Rate and Amount columns. ``amounts`` maps
+    each currency to its total; entries in different currencies are never
+    added together.
+
+    A streaming report (see ``streaming``) keeps no rows: iter_rows builds
+    them as it walks the entries, and the totals are complete once it has.
+    """
+
+    def __init__(self, entries: Iterable[Tuple] = ()):
+        super().__init__()
+        self.rows: List[ReportRow] = []
+        self._pending = None
+        for entry in entries:
+            self.rows.append(self.add(entry))
+
+    @classmethod
+    def streaming(cls, entries: Iterable[Tuple], has_rates: bool) -> "ReportModel":
+        """Report over an iterator of entries that is only read once, by iter_rows"""
+        report = cls()
+        report.has_rates = has_rates
+        report._pending = iter(entries)
+        return report
+
+    @classmethod
+    def from_query(cls, db, project_id=None, start_date=None, end_date=None) -> "ReportModel":
+        """Report over the entries get_time_entries returns for the filters"""
+        return cls(db.get_time_entries(project_id, start_date, end_date))
+
+    @classmethod
+    def stream_query(cls, db, project_id=None, start_date=None, end_date=None) -> "ReportModel":
+        """Streaming report over the same entries, read from the database in batches"""
+        return cls.streaming(db.iter_time_entries(project_id, start_date, end_date),
+                             db.entries_have_rates(project_id, start_date, end_date))
+
+    @property
+    def streamed(self) -> bool:
+        """Whether the rows are built on the fly by iter_rows rather than kept"""
+        return self._pending is not None
+
+    def add(self, entry: Tuple) -> ReportRow:
+        """Format an entry and count it in the totals"""
+        row = ReportRow(entry)
+        self.include(row)
+        return row
+
+    def include(self, row: ReportRow):
+        """Count an already formatted row in the totals"""
+        self.count += 1
+        if row.seconds is not None:
+            self.total_seconds += row.seconds
+        if row.rate is not None:
+            self.has_rates = True
+        if row.amount is not None:
+            self.amounts[row.currency] = self.amounts.get(row.currency, 0.0) + row.amount
+
+    def iter_rows(self) -> Iterator[ReportRow]:
+        """The rows in order; a streaming report builds them here, once"""
+        yield from self.rows
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            for entry in pending:
+                yield self.add(entry)
+
+
+class SummaryRow:
+    """Totals of one project, day, week or month in one currency"""
+
+    __slots__ = ("key", "label", "currency", "count", "seconds", "amount")
+
+    def __init__(self, group_by: str, group: Tuple):
+        self.key, label, self.currency, self.count, self.seconds, self.amount = group
+        if group_by == "week":
+            self.label = f"Week of {label}"
+        elif group_by == "month":
+            self.label = datetime.strptime(label, "%Y-%m").strftime("%B %Y")
+        else:
+            self.label = label or ""
+
+    @property
+    def hours_text(self) -> str:
+        """Time in decimal hours, e.g. 12.50"""
+        return f"{self.seconds / 3600.0:.2f}"
+
+    @property
+    def amount_text(self) -> str:
+        """Amount billed; N/A when no entry in the group has a rate"""
+        if self.amount is None:
+            return "N/A"
+        return format_money(self.amount, self.currency)
+
+
+class SummaryReport(Totals):
+    """Totals per project, day, week or month, from get_entry_groups rows.
+
+    One row per group and currency, so amounts in different currencies stay
+    apart. Only the aggregates are read, never the entries, so a year costs
+    about as much as a week.
+    """
+
+    LABELS = {"project": "Project", "day": "Day", "week": "Week", "month": "Month"}
+
+    def __init__(self, group_by: str, groups: Iterable[Tuple] = ()):
+        super().__init__()
+        self.group_by = group_by
+        self.rows: List[SummaryRow] = []
+        for group in groups:
+            row = SummaryRow(group_by, group)
+            self.rows.append(row)
+            self.count += row.count
+            self.total_seconds += row.seconds
+            if row.amount is not None:
+                self.has_rates = True
+                self.amounts[row.currency] = self.amounts.get(row.currency, 0.0) + row.amount
+
+    @classmethod
+    def from_query(cls, db, group_by: str = "project", project_id=None, start_date=None,
+                   end_date=None) -> "SummaryReport":
+        """Summary of the entries get_time_entries returns for the filters"""
+        return cls(group_by, db.get_entry_groups(group_by, project_id, start_date, end_date))
+
+    @property
+    def label(self) -> str:
+        """Heading of the group column"""
+        return self.LABELS[self.group_by]
+
+
+def tracked_rows(rows: Iterable, total: Optional[int] = None,
+                 progress: Optional[ProgressCallback] = None, cancel=None) -> Iterator:
+    """The rows, calling progress and cancel.check() every PROGRESS_ROWS rows and at the end.
+
+    ``cancel`` is a background.CancelToken, or anything with a check() that
+    raises to stop rendering.
+    """
+    done = 0
+    for row in rows:
+        if done and done % PROGRESS_ROWS == 0:
+            if cancel is not None:
+                cancel.check()
+            if progress is not None:
+                progress(done, total)
+        yield row
+        done += 1
+    if cancel is not None:
+        cancel.check()
+    if progress is not None:
+        progress(done, total)
+
+
+def as_report(entries) -> ReportModel:
+    """The ReportModel for entries; renderers accept either a model or the raw entry rows"""
+    return entries if isinstance(entries, ReportModel) else ReportModel(entries)
@@ -0,0 +1,499 @@
+"""
+Local HTTP/JSON tracking service (``timetracking serve``).
+
+Lets scripts, editors and browser extensions start and stop timers without
+the Tk GUI. The server is a small asyncio HTTP/1.1 implementation (keep-alive,
+JSON bodies) bound to localhost. It keeps one warm AsyncTimeTrackerDB
+connection pool and caches the project list until the database changes.
+
+Every request must carry ``Authorization: Bearer <token>``, where the token
+is read from ``~/.timetracking_token`` (created on first start, readable only
+by the user). Requests with a ``Host`` other than this machine, or with an
+``Origin`` that was not allowed with ``--allow-origin``, are refused, and
+writes must be sent as ``application/json``. Together these stop web pages
+from driving the service through the user's browser.
+
+Endpoints::
+
+    GET    /projects                 list projects
+    POST   /projects                 {"name", "description", "default_email", "rate", "currency"}
+    GET    /timers                   running timers
+    POST   /timers/start             {"project_id", "description"}
+    POST   /timers/stop              {"project_id"}
+    GET    /entries                  ?project_id=&start=YYYY-MM-DD&end=YYYY-MM-DD
+    GET    /entries/<id>
+    PATCH  /entries/<id>             {"description", "start_time", "end_time", "project_id"}
+    DELETE /entries/<id>
+    GET    /aggregates               ?group=project|day|week|month plus entry filters
+    GET    /exports/pdf              entry filters; returns application/pdf
+    GET    /exports/csv              entry filters; returns text/csv
+    GET    /metrics                  request counts, throughput and latency percentiles
+"""
+import argparse
+import asyncio
+import csv
+import hmac
+import io
+import json
+import os
+import re
+import secrets
+import time
+from collections import deque
+from datetime import date
+from typing import Dict, Iterable, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from .async_db import AsyncTimeTrackerDB
+from .database import ChangeWatcher
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 1024 * 1024
+
+ENTRY_FIELDS = ("id", "project_id", "project", "description", "start_time", "end_time",
+                "duration_minutes", "rate", "currency")
+PROJECT_FIELDS = ("id", "name", "description", "default_email", "rate", "currency")
+
+# Host header names that always mean this machine
+LOOPBACK_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 401: "Unauthorized", 403: "Forbidden",
+           404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+           415: "Unsupported Media Type", 500: "Internal Server Error"}
+
+
+def default_token_path() -> str:
+    """Token file in the user's home directory, next to the database"""
+    return os.path.join(os.path.expanduser("~"), ".timetracking_token")
+
+
+def load_or_create_token(path: Optional[str] = None) -> str:
+    """Read the service token, creating a random one readable only by the user"""
+    path = path or default_token_path()
+    try:
+        with open(path, encoding="utf-8") as f:
+            token = f.read().strip()
+        if token:
+            return token
+    except FileNotFoundError:
+        pass
+    token = secrets.token_urlsafe(32)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token + "\n")
+    return token
+
+
+class HTTPError(Exception):
+    """Error returned to the client as a JSON body with this status"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Response:
+    """Raw (non-JSON) response body"""
+
+    def __init__(self, body: bytes, content_type: str, status: int = 200, filename: Optional[str] = None):
+        self.body = body
+        self.content_type = content_type
+        self.status = status
+        self.filename = filename
+
+
+class ServerMetrics:
+    """Request counts and latency samples per route"""
+
+    def __init__(self, window: int = 2048):
+        self.started = time.monotonic()
+        self.window = window
+        self.requests = 0
+        self.errors = 0
+        self.latencies: Dict[str, deque] = {}
+        self.recent = deque()
+
+    def record(self, route: str, seconds: float, status: int):
+        now = time.monotonic()
+        self.requests += 1
+        if status >= 500:
+            self.errors += 1
+        self.latencies.setdefault(route, deque(maxlen=self.window)).append(seconds)
+        self.recent.append(now)
+        while self.recent and self.recent[0] < now - 60:
+            self.recent.popleft()
+
+    @staticmethod
+    def _percentile(ordered, fraction):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+    def snapshot(self) -> Dict:
+        uptime = time.monotonic() - self.started
+        routes = {}
+        for route, samples in self.latencies.items():
+            ordered = sorted(samples)
+            routes[route] = {
+                "count": len(ordered),
+                "p50_ms": round(self._percentile(ordered, 0.50) * 1000, 3),
+                "p95_ms": round(self._percentile(ordered, 0.95) * 1000, 3),
+                "p99_ms": round(self._percentile(ordered, 0.99) * 1000, 3),
+                "max_ms": round(ordered[-1] * 1000, 3),
+            }
+        return {
+            "uptime_seconds": round(uptime, 3),
+            "requests": self.requests,
+            "errors": self.errors,
+            "requests_per_second": round(self.requests / uptime, 3) if uptime else 0.0,
+            "requests_last_minute": len(self.recent),
+            "routes": routes,
+        }
+
+
+def _parse_date(value: Optional[str], name: str) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPError(400, f"Invalid {name} date '{value}', expected YYYY-MM-DD")
+
+
+def _parse_int(value, name: str) -> Optional[int]:
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"Invalid {name} '{value}'")
+
+
+class TrackingServer:
+    """asyncio HTTP server exposing TimeTrackerDB over JSON"""
+
+    def __init__(self, db_path: Optional[str] = None, host: str = DEFAULT_HOST,
+                 port: int = DEFAULT_PORT, readers: int = 4, token: Optional[str] = None,
+                 token_path: Optional[str] = None, allowed_origins: Iterable[str] = (),
+                 allowed_hosts: Iterable[str] = ()):
+        self.host = host
+        self.port = port
+        self.token = token or load_or_create_token(token_path)
+        self.allowed_origins = set(allowed_origins)
+        self.allowed_hosts = {name.lower() for name in (*LOOPBACK_HOSTS, host, *allowed_hosts)}
+        self.db = AsyncTimeTrackerDB(db_path, readers=readers)
+        self.changes = ChangeWatcher(self.db.db_path)
+        self.metrics = ServerMetrics()
+        self._projects = None
+        self._server = None
+        self._pdf_exporter = None
+        self.routes = [
+            ("GET", re.compile(r"/projects"), self.list_projects),
+            ("POST", re.compile(r"/projects"), self.add_project),
+            ("GET", re.compile(r"/timers"), self.list_timers),
+            ("POST", re.compile(r"/timers/start"), self.start_timer),
+            ("POST", re.compile(r"/timers/stop"), self.stop_timer),
+            ("GET", re.compile(r"/entries"), self.list_entries),
+            ("GET", re.compile(r"/entries/(\d+)"), self.get_entry),
+            ("PATCH", re.compile(r"/entries/(\d+)"), self.update_entry),
+            ("DELETE", re.compile(r"/entries/(\d+)"), self.delete_entry),
+            ("GET", re.compile(r"/aggregates"), self.aggregates),
+            ("GET", re.compile(r"/exports/pdf"), self.export_pdf),
+            ("GET", re.compile(r"/exports/csv"), self.export_csv),
+            ("GET", re.compile(r"/metrics"), self.get_metrics),
+        ]
+
+    # Lifecycle
+
+    async def start(self):
+        """Start listening; with port 0 the chosen port is stored in self.port"""
+        self.changes.mark_seen()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self.changes.close()
+        await self.db.close()
+
+    # HTTP plumbing
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                if length < 0:
+                    # Without a valid length the next request cannot be found, so close
+                    await self._write_response(writer, 400, {"error": "Invalid Content-Length"}, False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._write_response(writer, 413, {"error": "Request body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                started = time.perf_counter()
+                try:
+                    self._check_request(method, headers)
+                except HTTPError as e:
+                    route, status, payload = "rejected", e.status, {"error": str(e)}
+                else:
+                    route, status, payload = await self._dispatch(method, target, body)
+                await self._write_response(writer, status, payload, keep_alive)
+                self.metrics.record(route, time.perf_counter() - started, status)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _check_request(self, method, headers):
+        """Refuse requests a web page could have sent through the user's browser"""
+        # A foreign Host means DNS rebinding: the page's domain now points at us
+        host = headers.get("host", "")
+        if urlsplit(f"//{host}").hostname not in self.allowed_hosts:
+            raise HTTPError(403, f"Host '{host}' is not allowed")
+        origin = headers.get("origin")
+        if origin is not None and origin not in self.allowed_origins:
+            raise HTTPError(403, f"Origin '{origin}' is not allowed")
+        # Pages can POST text/plain without a preflight, but not application/json
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        if method in ("POST", "PATCH") and content_type != "application/json":
+            raise HTTPError(415, "Content-Type must be application/json")
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(
+                token.strip().encode("latin-1"), self.token.encode("latin-1")):
+            raise HTTPError(401, "Missing or invalid token")
+
+    async def _write_response(self, writer, status, payload, keep_alive):
+        headers = []
+        if isinstance(payload, Response):
+            body = payload.body
+            headers.append(f"Content-Type: {payload.content_type}")
+            if payload.filename:
+                headers.append(f'Content-Disposition: attachment; filename="{payload.filename}"')
+        else:
+            body = json.dumps(payload).encode("utf-8")
+            headers.append("Content-Type: application/json")
+        headers.append(f"Content-Length: {len(body)}")
+        headers.append("Connection: keep-alive" if keep_alive else "Connection: close")
+        head = f"HTTP/1.1 {status} {REASONS.get(status, 'OK')}\r\n" + "\r\n".join(headers) + "\r\n\r\n"
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def _dispatch(self, method, target, body):
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        allowed = False
+        for route_method, pattern, handler in self.routes:
+            match = pattern.fullmatch(path)
+            if not match:
+                continue
+            allowed = True
+            if route_method != method:
+                continue
+            route = f"{method} {pattern.pattern}"
+            try:
+                data = json.loads(body) if body else {}
+                if not isinstance(data, dict):
+                    raise HTTPError(400, "Request body must be a JSON object")
+                result = await handler(*match.groups(), query=query, data=data)
+                if isinstance(result, Response):
+                    return route, result.status, result
+                status = 201 if method == "POST" else 200
+                return route, status, result
+            except HTTPError as e:
+                return route, e.status, {"error": str(e)}
+            except json.JSONDecodeError:
+                return route, 400, {"error": "Request body is not valid JSON"}
+            except ValueError as e:
+                return route, 400, {"error": str(e)}
+            except Exception as e:
+                return route, 500, {"error": f"Internal error: {e}"}
+
+        if allowed:
+            return "unmatched", 405, {"error": f"Method {method} not allowed for {path}"}
+        return "unmatched", 404, {"error": f"No route for {path}"}
+
+    # Helpers
+
+    async def _get_projects(self):
+        # One PRAGMA tells us whether anyone wrote since the cache was filled; it never waits for locks
+        if self.changes.poll() or self._projects is None:
+            self._projects = [dict(zip(PROJECT_FIELDS, row)) for row in await self.db.get_projects()]
+        return self._projects
+
+    async def _require_project(self, project_id):
+        if project_id is None:
+            raise HTTPError(400, "project_id is required")
+        if not any(project["id"] == project_id for project in await self._get_projects()):
+            raise HTTPError(404, f"Project {project_id} not found")
+
+    def _entry_filters(self, query):
+        return (
+            _parse_int(query.get("project_id"), "project_id"),
+            _parse_date(query.get("start"), "start"),
+            _parse_date(query.get("end"), "end"),
+        )
+
+    # Handlers
+
+    async def list_projects(self, query, data):
+        return await self._get_projects()
+
+    async def add_project(self, query, data):
+        if not data.get("name"):
+            raise HTTPError(400, "name is required")
+        project_id = await self.db.add_project(
+            data["name"], data.get("description", ""), data.get("default_email", ""),
+            data.get("rate"), data.get("currency", "EUR")
+        )
+        self._projects = None
+        return {"id": project_id}
+
+    async def list_timers(self, query, data):
+        timers = await self.db.get_running_timers()
+        fields = ("entry_id", "project_id", "project", "description", "start_time")
+        return [dict(zip(fields, timer)) for timer in timers]
+
+    async def start_timer(self, query, data):
+        project_id = _parse_int(data.get("project_id"), "project_id")
+        await self._require_project(project_id)
+        entry_id = await self.db.start_timer(project_id, data.get("description", ""))
+        return {"entry_id": entry_id}
+
+    async def stop_timer(self, query, data):
+        project_id = _parse_int(data.get("project_id"), "project_id")
+        await self._require_project(project_id)
+        duration = await self.db.stop_timer(project_id)
+        if duration is None:
+            raise HTTPError(404, "No running timer for this project")
+        return {"duration_minutes": duration}
+
+    async def list_entries(self, query, data):
+        entries = await self.db.get_time_entries(*self._entry_filters(query))
+        return [dict(zip(ENTRY_FIELDS, entry)) for entry in entries]
+
+    async def get_entry(self, entry_id, query, data):
+        entry = await self.db.get_entry(int(entry_id))
+        if entry is None:
+            raise HTTPError(404, f"Entry {entry_id} not found")
+        return dict(zip(ENTRY_FIELDS, entry))
+
+    async def update_entry(self, entry_id, query, data):
+        updated = await self.db.update_entry(
+            int(entry_id),
+            description=data.get("description"),
+            start_time=data.get("start_time"),
+            end_time=data.get("end_time"),
+            project_id=_parse_int(data.get("project_id"), "project_id"),
+        )
+        if not updated:
+            raise HTTPError(404, f"Entry {entry_id} not found or nothing to update")
+        return await self.get_entry(entry_id, query=query, data={})
+
+    async def delete_entry(self, entry_id, query, data):
+        if not await self.db.delete_entry(int(entry_id)):
+            raise HTTPError(404, f"Entry {entry_id} not found")
+        return {"deleted": int(entry_id)}
+
+    async def aggregates(self, query, data):
+        group_by = query.get("group", "project")
+        groups = await self.db.get_entry_groups(group_by, *self._entry_filters(query))
+        fields = ("key", "label", "currency", "entries", "seconds", "amount")
+        return [dict(zip(fields, group)) for group in groups]
+
+    async def export_pdf(self, query, data):
+        project_id, start_date, end_date = self._entry_filters(query)
+        entries = await self.db.get_time_entries(project_id, start_date, end_date)
+        project_name = None
+        if project_id is not None:
+            for project in await self._get_projects():
+                if project["id"] == project_id:
+                    project_name = project["name"]
+
+        def render():
+            # reportlab is only imported for the first PDF request
+            if self._pdf_exporter is None:
+                from .pdf_export import PDFExporter
+                self._pdf_exporter = PDFExporter()
+            buffer = io.BytesIO()
+            self._pdf_exporter.export_time_report(entries, buffer, project_name, start_date, end_date)
+            return buffer.getvalue()
+
+        pdf = await asyncio.get_running_loop().run_in_executor(None, render)
+        return Response(pdf, "application/pdf", filename="timesheet.pdf")
+
+    async def export_csv(self, query, data):
+        entries = await self.db.get_time_entries(*self._entry_filters(query))
+        buffer = io.StringIO()
+        out = csv.writer(buffer)
+        out.writerow(ENTRY_FIELDS)
+        out.writerows(entries)
+        return Response(buffer.getvalue().encode("utf-8"), "text/csv; charset=utf-8", filename="timesheet.csv")
+
+    async def get_metrics(self, query, data):
+        return self.metrics.snapshot()
+
+
+def main(argv=None):
+    """Run the tracking service until interrupted"""
+    parser = argparse.ArgumentParser(prog="timetracking serve", description="Local HTTP/JSON tracking service")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="address to bind (default: localhost only)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--db", dest="db_path", default=None, help="database file (default: ~/time_tracker.db)")
+    parser.add_argument("--token-file", default=None, help="token file (default: ~/.timetracking_token)")
+    parser.add_argument("--allow-origin", action="append", default=[], metavar="ORIGIN",
+                        help="accept requests from this Origin, e.g. a browser extension (repeatable)")
+    parser.add_argument("--allow-host", action="append", default=[], metavar="HOST",
+                        help="accept this Host header besides localhost and --host (repeatable)")
+    args = parser.parse_args(argv)
+
+    server = TrackingServer(args.db_path, args.host, args.port, token_path=args.token_file,
+                            allowed_origins=args.allow_origin, allowed_hosts=args.allow_host)
+
+    async def run():
+        await server.start()
+        print(f"Time Tracker service listening on http://{server.host}:{server.port}")
+        print(f"Send 'Authorization: Bearer <token>' with the token from {args.token_file or default_token_path()}")
+        if server.host not in LOOPBACK_HOSTS:
+            print("Warning: the service is reachable from other machines; anyone with the token can use it")
+        try:
+            await server._server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
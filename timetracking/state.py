@@ -0,0 +1,86 @@
+"""
+Timer state file for shell prompts and status bars.
+
+TimeTrackerDB rewrites a small JSON file next to the database whenever timers
+start or stop or entries change. Prompts read that file instead of querying
+SQLite every second, so rendering is a file read plus some formatting and never
+waits on the database lock. This module deliberately does not import sqlite3.
+
+The file holds::
+
+    {"version": 1, "updated": <epoch>, "day": "YYYY-MM-DD",
+     "today_seconds": <closed time today>,
+     "running": [{"entry_id", "project_id", "project", "description", "started": <epoch>}]}
+"""
+import datetime
+import json
+import os
+import time
+from typing import Dict, Optional
+
+STATE_VERSION = 1
+DEFAULT_PROMPT_FORMAT = "{project} {elapsed}"
+
+
+def default_db_path() -> str:
+    """Database path used by TimeTrackerDB when none is given"""
+    return os.path.join(os.path.expanduser("~"), "time_tracker.db")
+
+
+def state_path(db_path: Optional[str] = None) -> str:
+    """State file belonging to a database file"""
+    return os.path.splitext(db_path or default_db_path())[0] + ".state.json"
+
+
+def write_state(path: str, state: Dict):
+    """Replace the state file atomically so readers never see a partial file"""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(state, separators=(",", ":")))
+    os.replace(temp_path, path)
+
+
+def read_state(path: str) -> Optional[Dict]:
+    """Read the state file; None if it is missing or unreadable"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(state, dict) or state.get("version") != STATE_VERSION:
+        return None
+    return state
+
+
+def format_duration(seconds: float) -> str:
+    """Format seconds as H:MM:SS"""
+    seconds = max(0, int(seconds))
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def format_prompt(state: Optional[Dict], fmt: str = DEFAULT_PROMPT_FORMAT,
+                  idle: str = "", now: Optional[float] = None) -> str:
+    """Render running timers with ``fmt``; ``idle`` is returned when none run.
+
+    ``fmt`` may use {project}, {description}, {elapsed} and {today}, the total
+    tracked today including running timers. Several running timers are joined
+    with ", ".
+    """
+    if not state or not state.get("running"):
+        return idle
+    now = time.time() if now is None else now
+
+    midnight = datetime.datetime.combine(datetime.date.fromtimestamp(now), datetime.time()).timestamp()
+    today = state.get("today_seconds", 0) if state.get("day") == datetime.date.fromtimestamp(now).isoformat() else 0
+    for timer in state["running"]:
+        today += max(0, now - max(timer["started"], midnight))
+
+    parts = []
+    for timer in state["running"]:
+        parts.append(fmt.format(
+            project=timer["project"],
+            description=timer.get("description") or "",
+            elapsed=format_duration(now - timer["started"]),
+            today=format_duration(today),
+        ))
+    return ", ".join(parts)
@@ -0,0 +1,229 @@
+"""
+Delta sync between database files using the trigger-maintained changelog.
+
+Every write to a synced table is recorded in ``changelog`` with a Lamport
+clock and the origin id of the file that made it. A changeset holds the
+current state of each row changed after a watermark, so syncing a day's work
+only moves those rows. Conflicts are resolved deterministically: the change
+with the higher ``(clock, origin)`` pair wins on both sides.
+"""
+import gzip
+import json
+import os
+import sqlite3
+from typing import Dict, Optional
+
+from .database import SYNCED_TABLES
+
+CHANGESET_FORMAT = "timetracking-changeset"
+CHANGESET_VERSION = 1
+
+# Columns carried for each table. Foreign keys travel as the parent's uid because
+# integer ids differ between files.
+SYNC_COLUMNS = {
+    "projects": ("name", "description", "default_email", "rate", "currency", "created_at"),
+    "project_emails": ("project_uid", "email", "is_primary", "created_at"),
+    "time_entries": ("project_uid", "description", "start_time", "end_time", "duration_minutes", "created_at"),
+}
+
+
+def _select_rows_sql(table: str) -> str:
+    """SELECT returning changelog metadata plus the current row for each change"""
+    columns = []
+    for column in SYNC_COLUMNS[table]:
+        if column == "project_uid":
+            columns.append("(SELECT p.uid FROM projects p WHERE p.id = t.project_id)")
+        else:
+            columns.append(f"t.{column}")
+    return f"""
+        SELECT c.seq, c.row_uid, c.op, c.clock, c.origin, {', '.join(columns)}
+        FROM changelog c
+        LEFT JOIN {table} t ON t.uid = c.row_uid
+        WHERE c.seq > ? AND +c.table_name = ?
+        ORDER BY c.seq
+    """
+
+
+def get_origin(db) -> str:
+    """Get the origin id identifying this database file"""
+    conn = sqlite3.connect(db.db_path)
+    try:
+        return conn.execute("SELECT origin FROM sync_state WHERE id = 1").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def export_changeset(db, path: str, since: Optional[int] = None,
+                     exclude_origin: Optional[str] = None) -> int:
+    """Write every change logged after ``since`` to a compressed changeset file.
+
+    When ``since`` is omitted the watermark of the previous export is used and
+    advanced. ``exclude_origin`` skips changes that came from that file, so a
+    peer is not sent back its own work. Returns the new watermark.
+    """
+    conn = sqlite3.connect(db.db_path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT origin, last_export_seq FROM sync_state WHERE id = 1")
+        origin, last_export_seq = cursor.fetchone()
+        start = last_export_seq if since is None else since
+
+        watermark = start
+        changes = []
+        for table in SYNCED_TABLES:
+            for row in cursor.execute(_select_rows_sql(table), (start, table)):
+                seq, uid, op, clock, change_origin = row[:5]
+                watermark = max(watermark, seq)
+                if exclude_origin and change_origin == exclude_origin:
+                    continue
+                change = {"table": table, "uid": uid, "op": op, "clock": clock, "origin": change_origin}
+                if op != "D":
+                    change["row"] = list(row[5:])
+                changes.append(change)
+
+        changeset = {
+            "format": CHANGESET_FORMAT,
+            "version": CHANGESET_VERSION,
+            "origin": origin,
+            "since": start,
+            "until": watermark,
+            "columns": SYNC_COLUMNS,
+            "changes": changes,
+        }
+
+        # Write to a temporary file first so a failed export never leaves a truncated changeset
+        temp_path = f"{path}.tmp"
+        with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+            f.write(json.dumps(changeset, separators=(",", ":")))
+        os.replace(temp_path, path)
+
+        if since is None:
+            cursor.execute("UPDATE sync_state SET last_export_seq = ? WHERE id = 1", (watermark,))
+            conn.commit()
+        return watermark
+    finally:
+        conn.close()
+
+
+def _upsert(cursor, table: str, uid: str, row: Dict) -> Optional[int]:
+    """Insert or update the row with this uid and return its local id"""
+    values = dict(row)
+    if "project_uid" in values:
+        cursor.execute("SELECT id FROM projects WHERE uid = ?", (values.pop("project_uid"),))
+        project = cursor.fetchone()
+        if project is None:
+            # Parent project was deleted here or never synced
+            return None
+        values["project_id"] = project[0]
+
+    cursor.execute(f"SELECT id FROM {table} WHERE uid = ?", (uid,))
+    existing = cursor.fetchone()
+    columns = list(values)
+
+    for _ in range(3):
+        try:
+            if existing:
+                assignments = ", ".join(f"{column} = ?" for column in columns)
+                cursor.execute(
+                    f"UPDATE {table} SET {assignments} WHERE id = ?",
+                    [values[column] for column in columns] + [existing[0]]
+                )
+                return existing[0]
+            placeholders = ", ".join("?" for _ in columns)
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(columns)}, uid) VALUES ({placeholders}, ?)",
+                [values[column] for column in columns] + [uid]
+            )
+            return cursor.lastrowid
+        except sqlite3.IntegrityError:
+            if table != "projects":
+                raise
+            # Same project name created independently on both sides. Both files keep
+            # both projects and suffix the one with the larger uid, so they converge.
+            cursor.execute("SELECT id, uid FROM projects WHERE name = ?", (values["name"],))
+            other = cursor.fetchone()
+            if other is None:
+                raise
+            other_id, other_uid = other
+            if other_uid > uid:
+                cursor.execute(
+                    "UPDATE projects SET name = name || ' (' || substr(uid, 1, 8) || ')' WHERE id = ?",
+                    (other_id,)
+                )
+            else:
+                values["name"] = f"{values['name']} ({uid[:8]})"
+    raise ValueError(f"Could not resolve project name conflict for '{row.get('name')}'")
+
+
+def import_changeset(db, path: str) -> Dict[str, int]:
+    """Apply a changeset file produced by ``export_changeset``.
+
+    Applying is idempotent: changes that are already known or older than the
+    local version of a row are skipped. Returns counts of applied, skipped and
+    conflicting (locally newer) changes.
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        changeset = json.load(f)
+    if changeset.get("format") != CHANGESET_FORMAT or changeset.get("version") != CHANGESET_VERSION:
+        raise ValueError(f"Not a timetracking changeset: {path}")
+
+    order = {table: i for i, table in enumerate(SYNCED_TABLES)}
+    changes = sorted(changeset["changes"], key=lambda change: order[change["table"]])
+    result = {"applied": 0, "skipped": 0, "conflicts": 0}
+
+    conn = sqlite3.connect(db.db_path)
+    cursor = conn.cursor()
+    try:
+        # Silence the changelog triggers; remote changes are logged with their own clock below
+        cursor.execute("UPDATE sync_state SET applying = 1 WHERE id = 1")
+        max_clock = 0
+        for change in changes:
+            table, uid, op = change["table"], change["uid"], change["op"]
+            clock, origin = change["clock"], change["origin"]
+            max_clock = max(max_clock, clock)
+
+            cursor.execute(
+                "SELECT clock, origin FROM changelog WHERE table_name = ? AND row_uid = ?",
+                (table, uid)
+            )
+            local = cursor.fetchone()
+            if local and (local[0], local[1]) >= (clock, origin):
+                if (local[0], local[1]) == (clock, origin):
+                    result["skipped"] += 1
+                else:
+                    result["conflicts"] += 1
+                continue
+
+            if op == "D":
+                cursor.execute(f"SELECT id FROM {table} WHERE uid = ?", (uid,))
+                existing = cursor.fetchone()
+                row_id = existing[0] if existing else 0
+                cursor.execute(f"DELETE FROM {table} WHERE uid = ?", (uid,))
+            else:
+                row = dict(zip(changeset["columns"][table], change["row"]))
+                row_id = _upsert(cursor, table, uid, row)
+                if row_id is None:
+                    result["skipped"] += 1
+                    continue
+
+            cursor.execute("DELETE FROM changelog WHERE table_name = ? AND row_uid = ?", (table, uid))
+            cursor.execute(
+                "INSERT INTO changelog (table_name, row_id, row_uid, op, clock, origin) VALUES (?, ?, ?, ?, ?, ?)",
+                (table, row_id, uid, op, clock, origin)
+            )
+            result["applied"] += 1
+
+        # Lamport rule: later local edits must sort after everything seen here
+        cursor.execute(
+            "UPDATE sync_state SET applying = 0, clock = MAX(clock, ?) WHERE id = 1",
+            (max_clock,)
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    if result["applied"]:
+        db.refresh_state()
+    return result
@@ -0,0 +1,172 @@
+"""
+Update checking and self-upgrade.
+
+Everything here blocks (network, pip), so the GUI runs it through
+``background.UIDispatcher``. The latest version reported by the package index
+is cached on disk for a few hours so repeated checks do not hit the network.
+The installed version comes from ``importlib.metadata`` rather than the slow
+``pkg_resources``.
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.request import urlopen
+
+PACKAGE_NAME = "timetracking"
+DEFAULT_INDEX_URL = "https://pypi.org/pypi/{package}/json"
+CACHE_TTL_SECONDS = 6 * 60 * 60
+
+
+def get_current_version(package: str = PACKAGE_NAME) -> Optional[str]:
+    """Installed version of ``package``, or None if it cannot be determined.
+
+    When this package is run from a source checkout (``python main.py``)
+    rather than installed, the version is read from ``pyproject.toml``.
+    """
+    try:
+        from importlib import metadata
+        return metadata.version(package)
+    except ImportError:
+        pass
+    except metadata.PackageNotFoundError:
+        pass
+    return _checkout_version() if package == PACKAGE_NAME else None
+
+
+def _checkout_version() -> Optional[str]:
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pyproject.toml")
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip().startswith("version ="):
+                    return line.split("=", 1)[1].strip().strip('"')
+    except OSError:
+        pass
+    return None
+
+
+def version_tuple(version: str) -> Tuple[int, ...]:
+    """Comparable tuple from a version string; non-numeric suffixes are ignored"""
+    parts = []
+    for part in version.split("."):
+        digits = ""
+        for char in part:
+            if not char.isdigit():
+                break
+            digits += char
+        if not digits:
+            break
+        parts.append(int(digits))
+    return tuple(parts)
+
+
+class UpdateChecker:
+    """Look up the latest release of the package and upgrade to it"""
+
+    def __init__(self, package: str = PACKAGE_NAME, index_url: str = DEFAULT_INDEX_URL,
+                 cache_path: Optional[str] = None, ttl: float = CACHE_TTL_SECONDS, timeout: float = 5):
+        self.package = package
+        self.index_url = index_url.format(package=package)
+        if cache_path is None:
+            # Use user's home directory for the cache, like the email config
+            cache_path = os.path.join(os.path.expanduser("~"), ".timetracking_update.json")
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.timeout = timeout
+
+    def cached_latest_version(self) -> Optional[str]:
+        """Latest version from the cache, if it is fresh and for the same index"""
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cache.get("index_url") != self.index_url:
+            return None
+        if time.time() - cache.get("checked_at", 0) > self.ttl:
+            return None
+        return cache.get("latest")
+
+    def fetch_latest_version(self) -> str:
+        """Ask the package index for the latest version and cache the answer"""
+        with urlopen(self.index_url, timeout=self.timeout) as response:
+            latest = json.load(response)["info"]["version"]
+
+        cache = {"index_url": self.index_url, "checked_at": time.time(), "latest": latest}
+        try:
+            temp_path = f"{self.cache_path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(cache, f)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            print(f"Warning: could not cache update check: {e}")
+        return latest
+
+    def check(self, force: bool = False) -> Dict:
+        """Compare the installed version with the latest release.
+
+        Returns ``{"current", "latest", "update_available", "cached"}``. Network
+        and parse errors propagate (``OSError``, ``ValueError``, ``KeyError``).
+        """
+        current = get_current_version(self.package)
+        latest = None if force else self.cached_latest_version()
+        cached = latest is not None
+        if latest is None:
+            latest = self.fetch_latest_version()
+        return {
+            "current": current,
+            "latest": latest,
+            "update_available": bool(current) and version_tuple(current) < version_tuple(latest),
+            "cached": cached,
+        }
+
+    def upgrade_command(self, target_version: str) -> List[str]:
+        """Command that installs ``target_version``"""
+        if shutil.which(self.package):
+            # Installed as a pipx application
+            return ["pipx", "upgrade", self.package]
+        return [sys.executable, "-m", "pip", "install", "--upgrade", "--no-cache-dir",
+                f"{self.package}=={target_version}"]
+
+    def upgrade(self, target_version: str, progress: Optional[Callable[[str], None]] = None,
+                max_wait: float = 60, retry_delay: float = 5) -> str:
+        """Install ``target_version``, retrying until it is visible or ``max_wait`` passes.
+
+        A freshly published release can take a while to reach the index
+        mirrors, so the install is retried. Returns the installed version;
+        raises RuntimeError if the target never shows up.
+        """
+        import importlib
+        report = progress or (lambda message: None)
+        deadline = time.monotonic() + max_wait
+        attempt = 0
+
+        while True:
+            attempt += 1
+            report(f"Installing version {target_version} (attempt {attempt})...")
+            try:
+                result = subprocess.run(self.upgrade_command(target_version),
+                                        capture_output=True, text=True, timeout=120)
+                installed = result.returncode == 0
+            except (OSError, subprocess.SubprocessError) as e:
+                print(f"Upgrade failed: {e}")
+                installed = False
+
+            if installed:
+                importlib.invalidate_caches()
+                current = get_current_version(self.package)
+                if current and version_tuple(current) >= version_tuple(target_version):
+                    report(f"Updated to version {current}")
+                    return current
+
+            if time.monotonic() + retry_delay > deadline:
+                raise RuntimeError(
+                    f"Package was not updated to version {target_version} after {attempt} attempts. "
+                    f"PyPI may not have propagated yet. Please try again in a few minutes."
+                )
+            report(f"Version {target_version} not available yet, retrying...")
+            time.sleep(retry_delay)